@@ -0,0 +1,139 @@
+"""
+Benchmark do armazém colunar (src/database/colunar.py) contra as consultas
+SQL lidas com pandas usadas hoje pelo DBManager.
+
+Sobre um banco sintético (benchmarks.gerador_dados), mede a carga do
+armazém, a página filtrada da aba "Tabela de Viagens" (sem filtro, por ano,
+por motorista e a página seguinte), o histograma e a densidade, e a inclusão
+de uma viagem (atualização incremental contra recarga completa). Antes de
+medir, confere que os dois caminhos retornam os mesmos resultados.
+O caminho SQL é medido com o cache de consultas limpo (tempo de um acerto
+de cache é o mesmo nos dois); o tempo registrado é a mediana das repetições.
+
+Uso:
+    python -m benchmarks.bench_armazem_colunar --viagens 100000
+    python -m benchmarks.bench_armazem_colunar --db /tmp/carga.db --repeticoes 10
+"""
+import argparse
+import inspect
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.gerador_dados import gerar
+
+
+def medir(funcao, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar:
+            preparar()
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def consultas(db):
+    """
+    Retorna {nome: (método do DBManager, argumentos)} dos casos comparados.
+    """
+    opcoes = db.obter_opcoes_filtro()
+    ano = opcoes["anos"][-1] if opcoes["anos"] else None
+    motorista = opcoes["motoristas"][0] if opcoes["motoristas"] else None
+    primeira = db.buscar_viagens(limite=50)
+    return {
+        "pagina": ("buscar_viagens", dict(limite=50)),
+        "pagina_ano": ("buscar_viagens", dict(filtros={"ano": ano}, limite=50)),
+        "pagina_motorista": ("buscar_viagens", dict(filtros={"motorista": motorista}, limite=50)),
+        "pagina_seguinte": ("buscar_viagens", dict(limite=50, cursor=primeira["proximo_cursor"])),
+        "pagina_ano_mes": ("buscar_viagens", dict(filtros={"ano": ano, "mes": 3}, ordem="data_saida", limite=50)),
+        "histograma": ("histograma_viagens", dict(coluna="total_km", max_bins=20)),
+        "densidade": ("densidade_viagens", dict(coluna_x="total_km", coluna_y="valor_total", max_bins=40)),
+    }
+
+
+def iguais(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(iguais(a[chave], b[chave]) for chave in a)
+    if isinstance(a, pd.DataFrame):
+        try:
+            pd.testing.assert_frame_equal(a.reset_index(drop=True), b.reset_index(drop=True),
+                                          check_dtype=False)
+            return True
+        except AssertionError:
+            return False
+    if isinstance(a, float):
+        return abs(a - b) <= 1e-6 * max(1.0, abs(a))
+    return a == b
+
+
+def executar(db_path, repeticoes):
+    from src.database.colunar import TripStore
+    from src.database.db_manager import DBManager
+
+    db = DBManager(db_path)
+    casos = consultas(db)
+    resultados_sql, tempos_sql = {}, {}
+    for nome, (metodo, argumentos) in casos.items():
+        funcao = getattr(db, metodo)
+        db.cache.limpar()
+        resultados_sql[nome] = funcao(**argumentos)
+        tempos_sql[nome] = medir(lambda: funcao(**argumentos), repeticoes, preparar=db.cache.limpar)
+
+    armazem = TripStore(db)
+    carga = medir(lambda: armazem._carregar(db.cache.versao("viagens")), repeticoes)
+    db._armazem = armazem
+    linhas = []
+    for nome, (metodo, argumentos) in casos.items():
+        # Sem o cache de consultas nem a medição: só o cálculo sobre os arrays
+        chamar = inspect.unwrap(getattr(DBManager, metodo))
+        resultado = chamar(db, **argumentos)
+        if not iguais(resultados_sql[nome], resultado):
+            raise SystemExit(f"Resultado diferente do SQL em {nome}")
+        tempo = medir(lambda: chamar(db, **argumentos), repeticoes)
+        linhas.append((nome, tempos_sql[nome], tempo))
+
+    total = armazem.n
+    viagem = (None, None, "Carro bench", 1000.0, 1100.0, "2024-06-01", "2024-06-02", 500.0,
+              "Motorista bench", 150.0, 0.0, 10.0, 0.0, 12.0)
+    incremental = medir(lambda: db.inserir_viagem(*viagem), repeticoes)
+    resultado = db.buscar_viagens(filtros={"motorista": "Motorista bench"}, limite=None)
+    if resultado["total_viagens"] != repeticoes:
+        raise SystemExit("Inclusões não refletidas no armazém")
+    db._armazem = None
+    recarga = medir(lambda: (db.inserir_viagem(*viagem), armazem._carregar(db.cache.versao("viagens"))),
+                    repeticoes)
+
+    print(f"{total} viagens; resultados iguais aos do SQL em todos os casos")
+    print(f"{'caso':<24} {'SQL (ms)':>10} {'armazém (ms)':>14} {'ganho':>8}")
+    print(f"{'carga do armazém':<24} {'':>10} {carga:>14.1f}")
+    for nome, sql, colunar in linhas:
+        print(f"{nome:<24} {sql:>10.1f} {colunar:>14.1f} {sql / colunar:>7.1f}x")
+    print(f"{'inserir_viagem':<24} {recarga:>10.1f} {incremental:>14.1f} {recarga / incremental:>7.1f}x"
+          "  (recarga completa x incremental)")
+    db.pool.fechar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=100000)
+    parser.add_argument("--db", help="banco existente, copiado antes das inclusões (padrão: gera um banco)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "armazem.db")
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            gerar(db_path, args.viagens)
+        executar(db_path, args.repeticoes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Benchmark da camada de dados sobre bancos sintéticos (benchmarks.gerador_dados).
+
+Mede cada método de leitura do DBManager, o fluxo da aba "Tabela de Viagens"
+(opções de filtro, página filtrada com subtotais e página seguinte), o
+preparo dos dados de cada gráfico (com o tamanho da especificação
+Vega-Lite dos gráficos de dispersão e histograma) e a exportação, nos
+volumes pedidos.
+Cada caso é medido "frio" (cache de consultas limpo antes de cada execução)
+e "quente" (resultado já no cache); o tempo registrado é a mediana das
+repetições. O resultado vai para um JSON com o commit atual, para comparar
+execuções de commits diferentes com --comparar.
+
+Uso:
+    python -m benchmarks.bench_camada_dados --viagens 10000,100000,1000000 --saida bench_atual.json
+    python -m benchmarks.bench_camada_dados --viagens 100000 --comparar bench_anterior.json
+"""
+import argparse
+import datetime
+import fnmatch
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.gerador_dados import gerar
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def casos(db):
+    """
+    Retorna {nome: função sem argumentos} com os casos medidos sobre db.
+    """
+    import altair as alt
+
+    from src.services.exportacao import exportar_viagens
+    from src.services.graficos import (
+        dados_custos_por_data, dados_distribuicao_custos, dados_evolucao_diaria, preparar_resumo
+    )
+    from src.services.forecast import prever_viagens
+
+    alt.data_transformers.disable_max_rows()
+    opcoes = db.obter_opcoes_filtro()
+    ano = opcoes["anos"][-1] if opcoes["anos"] else None
+    motorista = opcoes["motoristas"][0] if opcoes["motoristas"] else None
+    carro = opcoes["carros"][0] if opcoes["carros"] else None
+
+    def resumo_grafico():
+        return preparar_resumo(db.obter_resumo_diario())
+
+    def tabela_filtrada():
+        filtros = {"ano": ano, "mes": None, "origem_id": None, "destino_id": None, "motorista": motorista}
+        db.obter_opcoes_filtro()
+        pagina = db.buscar_viagens(filtros, "-data_saida", 50)
+        if pagina["proximo_cursor"] is not None:
+            db.buscar_viagens(filtros, "-data_saida", 50, pagina["proximo_cursor"])
+
+    def exportar(formato):
+        return lambda: exportar_viagens(db, io.BytesIO(), formato)
+
+    return {
+        "obter_origens": db.obter_origens,
+        "obter_destinos": db.obter_destinos,
+        "buscar_origens_prefixo": lambda: db.buscar_origens("bel hor"),
+        "buscar_origens_amplo": lambda: db.buscar_origens("rua"),
+        "obter_carros": db.obter_carros,
+        "obter_motoristas": db.obter_motoristas,
+        "obter_tipos_oleo": db.obter_tipos_oleo,
+        "obter_viagens": db.obter_viagens,
+        "obter_viagens_completo": db.obter_viagens_completo,
+        "listar_viagens": db.listar_viagens,
+        "obter_opcoes_filtro": db.obter_opcoes_filtro,
+        "obter_resumo_diario": db.obter_resumo_diario,
+        "buscar_viagens_primeira_pagina": lambda: db.buscar_viagens(),
+        "tabela_filtro_subtotais_paginacao": tabela_filtrada,
+        "grafico1_evolucao_diaria": lambda: dados_evolucao_diaria(resumo_grafico()),
+        "grafico2_distribuicao_custos": lambda: dados_distribuicao_custos(resumo_grafico()),
+        "grafico3_dispersao_spec": lambda: alt.Chart(db.amostra_viagens()["viagens"]).mark_circle().encode(
+            x="Total de KM:Q", y="Valor Total da Viagem:Q", color="Endereço de Origem:N").to_dict(),
+        "grafico3_densidade_spec": lambda: alt.Chart(db.densidade_viagens()).mark_rect().encode(
+            x=alt.X("x_inicio:Q", bin="binned"), x2="x_fim:Q", y=alt.Y("y_inicio:Q", bin="binned"),
+            y2="y_fim:Q", color="Número de Viagens:Q").to_dict(),
+        "grafico4_histograma_spec": lambda: alt.Chart(db.histograma_viagens()).mark_bar().encode(
+            alt.X("Início:Q", bin="binned"), x2="Fim:Q", y="Número de Viagens:Q").to_dict(),
+        "grafico5_custos_por_data": lambda: dados_custos_por_data(resumo_grafico()),
+        "grafico6_previsao": lambda: prever_viagens(db, 30),
+        "grafico6_previsao_por_carro": lambda: prever_viagens(db, 30, carro=carro),
+        "exportar_xlsx": exportar("xlsx"),
+        "exportar_csv": exportar("csv"),
+        "exportar_parquet": exportar("parquet"),
+    }
+
+
+def medir(db, funcao, repeticoes):
+    """
+    Retorna (mediana fria, mediana quente) em segundos.
+    """
+    frios, quentes = [], []
+    for _ in range(repeticoes):
+        db.cache.limpar()
+        inicio = time.perf_counter()
+        funcao()
+        frios.append(time.perf_counter() - inicio)
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        quentes.append(time.perf_counter() - inicio)
+    return statistics.median(frios), statistics.median(quentes)
+
+
+def executar(volumes, repeticoes, filtro, pasta_bancos=None):
+    from src.database.db_manager import DBManager
+
+    resultado = {
+        "commit": _commit(),
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "repeticoes": repeticoes,
+        "volumes": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for viagens in volumes:
+            if pasta_bancos:
+                os.makedirs(pasta_bancos, exist_ok=True)
+            db_path = os.path.join(pasta_bancos or tmp, f"bench_{viagens}.db")
+            if not os.path.exists(db_path):
+                inicio = time.perf_counter()
+                gerar(db_path, viagens)
+                print(f"banco com {viagens} viagens gerado em {time.perf_counter() - inicio:.1f} s")
+            db = DBManager(db_path)
+            medidas = {}
+            for nome, funcao in casos(db).items():
+                if filtro and not fnmatch.fnmatch(nome, filtro):
+                    continue
+                frio, quente = medir(db, funcao, repeticoes)
+                medidas[nome] = {"frio_s": round(frio, 6), "quente_s": round(quente, 6)}
+                if nome.endswith("_spec"):
+                    # Tamanho da especificação Vega-Lite enviada ao navegador
+                    medidas[nome]["payload_bytes"] = len(json.dumps(funcao()))
+                print(f"{viagens:>9} {nome:<36} {frio:>10.4f} {quente:>10.4f}"
+                      + (f" {medidas[nome]['payload_bytes'] / 1024:>9.0f} KiB" if nome.endswith("_spec") else ""))
+            resultado["volumes"][str(viagens)] = medidas
+            db.pool.fechar()
+    return resultado
+
+
+def comparar(anterior, atual, tolerancia):
+    """
+    Imprime a razão atual/anterior de cada caso presente nos dois resultados
+    e retorna a quantidade de regressões (razão acima da tolerância).
+    """
+    regressoes = 0
+    print(f"\ncomparação com {anterior.get('commit')} (atual: {atual.get('commit')})")
+    print(f"{'viagens':>9} {'caso':<36} {'frio':>8} {'quente':>8}")
+    for volume, medidas in atual["volumes"].items():
+        for nome, medida in medidas.items():
+            base = anterior.get("volumes", {}).get(volume, {}).get(nome)
+            if not base:
+                continue
+            razoes = [medida[chave] / base[chave] if base[chave] else 1.0 for chave in ("frio_s", "quente_s")]
+            # Tempos abaixo de 1 ms oscilam demais para contar como regressão
+            regrediu = razoes[0] > tolerancia and medida["frio_s"] > 0.001
+            regressoes += regrediu
+            print(f"{volume:>9} {nome:<36} {razoes[0]:>7.2f}x {razoes[1]:>7.2f}x"
+                  + ("  <- regressão" if regrediu else ""))
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", default="10000,100000")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--casos", help="filtro dos casos no estilo glob, ex.: 'grafico*'")
+    parser.add_argument("--bancos", help="pasta onde guardar e reaproveitar os bancos gerados")
+    parser.add_argument("--saida", default="bench_camada_dados.json")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=1.2,
+                        help="razão atual/anterior (tempo frio) acima da qual o caso é uma regressão")
+    args = parser.parse_args()
+
+    print(f"{'viagens':>9} {'caso':<36} {'frio (s)':>10} {'quente (s)':>10}")
+    resultado = executar([int(n) for n in args.viagens.split(",")], args.repeticoes, args.casos, args.bancos)
+    with open(args.saida, "w", encoding="utf-8") as arquivo:
+        json.dump(resultado, arquivo, indent=2, ensure_ascii=False)
+    print(f"resultado salvo em {args.saida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            anterior = json.load(arquivo)
+        if comparar(anterior, resultado, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark da base offline de CEPs: carga de um CSV sintético e latência das
+buscas exata, por prefixo de CEP e por prefixo de logradouro.
+
+Uso:
+    python -m benchmarks.bench_cep_offline --linhas 1000000 --buscas 2000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from src.database.pool import obter_pool
+from src.utils.cep_offline import CepOfflineBackend, carregar_csv
+
+TIPOS = ["Rua", "Avenida", "Travessa", "Alameda", "Praça"]
+NOMES = ["São João", "Brasil", "das Flores", "Sete de Setembro", "Tiradentes", "Ipiranga",
+         "Paulista", "XV de Novembro", "Santos Dumont", "Getúlio Vargas", "Rio Branco"]
+UFS = ["SP", "RJ", "MG", "RS", "PR", "BA", "PE", "GO"]
+
+
+def gerar_csv(caminho, linhas, semente=42):
+    rng = random.Random(semente)
+    ceps = rng.sample(range(1_000_000, 99_999_999), linhas)
+    with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+        escritor = csv.writer(arquivo, delimiter=";")
+        escritor.writerow(["cep", "logradouro", "complemento", "bairro", "cidade", "uf"])
+        for cep in ceps:
+            logradouro = f"{rng.choice(TIPOS)} {rng.choice(NOMES)} {rng.randint(1, 500)}"
+            escritor.writerow([f"{cep:08d}", logradouro, "", f"Bairro {rng.randint(1, 300)}",
+                               f"Cidade {rng.randint(1, 900)}", rng.choice(UFS)])
+    return [f"{cep:08d}" for cep in ceps]
+
+
+def _medir(funcao, argumentos):
+    inicio = time.perf_counter()
+    for argumento in argumentos:
+        funcao(argumento)
+    return (time.perf_counter() - inicio) / len(argumentos) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--buscas", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        caminho_csv = os.path.join(tmp, "ceps.csv")
+        db_path = os.path.join(tmp, "ceps.db")
+
+        inicio = time.perf_counter()
+        ceps = gerar_csv(caminho_csv, args.linhas)
+        print(f"CSV sintético com {args.linhas} linhas gerado em {time.perf_counter() - inicio:.1f} s")
+
+        resultado = carregar_csv(caminho_csv, db_path=db_path)
+        print(f"carga: {resultado['carregadas']} CEPs em {resultado['segundos']:.1f} s "
+              f"({resultado['carregadas'] / resultado['segundos']:,.0f} linhas/s)")
+
+        backend = CepOfflineBackend(db_path)
+        rng = random.Random(7)
+        amostra = rng.sample(ceps, min(args.buscas, len(ceps)))
+        print(f"busca exata:               {_medir(backend.consultar, amostra):8.1f} µs")
+        print(f"prefixo de CEP (5 dígitos): {_medir(backend.buscar_por_cep, [c[:5] for c in amostra]):8.1f} µs")
+        logradouros = [f"{rng.choice(TIPOS)} {rng.choice(NOMES)[:4]}" for _ in amostra]
+        print(f"prefixo de logradouro:     {_medir(backend.buscar_por_logradouro, logradouros):8.1f} µs")
+        obter_pool(db_path).fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark da exportação de viagens: caminho anterior (DataFrame completo +
+DataFrame inteiro gravado com openpyxl em memória) x exportação em fluxo (XLSX constant_memory,
+CSV e Parquet). Cada caso roda em um subprocesso para medir o pico de
+memória (ru_maxrss) de forma isolada.
+
+Uso:
+    python -m benchmarks.bench_exportacao --linhas 10000,100000,1000000
+"""
+import argparse
+import io
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.gerador_dados import gerar
+
+CASOS = ["atual_openpyxl", "xlsx", "csv", "parquet"]
+
+
+def excel_em_memoria(df):
+    """
+    Caminho anterior da exportação: o DataFrame inteiro gravado com
+    openpyxl em um buffer, devolvido como bytes para o st.download_button.
+    """
+    import pandas as pd
+
+    saida = io.BytesIO()
+    with pd.ExcelWriter(saida, engine="openpyxl") as writer:
+        df.to_excel(writer, index=False, sheet_name="Viagens")
+    return saida.getvalue()
+
+
+def executar_caso(db_path, caso):
+    """
+    Executado no subprocesso: gera o arquivo e imprime "segundos bytes maxrss_kb".
+    """
+    from src.database.db_manager import DBManager
+    from src.services.exportacao import exportar_viagens
+
+    db = DBManager(db_path)
+    inicio = time.perf_counter()
+    if caso == "atual_openpyxl":
+        df = db.buscar_viagens(limite=None)["viagens"]
+        tamanho = len(excel_em_memoria(df))
+    else:
+        saida = io.BytesIO()
+        exportar_viagens(db, saida, caso)
+        tamanho = saida.getbuffer().nbytes
+    segundos = time.perf_counter() - inicio
+    print(f"{segundos} {tamanho} {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--linhas", default="10000,100000,1000000")
+    parser.add_argument("--max-atual", type=int, default=100000,
+                        help="maior volume medido no caminho anterior (openpyxl é muito lento acima disso)")
+    parser.add_argument("--caso", help=argparse.SUPPRESS)
+    parser.add_argument("--db", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.caso:
+        executar_caso(args.db, args.caso)
+        return
+
+    print(f"{'linhas':>9} {'caso':>15} {'tempo (s)':>10} {'arquivo (MB)':>13} {'pico RSS (MB)':>14}")
+    for linhas in [int(n) for n in args.linhas.split(",")]:
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, "bench.db")
+            gerar(db_path, linhas)
+            for caso in CASOS:
+                if caso == "atual_openpyxl" and linhas > args.max_atual:
+                    print(f"{linhas:>9} {caso:>15} {'pulado':>10}")
+                    continue
+                saida = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_exportacao", "--caso", caso, "--db", db_path],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()
+                segundos, tamanho, maxrss = float(saida[-3]), int(saida[-2]), int(saida[-1])
+                print(f"{linhas:>9} {caso:>15} {segundos:>10.2f} {tamanho / 1e6:>13.1f} {maxrss / 1024:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Benchmark dos indicadores da frota (src/database/frota.py).
+
+Sobre um banco sintético (benchmarks.gerador_dados), mede:
+
+- a reconstrução completa (funções de janela sobre todas as viagens), que
+  seria o custo de cada leitura sem a atualização incremental;
+- a leitura da aba "Gestão da Frota" (DBManager.obter_frota, sem cache);
+- a atualização incremental depois de --novas viagens recentes (cada uma
+  recalcula só a própria viagem) e depois de uma viagem retroativa no meio
+  do histórico (recalcula as viagens seguintes daquele carro).
+
+Ao final, confere que as somas incrementais são iguais às de uma
+reconstrução completa.
+
+Uso:
+    python -m benchmarks.bench_frota --viagens 1000000
+    python -m benchmarks.bench_frota --db /tmp/carga.db --novas 50
+"""
+import argparse
+import datetime
+import math
+import os
+import shutil
+import tempfile
+import time
+
+from benchmarks.gerador_dados import gerar
+from src.database.db_manager import DBManager
+
+
+def _tempo(funcao):
+    inicio = time.perf_counter()
+    resultado = funcao()
+    return (time.perf_counter() - inicio) * 1000, resultado
+
+
+def _somas(conn):
+    return [conn.execute(f"SELECT * FROM {tabela} ORDER BY 1").fetchall()
+            for tabela in ("frota_carros", "frota_motoristas")]
+
+
+def _iguais(a, b):
+    for linhas_a, linhas_b in zip(a, b):
+        if len(linhas_a) != len(linhas_b):
+            return False
+        for linha_a, linha_b in zip(linhas_a, linhas_b):
+            for x, y in zip(linha_a, linha_b):
+                if x != y and not (isinstance(x, float) and math.isclose(x, y, rel_tol=1e-9, abs_tol=1e-6)):
+                    return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=1000000)
+    parser.add_argument("--db", help="banco existente, copiado antes do teste (padrão: gera um banco)")
+    parser.add_argument("--novas", type=int, default=20, help="viagens recentes incluídas antes da atualização")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "frota.db")
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            gerar(db_path, args.viagens)
+        db = DBManager(db_path)
+        conn = db._conexao()
+        total = conn.execute("SELECT COUNT(*) FROM viagens").fetchone()[0]
+
+        completo, _ = _tempo(db.reconstruir_frota)
+        db.cache.limpar()
+        leitura, frota = _tempo(db.obter_frota)
+
+        # Viagens recentes, continuando o hodômetro de cada carro
+        ultimas = conn.execute('''
+            SELECT carro, MAX(data_saida), km_chegada FROM frota_viagens GROUP BY carro
+        ''').fetchall()
+        for i in range(args.novas):
+            carro, data, km = ultimas[i % len(ultimas)]
+            dia = (datetime.date.fromisoformat(data) + datetime.timedelta(days=1 + i)).isoformat()
+            db.enfileirar_viagem(None, None, carro, km, km + 100, dia, dia, 6.0, "Motorista bench",
+                                 150.0, 0.0, 20.0, 0.0, 10.0)
+        db.inserir_viagem(None, None, ultimas[0][0], 0.0, 0.0, ultimas[0][1], None, 6.0, "Motorista bench",
+                          0.0, 0.0, 0.0, 0.0, 0.0)
+        db.excluir_registro("viagens", conn.execute("SELECT MAX(id) FROM viagens").fetchone()[0])
+        incremental, recalculadas = _tempo(db.atualizar_frota)
+
+        meio = conn.execute("SELECT carro, data_saida FROM frota_viagens WHERE viagem_id = ?",
+                            (total // 2,)).fetchone()
+        db.inserir_viagem(None, None, meio[0], 0.0, 0.0, meio[1], None, 6.0, "Motorista bench",
+                          0.0, 0.0, 0.0, 0.0, 0.0)
+        retroativa, recalculadas_retroativa = _tempo(db.atualizar_frota)
+
+        incrementais = _somas(conn)
+        db.reconstruir_frota()
+        if not _iguais(incrementais, _somas(conn)):
+            raise SystemExit("Somas incrementais diferentes da reconstrução completa")
+        db.pool.fechar()
+
+    print(f"{total} viagens, {len(frota['carros'])} carros, {len(frota['motoristas'])} motoristas; "
+          "somas incrementais iguais às da reconstrução")
+    print(f"{'operação':<46} {'ms':>10} {'viagens recalculadas':>21}")
+    for nome, tempo, viagens in (
+        ("reconstrução completa (janelas sobre tudo)", completo, total),
+        ("leitura da aba (obter_frota, sem cache)", leitura, 0),
+        (f"atualização após {args.novas} viagens recentes", incremental, recalculadas),
+        ("atualização após uma viagem retroativa", retroativa, recalculadas_retroativa),
+    ):
+        print(f"{nome:<46} {tempo:>10.1f} {viagens:>21}")
+
+
+if __name__ == "__main__":
+    main()
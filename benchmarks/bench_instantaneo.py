@@ -0,0 +1,89 @@
+"""
+Benchmark do instantâneo Arrow das viagens (src/database/instantaneo.py).
+
+Sobre um banco sintético (benchmarks.gerador_dados), grava o instantâneo e
+inicia --processos processos independentes, como os de um Streamlit atrás
+de um proxy. Cada um mede a tabela completa de viagens montada pelo SQL
+(obter_viagens_completo sem instantâneo), a abertura do arquivo com
+memory_map (sem cópia) e a conversão para DataFrame, e confere que o
+DataFrame do instantâneo é igual ao do SQL. O tempo registrado é a mediana
+das repetições em cada processo.
+
+Uso:
+    python -m benchmarks.bench_instantaneo --viagens 100000 --processos 4
+    python -m benchmarks.bench_instantaneo --db /tmp/carga.db
+"""
+import argparse
+import multiprocessing
+import os
+import statistics
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.gerador_dados import gerar
+
+
+def _mediana(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return resultado, statistics.median(tempos)
+
+
+def medir_processo(db_path, caminho, repeticoes):
+    from src.database.db_manager import DBManager
+    from src.database.instantaneo import LeitorInstantaneo, versao_dados
+
+    db = DBManager(db_path)
+    sql, tempo_sql = _mediana(lambda: db._consultar_viagens_completo(db._conexao()), repeticoes)
+    versao = versao_dados(db._conexao())
+
+    def abrir():
+        leitor = LeitorInstantaneo(caminho)
+        return leitor, leitor.tabela()
+
+    (leitor, (tabela, _)), tempo_abrir = _mediana(abrir, repeticoes)
+    instantaneo, tempo_pandas = _mediana(lambda: leitor.ler(versao), repeticoes)
+    pd.testing.assert_frame_equal(sql, instantaneo)
+    db.pool.fechar()
+    return os.getpid(), tempo_sql, tempo_abrir, tempo_pandas, tabela.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=100000)
+    parser.add_argument("--db", help="banco existente (padrão: gera um banco temporário)")
+    parser.add_argument("--processos", type=int, default=4)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+    from src.database.instantaneo import gravar_instantaneo
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(tmp, f"instantaneo_{args.viagens}.db")
+            gerar(db_path, args.viagens)
+        caminho = os.path.join(tmp, "viagens.arrow")
+        inicio = time.perf_counter()
+        gravar_instantaneo(DBManager(db_path), caminho)
+        gravacao = (time.perf_counter() - inicio) * 1000
+
+        contexto = multiprocessing.get_context("spawn")
+        with contexto.Pool(args.processos) as pool:
+            resultados = pool.starmap(medir_processo, [(db_path, caminho, args.repeticoes)] * args.processos)
+
+    print(f"instantâneo gravado em {gravacao:.0f} ms ({os.path.basename(db_path)}); "
+          "DataFrames iguais aos do SQL em todos os processos")
+    print(f"{'processo':>10} {'SQL (ms)':>10} {'memory_map (ms)':>16} {'DataFrame (ms)':>15} {'Arrow (MB)':>11}")
+    for pid, sql, abrir, pandas, tamanho in resultados:
+        print(f"{pid:>10} {sql:>10.1f} {abrir:>16.2f} {pandas:>15.1f} {tamanho / 1024 / 1024:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Microbenchmark: conexão por chamada x pool de conexões por thread.
+
+Simula várias sessões do Streamlit (uma thread por sessão) executando as
+leituras curtas típicas de um rerun do main_app.
+
+Uso:
+    python -m benchmarks.bench_pool --sessoes 8 --chamadas 500
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from src.database.db_manager import DBManager
+from src.database.pool import ConnectionPool
+
+CONSULTA = "SELECT id, nome FROM carros"
+
+
+def _preparar_banco(db_path):
+    db = DBManager(db_path)
+    for i in range(20):
+        db.inserir_carro(f"Carro {i}")
+    db.pool.fechar()
+
+
+def _sem_pool(db_path, chamadas):
+    for _ in range(chamadas):
+        conn = sqlite3.connect(db_path)
+        conn.execute(CONSULTA).fetchall()
+        conn.close()
+
+
+def _com_pool(pool, chamadas):
+    for _ in range(chamadas):
+        conn = pool.obter_conexao()
+        conn.execute(CONSULTA).fetchall()
+
+
+def _executar(alvo, args, sessoes):
+    threads = [threading.Thread(target=alvo, args=args) for _ in range(sessoes)]
+    inicio = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessoes", type=int, default=8)
+    parser.add_argument("--chamadas", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        _preparar_banco(db_path)
+
+        total = args.sessoes * args.chamadas
+        t_sem = _executar(_sem_pool, (db_path, args.chamadas), args.sessoes)
+
+        pool = ConnectionPool(db_path)
+        t_com = _executar(_com_pool, (pool, args.chamadas), args.sessoes)
+        conexoes = pool.total_conexoes
+        pool.fechar()
+
+    print(f"{args.sessoes} sessões x {args.chamadas} chamadas ({total} consultas)")
+    print(f"  conexão por chamada: {t_sem:8.3f} s  ({t_sem / total * 1e6:8.1f} µs/consulta, {total} conexões)")
+    print(f"  pool por thread:     {t_com:8.3f} s  ({t_com / total * 1e6:8.1f} µs/consulta, {conexoes} conexões)")
+    print(f"  ganho: {t_sem / t_com:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark da réplica de leitura (src/database/replica.py) sob carga mista.
+
+Sobre uma cópia de um banco sintético (benchmarks.gerador_dados), executa
+por --segundos threads de leitura (consultas de relatório: página filtrada
+da tabela, histograma, resumo diário e opções de filtro, sem o cache de
+consultas) e threads de escrita (inserir_viagem a cada --pausa segundos,
+como formulários), primeiro com todas as leituras no banco principal e
+depois com a réplica ativa. Mostra a latência das leituras e das escritas
+(p50/p95/máx), as leituras feitas na réplica e os erros "database is
+locked". No modo DELETE (sem WAL) as leituras no banco principal bloqueiam
+o commit das escritas; com a réplica, não.
+
+Uso:
+    python -m benchmarks.bench_replica --viagens 100000 --leitores 8 --escritores 2
+    python -m benchmarks.bench_replica --db /tmp/carga.db --journal DELETE
+"""
+import argparse
+import inspect
+import os
+import random
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.gerador_dados import gerar
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p * len(valores)))] if valores else float("nan")
+
+
+def _resumo(latencias):
+    return (statistics.median(latencias) if latencias else float("nan"), _percentil(latencias, 0.95),
+            max(latencias, default=float("nan")))
+
+
+def executar(db_path, replica, leitores, escritores, segundos, pausa):
+    from src.database.db_manager import DBManager
+    from src.database.replica import ReplicaLeitura
+
+    db = DBManager(db_path)
+    if replica:
+        db._replica = ReplicaLeitura(db, "memoria", intervalo=5, escritas=1, atraso_maximo=30, paginas=-1)
+        while not db._replica.copias:
+            time.sleep(0.05)
+    opcoes = db.obter_opcoes_filtro()
+    consultas = [
+        lambda: inspect.unwrap(DBManager.buscar_viagens)(
+            db, filtros={"motorista": random.choice(opcoes["motoristas"])}, limite=50),
+        lambda: inspect.unwrap(DBManager.histograma_viagens)(db, "total_km", 20),
+        lambda: inspect.unwrap(DBManager.obter_resumo_diario)(db),
+        lambda: inspect.unwrap(DBManager.obter_opcoes_filtro)(db),
+    ]
+    fim = time.monotonic() + segundos
+    latencias, latencias_escrita, erros, na_replica = [], [], [0], [0]
+    lock = threading.Lock()
+
+    def ler():
+        while time.monotonic() < fim:
+            consulta = random.choice(consultas)
+            usa_replica = db._replica is not None and db._replica.conexao() is not None
+            inicio = time.perf_counter()
+            try:
+                consulta()
+            except sqlite3.OperationalError:
+                with lock:
+                    erros[0] += 1
+                continue
+            with lock:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                na_replica[0] += usa_replica
+
+    def escrever():
+        while time.monotonic() < fim:
+            inicio = time.perf_counter()
+            try:
+                db.inserir_viagem(None, None, "Carro bench", 1000.0, 1100.0, "2024-06-01", "2024-06-02",
+                                  500.0, "Motorista bench", 150.0, 0.0, 10.0, 0.0, 12.0)
+            except sqlite3.OperationalError:
+                with lock:
+                    erros[0] += 1
+                continue
+            with lock:
+                latencias_escrita.append((time.perf_counter() - inicio) * 1000)
+            time.sleep(pausa)
+
+    threads = ([threading.Thread(target=ler) for _ in range(leitores)]
+               + [threading.Thread(target=escrever) for _ in range(escritores)])
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    copias = db._replica.copias if db._replica is not None else 0
+    db.pool.fechar()
+    return {
+        "leituras": len(latencias),
+        "na_replica": na_replica[0],
+        "leitura": _resumo(latencias),
+        "escritas": len(latencias_escrita),
+        "escrita": _resumo(latencias_escrita),
+        "erros": erros[0],
+        "copias": copias,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=100000)
+    parser.add_argument("--db", help="banco existente, copiado antes do teste (padrão: gera um banco)")
+    parser.add_argument("--leitores", type=int, default=8)
+    parser.add_argument("--escritores", type=int, default=2)
+    parser.add_argument("--segundos", type=float, default=10)
+    parser.add_argument("--pausa", type=float, default=0.2, help="pausa (s) entre as escritas de cada escritor")
+    parser.add_argument("--journal", default="WAL", help="journal_mode do banco principal (WAL ou DELETE)")
+    args = parser.parse_args()
+    os.environ["DB_JOURNAL_MODE"] = args.journal
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origem = os.path.join(tmp, "origem.db")
+        if args.db:
+            shutil.copyfile(args.db, origem)
+        else:
+            gerar(origem, args.viagens)
+        print(f"{'leituras em':<12} {'leituras':>9} {'réplica':>8} {'p50/p95/máx leitura (ms)':>26} "
+              f"{'escritas':>9} {'p50/p95/máx escrita (ms)':>26} {'erros':>6} {'cópias':>7}")
+        for replica in (False, True):
+            db_path = os.path.join(tmp, f"replica_{replica}.db")
+            shutil.copyfile(origem, db_path)
+            r = executar(db_path, replica, args.leitores, args.escritores, args.segundos, args.pausa)
+            leitura = "/".join(f"{valor:.0f}" for valor in r["leitura"])
+            escrita = "/".join(f"{valor:.0f}" for valor in r["escrita"])
+            print(f"{'réplica' if replica else 'principal':<12} {r['leituras']:>9} {r['na_replica']:>8} "
+                  f"{leitura:>26} {r['escritas']:>9} {escrita:>26} {r['erros']:>6} {r['copias']:>7}")
+
+
+if __name__ == "__main__":
+    main()
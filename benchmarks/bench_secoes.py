@@ -0,0 +1,93 @@
+"""
+Benchmark das seções da interface (main.py) com streamlit.testing.
+
+Sobre um banco sintético (benchmarks.gerador_dados), abre a aplicação como
+admin e mede:
+
+- cada seção e cada um dos seis gráficos, selecionando-os um a um (tempo
+  da seção registrado pelo painel de desempenho, mediana das repetições);
+- uma "tecla" no formulário de Cadastro de Viagem (alteração do KM Saída):
+  tempo da execução inteira e da seção.
+
+Com st.tabs, cada execução montava as quatro abas e os seis gráficos; a
+soma desses tempos é mostrada como referência do custo anterior de cada
+tecla. O AppTest sempre executa o script inteiro; no servidor, a tecla
+executa só o fragmento da seção.
+
+Uso:
+    python -m benchmarks.bench_secoes --viagens 100000
+    python -m benchmarks.bench_secoes --db /tmp/carga.db --repeticoes 10
+"""
+import argparse
+import os
+import shutil
+import statistics
+import tempfile
+import time
+
+from benchmarks.gerador_dados import gerar
+from src.config.config import Config
+
+
+def _medir(at, acao, repeticoes, secao):
+    total, tempos_secao = [], []
+    for i in range(repeticoes):
+        inicio = time.perf_counter()
+        acao(i)
+        total.append((time.perf_counter() - inicio) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        tempos_secao.append(at.session_state["tempos_render"][secao] * 1000)
+    return statistics.median(total), statistics.median(tempos_secao)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=100000)
+    parser.add_argument("--db", help="banco existente, copiado antes do teste (padrão: gera um banco)")
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "secoes.db")
+        if args.db:
+            shutil.copyfile(args.db, db_path)
+        else:
+            gerar(db_path, args.viagens)
+        # O AppTest executa o script neste processo: Config já foi importado
+        Config.DB_PATH = db_path
+
+        from streamlit.testing.v1 import AppTest
+
+        import main as aplicacao
+
+        at = AppTest.from_file(os.path.abspath(aplicacao.__file__), default_timeout=300)
+        at.session_state["authenticated"] = True
+        at.session_state["role"] = "admin"
+        at.session_state["user_name"] = "bench"
+        at.run()
+
+        linhas = []
+        for secao in aplicacao.SECOES:
+            at.radio(key="secao").set_value(secao).run()
+            if secao == "Gráfico de Viagens":
+                for grafico in aplicacao.GRAFICOS:
+                    at.radio(key="grafico_selecionado").set_value(grafico).run()
+                    linhas.append((f"  {grafico}",) + _medir(at, lambda _: at.run(), args.repeticoes, secao))
+            else:
+                linhas.append((secao,) + _medir(at, lambda _: at.run(), args.repeticoes, secao))
+
+        at.radio(key="secao").set_value("Cadastro de Viagem").run()
+        tecla = _medir(at, lambda i: at.number_input(key="viagem_km_saida").set_value(float(i + 1)).run(),
+                       args.repeticoes, "Cadastro de Viagem")
+
+    print(f"{'seção':<34} {'execução (ms)':>14} {'seção (ms)':>11}")
+    for nome, total, secao in linhas:
+        print(f"{nome:<34} {total:>14.1f} {secao:>11.1f}")
+    anterior = sum(secao for _, _, secao in linhas)
+    print(f"\ntecla no formulário: execução {tecla[0]:.1f} ms, seção {tecla[1]:.1f} ms")
+    print(f"com st.tabs (todas as seções e gráficos a cada tecla): ~{anterior:.1f} ms de seções")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Gerador determinístico de dados sintéticos para testes de carga.
+
+Preenche um banco com carros, motoristas, endereços (origens e destinos) e
+N viagens plausíveis: as viagens de cada carro são cronológicas e o
+hodômetro é contínuo (km de saída = km de chegada da viagem anterior), a
+distância depende do par de cidades, o diesel acompanha o consumo do
+veículo e o preço por litro varia com o ano, e pedágio e diárias crescem
+com a distância e a duração da viagem. A mesma semente gera sempre o mesmo
+banco.
+
+Uso:
+    python -m benchmarks.gerador_dados --db /tmp/carga.db --viagens 100000 [--semente 42]
+"""
+import argparse
+import datetime
+import math
+import random
+import time
+
+from src.database.db_manager import INSERIR_VIAGEM_SQL, DBManager
+
+# (cidade, uf, prefixo do CEP, latitude, longitude)
+CIDADES = [
+    ("Belo Horizonte", "MG", "30", -19.92, -43.94),
+    ("Contagem", "MG", "32", -19.93, -44.05),
+    ("Ouro Preto", "MG", "35", -20.38, -43.50),
+    ("Juiz de Fora", "MG", "36", -21.76, -43.35),
+    ("Uberlândia", "MG", "38", -18.92, -48.28),
+    ("Montes Claros", "MG", "39", -16.73, -43.86),
+    ("Ipatinga", "MG", "35", -19.47, -42.54),
+    ("São Paulo", "SP", "01", -23.55, -46.63),
+    ("Campinas", "SP", "13", -22.91, -47.06),
+    ("Santos", "SP", "11", -23.96, -46.33),
+    ("Rio de Janeiro", "RJ", "20", -22.91, -43.17),
+    ("Petrópolis", "RJ", "25", -22.51, -43.18),
+    ("Vitória", "ES", "29", -20.32, -40.34),
+    ("Guarapari", "ES", "29", -20.67, -40.50),
+    ("Porto Seguro", "BA", "45", -16.45, -39.06),
+    ("Salvador", "BA", "40", -12.97, -38.50),
+    ("Brasília", "DF", "70", -15.79, -47.88),
+    ("Goiânia", "GO", "74", -16.68, -49.25),
+    ("Aparecida", "SP", "12", -22.85, -45.23),
+    ("Caldas Novas", "GO", "75", -17.74, -48.62),
+]
+BAIRROS = ["Centro", "Savassi", "Funcionários", "Lourdes", "Santa Efigênia", "Barro Preto",
+           "Jardim América", "Vila Nova", "Boa Vista", "São Pedro", "Industrial", "Planalto"]
+LOGRADOUROS = ["Rua das Flores", "Avenida Brasil", "Rua Sete de Setembro", "Avenida Amazonas",
+               "Rua da Bahia", "Avenida Afonso Pena", "Rua Tiradentes", "Rua São Paulo",
+               "Avenida Getúlio Vargas", "Rua Santos Dumont", "Rua XV de Novembro", "Avenida Paraná"]
+NOMES = ["João", "José", "Carlos", "Paulo", "Marcos", "Antônio", "Luiz", "Pedro", "Rafael",
+         "Ricardo", "Fernando", "Sérgio", "Márcio", "Roberto", "Adriano", "Eduardo", "Fábio"]
+SOBRENOMES = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Costa", "Rodrigues", "Almeida",
+              "Nascimento", "Lima", "Araújo", "Ferreira", "Ribeiro", "Gomes", "Martins"]
+# (modelo, consumo em km/l, fração dos litros em S10)
+MODELOS = [("Van Sprinter", 9.0, 1.0), ("Van Master", 9.5, 1.0), ("Micro-ônibus Volare", 6.0, 0.7),
+           ("Ônibus Marcopolo", 3.2, 0.5), ("Ônibus Irizar", 3.0, 0.5)]
+# Preço médio do litro de diesel por ano
+PRECO_DIESEL = {2018: 3.60, 2019: 3.70, 2020: 3.50, 2021: 4.70, 2022: 6.60,
+                2023: 6.00, 2024: 6.00, 2025: 6.20, 2026: 6.30}
+
+
+def _distancia_km(origem, destino):
+    """
+    Distância rodoviária aproximada: distância em linha reta (haversine) x 1,3.
+    """
+    lat1, lon1, lat2, lon2 = map(math.radians, (origem[3], origem[4], destino[3], destino[4]))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 6371 * 2 * math.asin(math.sqrt(a)) * 1.3
+
+
+def _enderecos(db, rng, quantidade):
+    """
+    Cria endereços espalhados pelas cidades; as de Minas (sede da empresa)
+    recebem mais endereços. Retorna (endereco_id, índice da cidade).
+    """
+    pesos = [4 if cidade[1] == "MG" else 1 for cidade in CIDADES]
+    enderecos = []
+    for i in range(quantidade):
+        indice = rng.choices(range(len(CIDADES)), weights=pesos)[0]
+        cidade, uf, prefixo = CIDADES[indice][:3]
+        cep = f"{prefixo}{rng.randint(0, 999999):06d}"
+        endereco_id = db.inserir_endereco(cep, rng.choice(LOGRADOUROS), "", rng.choice(BAIRROS),
+                                          cidade, uf, str(rng.randint(1, 3000)))
+        enderecos.append((endereco_id, indice))
+    return enderecos
+
+
+def gerar(db_path, viagens, semente=42, carros=20, motoristas=30, enderecos=200,
+          inicio=datetime.date(2019, 1, 1), fim=datetime.date(2025, 12, 31), tamanho_lote=50000):
+    """
+    Preenche db_path com os cadastros e a quantidade de viagens informada.
+    Retorna um dicionário com as contagens geradas.
+    """
+    rng = random.Random(semente)
+    db = DBManager(db_path)
+
+    frota = []
+    for i in range(carros):
+        modelo, consumo, fracao_s10 = rng.choice(MODELOS)
+        nome = f"{modelo} {i + 1:02d}"
+        db.inserir_carro(nome)
+        frota.append([nome, consumo, fracao_s10, rng.uniform(10000, 250000)])
+    nomes = set()
+    while len(nomes) < motoristas:
+        nomes.add(f"{rng.choice(NOMES)} {rng.choice(SOBRENOMES)}")
+    nomes = sorted(nomes)
+    for nome in nomes:
+        db.inserir_motorista(nome)
+
+    locais = _enderecos(db, rng, enderecos)
+    origens = [(db.inserir_origem(endereco_id), indice) for endereco_id, indice in locais[:enderecos // 2]]
+    destinos = [(db.inserir_destino(endereco_id), indice) for endereco_id, indice in locais[enderecos // 2:]]
+
+    # As datas de saída são sorteadas e ordenadas para que cada carro
+    # percorra suas viagens em ordem cronológica
+    dias = (fim - inicio).days
+    ordinais = sorted(rng.randrange(dias + 1) for _ in range(viagens))
+    base = inicio.toordinal()
+
+    conn = db._conexao()
+    lote = []
+    for ordinal in ordinais:
+        origem_id, cidade_origem = rng.choice(origens)
+        destino_id, cidade_destino = rng.choice(destinos)
+        carro = rng.choice(frota)
+        nome_carro, consumo, fracao_s10, km_saida = carro
+
+        distancia = _distancia_km(CIDADES[cidade_origem], CIDADES[cidade_destino])
+        # Ida e volta, com deslocamentos locais no destino
+        total_km = round(max(20.0, distancia * 2 * rng.uniform(1.0, 1.15) + rng.uniform(5, 60)), 1)
+        km_chegada = round(km_saida + total_km, 1)
+        carro[3] = km_chegada
+
+        data_saida = datetime.date.fromordinal(base + ordinal)
+        duracao = min(int(total_km // 800) + rng.choice((0, 0, 1, 2)), 10)
+        data_volta = data_saida + datetime.timedelta(days=duracao)
+
+        litros = round(total_km / (consumo * rng.uniform(0.9, 1.1)), 2)
+        diesel_s10 = round(litros * fracao_s10, 2)
+        diesel_s500 = round(litros - diesel_s10, 2)
+        valor = round(PRECO_DIESEL.get(data_saida.year, 6.0) * rng.uniform(0.95, 1.05), 2)
+        pedagio = round(total_km * rng.uniform(0.05, 0.15), 2) if total_km > 100 else 0.0
+        diaria_motorista = 150.0 * (duracao + 1)
+        despesa_extra = round(rng.uniform(0, 300), 2) if rng.random() < 0.3 else 0.0
+
+        # total_km, litros e valores são colunas geradas (ver src/database/colunas_geradas.py)
+        lote.append((origem_id, destino_id, nome_carro, round(km_saida, 1), km_chegada,
+                     data_saida.isoformat(), data_volta.isoformat(), valor, rng.choice(nomes),
+                     diaria_motorista, despesa_extra, diesel_s10, diesel_s500, pedagio, None))
+        if len(lote) == tamanho_lote:
+            with conn:
+                conn.executemany(INSERIR_VIAGEM_SQL, lote)
+            lote.clear()
+    if lote:
+        with conn:
+            conn.executemany(INSERIR_VIAGEM_SQL, lote)
+    with conn:
+        conn.execute("ANALYZE")
+    db.cache.invalidar("viagens")
+    return {"viagens": viagens, "carros": carros, "motoristas": motoristas,
+            "origens": len(origens), "destinos": len(destinos)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", required=True, help="arquivo SQLite a preencher (novo ou vazio)")
+    parser.add_argument("--viagens", type=int, default=10000)
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--carros", type=int, default=20)
+    parser.add_argument("--motoristas", type=int, default=30)
+    parser.add_argument("--enderecos", type=int, default=200)
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    contagens = gerar(args.db, args.viagens, args.semente, args.carros, args.motoristas, args.enderecos)
+    print(", ".join(f"{chave}={valor}" for chave, valor in contagens.items())
+          + f" em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
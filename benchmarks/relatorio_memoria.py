@@ -0,0 +1,94 @@
+"""
+Relatório de memória das leituras de viagens.
+
+Compara, sobre um banco sintético (benchmarks.gerador_dados):
+
+- a tabela completa de viagens no formato antigo (endereços concatenados
+  no SQL, datas em texto, tudo object/float64) com o DataFrame compacto de
+  DBManager.obter_viagens_completo, coluna a coluna (memory_usage deep);
+- a lista de viagens como dicionários (dict(zip(colunas, linha))) com a
+  lista de registros Viagem de DBManager.listar_viagens (tracemalloc).
+
+Uso:
+    python -m benchmarks.relatorio_memoria --viagens 100000
+    python -m benchmarks.relatorio_memoria --db /tmp/carga.db
+"""
+import argparse
+import gc
+import os
+import tempfile
+import tracemalloc
+
+import pandas as pd
+
+from benchmarks.gerador_dados import gerar
+
+MB = 1024 * 1024
+
+
+def memoria_alocada(funcao):
+    """
+    Retorna (resultado, bytes alocados e ainda vivos ao final da função).
+    """
+    gc.collect()
+    tracemalloc.start()
+    try:
+        resultado = funcao()
+        atual, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return resultado, atual
+
+
+def relatorio(db):
+    from src.database.db_manager import COLUNAS_TABELA_SQL, JUNCOES_VIAGENS_SQL
+    from src.database.modelos import COLUNAS_VIAGEM
+
+    conn = db._conexao()
+    antes = pd.read_sql(f"SELECT {COLUNAS_TABELA_SQL} {JUNCOES_VIAGENS_SQL}", conn).drop(columns=["ID"])
+    db.cache.limpar()
+    depois = db.obter_viagens_completo()
+
+    uso_antes = antes.memory_usage(deep=True, index=False)
+    uso_depois = depois.memory_usage(deep=True, index=False)
+    print(f"DataFrame completo ({len(depois)} viagens)")
+    print(f"{'coluna':<32} {'antes':>14} {'MB':>8} {'depois':>14} {'MB':>8}")
+    for coluna in depois.columns:
+        print(f"{coluna:<32} {str(antes[coluna].dtype):>14} {uso_antes[coluna] / MB:>8.2f} "
+              f"{str(depois[coluna].dtype):>14} {uso_depois[coluna] / MB:>8.2f}")
+    print(f"{'total':<32} {'':>14} {uso_antes.sum() / MB:>8.2f} {'':>14} {uso_depois.sum() / MB:>8.2f}"
+          f"  ({1 - uso_depois.sum() / uso_antes.sum():.0%} menor)")
+
+    sql = f"SELECT {', '.join(COLUNAS_VIAGEM)} FROM viagens ORDER BY data_saida, id"
+    del antes, depois
+    dicionarios, bytes_dicionarios = memoria_alocada(
+        lambda: [dict(zip(COLUNAS_VIAGEM, linha)) for linha in conn.execute(sql).fetchall()])
+    del dicionarios
+    db.cache.limpar()
+    registros, bytes_registros = memoria_alocada(db.listar_viagens)
+    print(f"\nLista de viagens ({len(registros)} linhas)")
+    print(f"{'dict(zip(colunas, linha))':<32} {bytes_dicionarios / MB:>8.2f} MB")
+    print(f"{'Viagem (dataclass com slots)':<32} {bytes_registros / MB:>8.2f} MB"
+          f"  ({1 - bytes_registros / bytes_dicionarios:.0%} menor)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--viagens", type=int, default=100000)
+    parser.add_argument("--db", help="banco existente (padrão: gera um banco temporário)")
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = args.db
+        if db_path is None:
+            db_path = os.path.join(tmp, f"memoria_{args.viagens}.db")
+            gerar(db_path, args.viagens)
+        db = DBManager(db_path)
+        relatorio(db)
+        db.pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
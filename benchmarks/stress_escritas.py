@@ -0,0 +1,128 @@
+"""
+Teste de carga das gravações concorrentes (src/database/escritor.py).
+
+Sobre cópias de um banco sintético (benchmarks.gerador_dados), --sessoes
+threads, como sessões do Streamlit salvando formulários ao mesmo tempo,
+gravam --viagens viagens cada uma:
+
+- direto: cada sessão com a sua conexão, um commit por viagem, como antes
+  do escritor único (com --timeout 0, sem espera pelo lock);
+- fila: DBManager.inserir_viagem, pela fila do escritor único.
+
+Mostra as viagens gravadas e as perdidas (erros "database is locked"),
+conferidas pela contagem de linhas no banco, a vazão, a latência de cada
+gravação (p50/p95/máx) e, na fila, quantas transações foram usadas.
+
+Uso:
+    python -m benchmarks.stress_escritas --sessoes 50 --viagens 20
+    python -m benchmarks.stress_escritas --db /tmp/carga.db --timeout 5
+"""
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from benchmarks.gerador_dados import gerar
+
+VIAGEM = (None, None, "Carro carga", 1000.0, 1100.0, "2024-06-01", "2024-06-02", 500.0,
+          "Motorista carga", 150.0, 0.0, 10.0, 0.0, 12.0, None)
+
+
+def _percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(p * len(valores)))] if valores else float("nan")
+
+
+def _contar(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM viagens").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def executar(db_path, modo, sessoes, viagens, timeout):
+    from src.database.db_manager import INSERIR_VIAGEM_SQL, DBManager
+
+    db = DBManager(db_path)
+    antes = _contar(db_path)
+    latencias, erros = [], [0]
+    lock = threading.Lock()
+    barreira = threading.Barrier(sessoes)
+
+    def sessao():
+        conn = None
+        if modo == "direto":
+            conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=False)
+        barreira.wait()
+        for _ in range(viagens):
+            inicio = time.perf_counter()
+            try:
+                if conn is None:
+                    db.inserir_viagem(*VIAGEM)
+                else:
+                    with conn:
+                        conn.execute(INSERIR_VIAGEM_SQL, VIAGEM)
+            except sqlite3.OperationalError:
+                with lock:
+                    erros[0] += 1
+                continue
+            with lock:
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        if conn is not None:
+            conn.close()
+
+    threads = [threading.Thread(target=sessao) for _ in range(sessoes)]
+    inicio = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duracao = time.perf_counter() - inicio
+    transacoes = db.escritor.transacoes if modo == "fila" else len(latencias)
+    db.pool.fechar()
+    gravadas = _contar(db_path) - antes
+    return {
+        "gravadas": gravadas,
+        "perdidas": sessoes * viagens - gravadas,
+        "erros": erros[0],
+        "vazao": gravadas / duracao,
+        "latencia": (statistics.median(latencias) if latencias else float("nan"),
+                     _percentil(latencias, 0.95), max(latencias, default=float("nan"))),
+        "transacoes": transacoes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessoes", type=int, default=50)
+    parser.add_argument("--viagens", type=int, default=20, help="viagens gravadas por sessão")
+    parser.add_argument("--base", type=int, default=10000, help="viagens do banco sintético")
+    parser.add_argument("--db", help="banco existente, copiado antes do teste (padrão: gera um banco)")
+    parser.add_argument("--timeout", type=float, default=0, help="timeout (s) das conexões do modo direto")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origem = os.path.join(tmp, "origem.db")
+        if args.db:
+            shutil.copyfile(args.db, origem)
+        else:
+            gerar(origem, args.base)
+        print(f"{args.sessoes} sessões x {args.viagens} viagens")
+        print(f"{'modo':<8} {'gravadas':>9} {'perdidas':>9} {'erros':>6} {'viagens/s':>10} "
+              f"{'p50/p95/máx (ms)':>18} {'transações':>11}")
+        for modo in ("direto", "fila"):
+            db_path = os.path.join(tmp, f"{modo}.db")
+            shutil.copyfile(origem, db_path)
+            r = executar(db_path, modo, args.sessoes, args.viagens, args.timeout)
+            latencia = "/".join(f"{valor:.0f}" for valor in r["latencia"])
+            print(f"{modo:<8} {r['gravadas']:>9} {r['perdidas']:>9} {r['erros']:>6} {r['vazao']:>10.0f} "
+                  f"{latencia:>18} {r['transacoes']:>11}")
+
+
+if __name__ == "__main__":
+    main()
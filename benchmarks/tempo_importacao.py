@@ -0,0 +1,74 @@
+"""
+Limite de tempo de importação do main.py (partida a frio da aplicação).
+
+Executa `python -X importtime -c "import main"` em processos novos (em uma
+pasta temporária, para não criar logs no projeto), fica com a menor medição
+e mostra os pacotes que mais pesam. Sai com erro se:
+
+- a importação do main passar de --limite-ms;
+- algum dos pacotes carregados só sob demanda (altair, requests, openpyxl,
+  xlsxwriter) for importado na partida. O pyarrow não entra na lista: o
+  próprio pandas o importa, se instalado.
+
+O mesmo limite é conferido pelo pytest em tests/test_partida.py.
+
+Uso:
+    python -m benchmarks.tempo_importacao
+    python -m benchmarks.tempo_importacao --limite-ms 1500 --repeticoes 5
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Pacotes que o main.py não deve importar na partida (ver src/config/inicializacao.py)
+SOB_DEMANDA = ("altair", "requests", "openpyxl", "xlsxwriter")
+
+# Limite padrão do tempo de importação do main.py
+LIMITE_MS = 1500
+
+
+def medir():
+    """
+    Retorna {módulo: tempo acumulado (ms)} de uma importação do main.py.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        ambiente = {**os.environ, "PYTHONPATH": RAIZ, "DB_PATH": os.path.join(tmp, "partida.db")}
+        processo = subprocess.run([sys.executable, "-X", "importtime", "-c", "import main"],
+                                  cwd=tmp, env=ambiente, capture_output=True, text=True, check=True)
+    tempos = {}
+    for linha in processo.stderr.splitlines():
+        if not linha.startswith("import time:") or "cumulative" in linha:
+            continue
+        _, acumulado, modulo = linha.split("|")
+        tempos[modulo.strip()] = int(acumulado) / 1000
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--limite-ms", type=float, default=LIMITE_MS)
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pacotes", type=int, default=10, help="pacotes mais lentos exibidos")
+    args = parser.parse_args()
+
+    tempos = min((medir() for _ in range(args.repeticoes)), key=lambda t: t["main"])
+    pacotes = sorted(((tempo, modulo) for modulo, tempo in tempos.items() if "." not in modulo), reverse=True)
+    print(f"{'pacote':<24} {'ms':>8}")
+    for tempo, modulo in pacotes[:args.pacotes + 1]:
+        print(f"{modulo:<24} {tempo:>8.1f}")
+
+    falhas = []
+    if tempos["main"] > args.limite_ms:
+        falhas.append(f"main importado em {tempos['main']:.0f} ms (limite {args.limite_ms:.0f} ms)")
+    falhas += [f"{pacote} importado na partida" for pacote in SOB_DEMANDA if pacote in tempos]
+    for falha in falhas:
+        print(f"FALHA: {falha}")
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
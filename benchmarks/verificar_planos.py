@@ -0,0 +1,178 @@
+"""
+Verificação de regressão dos planos de consulta.
+
+Cria um banco temporário com o esquema migrado e algumas viagens, executa
+os métodos do DBManager usados pelas abas e confere, via EXPLAIN QUERY
+PLAN dos comandos que eles de fato emitiram (capturados com
+set_trace_callback, já com os parâmetros), que usam os índices criados
+pelas migrações em vez de varrer as tabelas inteiras. Termina com código 1
+se alguma chamada não usar o índice esperado; as mesmas chamadas são
+verificadas pelo pytest em tests/test_planos.py.
+
+Uso:
+    python -m benchmarks.verificar_planos
+"""
+import os
+import sys
+import tempfile
+
+from src.database.db_manager import DBManager
+
+# Comandos cujo plano é verificado (os demais são controle de transação e
+# os "-- TRIGGER" do trace)
+_COMANDOS_PLANO = ("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")
+
+# (descrição, chamada do DBManager, índices esperados nos planos dos comandos emitidos)
+CHAMADAS = [
+    (
+        "filtro por período",
+        lambda db: db.buscar_viagens({"ano": 2024}),
+        ("idx_viagens_data_saida",),
+    ),
+    (
+        "página seguinte (paginação por chave)",
+        lambda db: db.buscar_viagens({"ano": 2024}, cursor=("2024-06-01", 100)),
+        ("idx_viagens_data_saida",),
+    ),
+    (
+        "página seguinte entre as viagens sem data",
+        lambda db: db.buscar_viagens(cursor=(None, 100)),
+        ("idx_viagens_data_saida",),
+    ),
+    (
+        "página seguinte após as viagens sem data (ordem crescente)",
+        lambda db: db.buscar_viagens(ordem="data_saida", cursor=(None, 100)),
+        ("idx_viagens_data_saida",),
+    ),
+    (
+        "filtro por mês (coluna gerada)",
+        lambda db: db.buscar_viagens({"mes": 6}),
+        ("idx_viagens_mes",),
+    ),
+    (
+        "filtro por ano e mês (faixa de datas)",
+        lambda db: db.buscar_viagens({"ano": 2024, "mes": 6}, cursor=("2024-06-15", 100)),
+        ("idx_viagens_data_saida",),
+    ),
+    (
+        "filtro por motorista e ano (faixa de datas)",
+        lambda db: db.buscar_viagens({"ano": 2024, "motorista": "Fulano"}, cursor=("2024-06-15", 100)),
+        ("idx_viagens_motorista",),
+    ),
+    (
+        "filtro por motorista",
+        lambda db: db.buscar_viagens({"motorista": "Fulano"}),
+        ("idx_viagens_motorista",),
+    ),
+    (
+        "filtro por origem",
+        lambda db: db.buscar_viagens({"origem_id": 1}),
+        ("idx_viagens_origem",),
+    ),
+    (
+        "filtro por destino",
+        lambda db: db.buscar_viagens({"destino_id": 1}),
+        ("idx_viagens_destino",),
+    ),
+    (
+        "opções dos filtros (skip scan)",
+        lambda db: db.obter_opcoes_filtro(),
+        ("idx_viagens_ano_mes", "idx_viagens_mes", "idx_viagens_motorista", "idx_viagens_carro",
+         "idx_viagens_origem", "idx_viagens_destino"),
+    ),
+    (
+        "amostra estratificada por origem (gráfico de dispersão)",
+        lambda db: db.amostra_viagens(),
+        ("idx_viagens_origem",),
+    ),
+    (
+        "busca textual de origens (cadastro de viagem)",
+        lambda db: db.buscar_origens("paulista"),
+        ("enderecos_busca VIRTUAL TABLE", "idx_origens_endereco"),
+    ),
+    (
+        "busca textual de destinos (cadastro de viagem)",
+        lambda db: db.buscar_destinos("paulista"),
+        ("enderecos_busca VIRTUAL TABLE", "idx_destinos_endereco"),
+    ),
+    (
+        "indicadores da frota (carros pendentes)",
+        lambda db: db.atualizar_frota(),
+        ("idx_viagens_carro", "idx_frota_viagens_carro"),
+    ),
+]
+
+
+def preparar(db):
+    """
+    Grava algumas viagens (com e sem data de saída), para que as chamadas
+    percorram todos os caminhos e deixem carros pendentes na frota.
+    """
+    for i, data in enumerate(["2024-06-01", None, "2023-02-01", "2024-06-20"]):
+        db.inserir_viagem(1, 1, f"Van {i % 2:02d}", 1000.0 + i, 1100.0 + i, data, data, 6.0, "Fulano",
+                          0.0, 0.0, 10.0, 0.0, 0.0)
+
+
+def capturar_sql(db, chamada):
+    """
+    Executa chamada(db) e retorna os comandos SQL emitidos pelas conexões
+    do pool (inclusive a do escritor), sem repetições e com os parâmetros
+    já substituídos, exceto as consultas ao catálogo (sqlite_master).
+    """
+    db._conexao()
+    conexoes = [conn for _, conn in list(db.pool._conexoes.values())]
+    comandos = []
+    for conn in conexoes:
+        conn.set_trace_callback(comandos.append)
+    try:
+        chamada(db)
+    finally:
+        for conn in conexoes:
+            conn.set_trace_callback(None)
+    return [comando for comando in dict.fromkeys(comandos)
+            if comando.lstrip().upper().startswith(_COMANDOS_PLANO) and "sqlite_master" not in comando]
+
+
+def plano_consulta(conn, sql, params=()):
+    """
+    Retorna o texto das linhas de EXPLAIN QUERY PLAN da consulta.
+    """
+    return [linha[-1] for linha in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def planos_chamada(db, chamada):
+    """
+    Linhas de EXPLAIN QUERY PLAN de todos os comandos emitidos por chamada(db).
+    """
+    conn = db._conexao()
+    return [linha for comando in capturar_sql(db, chamada) for linha in plano_consulta(conn, comando)]
+
+
+def indices_ausentes(plano, indices):
+    return [indice for indice in indices if not any(indice in linha for linha in plano)]
+
+
+def verificar(db, chamadas=CHAMADAS):
+    falhas = []
+    for descricao, chamada, indices in chamadas:
+        plano = planos_chamada(db, chamada)
+        ausentes = indices_ausentes(plano, indices)
+        print(f"[{'FALHA' if ausentes else 'OK'}] {descricao}: {' | '.join(plano)}")
+        if ausentes:
+            falhas.append(descricao)
+    return falhas
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = DBManager(os.path.join(tmp, "planos.db"))
+        preparar(db)
+        falhas = verificar(db)
+        db.pool.fechar()
+    if falhas:
+        print(f"{len(falhas)} chamada(s) sem o índice esperado: {', '.join(falhas)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,7 @@
 import streamlit as st
 import pandas as pd
-import altair as alt
 from loguru import logger
-import sys
-import os
-from io import BytesIO
+import time
 
 # Função para limpar campos do st.session_state
 def limpar_campos(campos):
@@ -12,28 +9,39 @@ def limpar_campos(campos):
         if campo in st.session_state:
             del st.session_state[campo]
 
-# Garante a pasta de logs
-os.makedirs("logs", exist_ok=True)
+# Logs, autenticação e banco são inicializados uma única vez por processo
+# (ver src/config/inicializacao.py); o main.py é executado a cada interação
+from src.config.inicializacao import configurar_logs, obter_auth, obter_db
 
-# Configuração do Logger
-logger.remove()
-logger.add(sys.stdout, level="INFO")
-logger.add("logs/app_log_{time}.log", level="INFO")
+configurar_logs()
 
 # Imports internos – ajuste os caminhos conforme sua estrutura de pastas
-from src.auth.auth import AuthManager
 from src.database.db_manager import DBManager
-from src.utils.cep import consulta_cep
-
-# Função para exportar DataFrame para Excel em bytes (correção aplicada)
-def to_excel_bytes(df):
-    output = BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False)
-    processed_data = output.getvalue()
-    return processed_data
-
-logger.info("Iniciando a aplicação Streamlit")
+from src.database.perfil import cronometro, obter_perfil
+from src.services.contexto import ContextoDados
+from src.services.graficos import (
+    LIMITE_PONTOS_DISPERSAO, dados_custos_por_data, dados_distribuicao_custos, dados_evolucao_diaria, reduzir_serie
+)
+from src.services.forecast import prever_viagens
+from src.services.exportacao import FORMATOS_EXPORTACAO, exportar_viagens_bytes
+from src.services.importacao import ImportadorViagens
+from src.utils.cep import consulta_cep, normalizar_cep, obter_servico_cep
+
+# Quantidade de viagens exibidas por página na aba "Tabela de Viagens"
+TAMANHO_PAGINA = 50
+
+# Máximo de opções retornadas pela busca de origem/destino do cadastro de viagem
+LIMITE_BUSCA_LOCAIS = 20
+
+# Gráficos da seção "Gráfico de Viagens", na ordem do seletor
+GRAFICOS = [
+    "Total KM & Custos por Data",
+    "Distribuição dos Custos",
+    "Valor Total x Total KM",
+    "Histograma de Total KM",
+    "Evolução dos Custos",
+    "Previsão de Viagens Futuras",
+]
 
 # -----------------------------
 # FUNÇÕES DE CADASTRO SIMPLES
@@ -113,6 +121,20 @@ def cadastro_tipos_oleo(db: DBManager):
 # -----------------------------
 # FUNÇÕES DE CADASTRO DE ENDEREÇO
 # -----------------------------
+def exibir_sugestoes_cep(texto):
+    """
+    Mostra sugestões da base offline de CEPs para um CEP incompleto
+    ou para o início de um logradouro.
+    """
+    offline = obter_servico_cep().offline
+    if offline is None or normalizar_cep(texto) or len(texto.strip()) < 3:
+        return
+    sugestoes = offline.buscar(texto, limite=5)
+    if sugestoes:
+        st.caption("Sugestões da base offline de CEPs:")
+        for s in sugestoes:
+            st.caption(f"{s['cep']} — {s['logradouro']}, {s['bairro']}, {s['localidade']}/{s['uf']}")
+
 def cadastro_origem(db: DBManager):
     st.subheader("Cadastro de Origem (Endereço)")
     user_name = st.session_state.get("user_name", "Desconhecido")
@@ -126,6 +148,7 @@ def cadastro_origem(db: DBManager):
             st.json(endereco_info)
         else:
             st.error("CEP não encontrado ou inválido.")
+            exibir_sugestoes_cep(cep_input)
 
     numero = st.text_input("Digite o número do endereço", key="origem_numero_input")
     col1, col2 = st.columns(2)
@@ -161,6 +184,7 @@ def cadastro_destino(db: DBManager):
             st.json(endereco_info)
         else:
             st.error("CEP não encontrado ou inválido.")
+            exibir_sugestoes_cep(cep_input)
 
     numero = st.text_input("Digite o número do endereço", key="destino_numero_input")
     col1, col2 = st.columns(2)
@@ -184,91 +208,141 @@ def cadastro_destino(db: DBManager):
             limpar_campos(["destino_cep_input", "destino_numero_input"])
 
 # -----------------------------
-# FUNÇÃO PRINCIPAL
+# IMPORTAÇÃO DE PLANILHAS
 # -----------------------------
-def main_app():
-    db = DBManager()
-
-    st.sidebar.title("Menu")
-    if st.sidebar.button("Logout", key="botao_logout"):
-        st.session_state.authenticated = False
-        st.experimental_rerun()
-        logger.info("Usuário fez logout.")
-
-    st.title("📌 Sistema de Gestão de Viagem - Horizonte Turismo")
+def importacao_viagens(db: DBManager):
+    st.subheader("Importar Histórico de Viagens")
+    user_name = st.session_state.get("user_name", "Desconhecido")
+    st.write("Envie a planilha de viagens (XLSX ou CSV) com as colunas Origem, Destino, Carro, "
+             "K-Saída, K-Chegada, Data da Saída, Data da Volta, Óleo Diesel S10/S500, Valor, "
+             "Pedágio, Diária do Motorista, Despesa Extra e Motorista.")
+
+    arquivo = st.file_uploader("Planilha", type=["xlsx", "csv"], key="importacao_arquivo")
+    if st.button("Importar", key="botao_importar_planilha", disabled=arquivo is None):
+        with st.spinner("Importando viagens..."):
+            try:
+                relatorio = ImportadorViagens(db).importar_arquivo(arquivo, nome=arquivo.name)
+            except ValueError as erro:
+                st.error(f"Não foi possível importar a planilha: {erro}")
+                return
+        st.success(f"{relatorio['importadas']} viagens importadas em {relatorio['segundos']:.1f} s.")
+        st.write(f"**Linhas lidas:** {relatorio['linhas_lidas']}  \n"
+                 f"**Linhas rejeitadas:** {relatorio['rejeitadas']}  \n"
+                 f"**Endereços criados:** {relatorio['enderecos_criados']}  \n"
+                 f"**Carros criados:** {relatorio['carros_criados']}  \n"
+                 f"**Motoristas criados:** {relatorio['motoristas_criados']}")
+        if relatorio["erros"]:
+            st.warning("Linhas rejeitadas:")
+            st.dataframe(pd.DataFrame(relatorio["erros"]))
+        logger.info(f"[IMPORTACAO] Planilha '{arquivo.name}' importada por {user_name}: "
+                    f"{relatorio['importadas']} viagens, {relatorio['rejeitadas']} rejeitadas")
+
+def seletor_local(nome, rotulo, buscar, obter, chave):
+    """
+    Campo de busca + selectbox de origem/destino. As opções são os
+    LIMITE_BUSCA_LOCAIS endereços mais relevantes para o texto digitado
+    (busca textual no banco), identificados pelo id; o registro já escolhido
+    continua entre as opções quando a busca muda. Retorna o id ou None.
+    """
+    texto = st.text_input(f"Buscar {nome}", key=f"{chave}_busca",
+                          placeholder="CEP, logradouro, bairro ou cidade")
+    encontrados = buscar(texto, LIMITE_BUSCA_LOCAIS)
+    if texto and not encontrados:
+        st.info(f"Nenhum endereço de {nome} encontrado para \"{texto}\".")
+    locais = {local.id: local for local in encontrados}
+    selecionado = st.session_state.get(chave)
+    if selecionado is not None and selecionado not in locais:
+        local = obter(selecionado)
+        if local is not None:
+            locais = {selecionado: local, **locais}
+    return st.selectbox(
+        rotulo,
+        list(locais),
+        format_func=lambda local_id: locais[local_id].rotulo,
+        disabled=not locais,
+        key=chave
+    )
 
-    # Define a variável user_role no escopo desta função
-    user_role = st.session_state.get("role", "operator")
-    logger.info(f"Usuário com papel {user_role} acessando a aplicação.")
 
-    if user_role == "admin":
-        aba_principal, aba_tabela, aba_grafico, aba_cadastros = st.tabs([
-            "Cadastro de Viagem",
-            "Tabela de Viagens",
-            "Gráfico de Viagens",
-            "Cadastros"
-        ])
-    else:
-        aba_principal = st.tabs(["Cadastro de Viagem"])[0]
-
-    # Aba 1: Cadastro de Viagem
-    with aba_principal:
+# -----------------------------
+# FUNÇÃO PRINCIPAL
+# -----------------------------
+def painel_desempenho(db: DBManager, tempos_render):
+    """
+    Painel opcional (somente admin) na barra lateral com as estatísticas de
+    desempenho da camada de dados e os tempos de renderização das seções.
+    """
+    if not st.sidebar.checkbox("Painel de desempenho", key="painel_desempenho"):
+        return
+    perfil = obter_perfil()
+    st.sidebar.subheader("⏱️ Desempenho")
+
+    st.sidebar.caption("Renderização: última execução de cada seção (ms)")
+    st.sidebar.dataframe(
+        pd.DataFrame({"Seção": list(tempos_render), "ms": [t * 1000 for t in tempos_render.values()]}),
+        hide_index=True, use_container_width=True
+    )
+
+    colunas = {"nome": "Nome", "chamadas": "Chamadas", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)",
+               "p99_ms": "p99 (ms)", "linhas_media": "Linhas (média)"}
+    st.sidebar.caption("Métodos do DBManager")
+    st.sidebar.dataframe(perfil.resumo("metodo")[list(colunas)].rename(columns=colunas).round(2),
+                         hide_index=True, use_container_width=True)
+    st.sidebar.caption("Comandos SQL (mais lentos primeiro)")
+    sqls = perfil.resumo("sql").head(20)
+    sqls["nome"] = sqls["nome"].str.slice(0, 120)
+    st.sidebar.dataframe(sqls[list(colunas)].rename(columns=colunas).round(2),
+                         hide_index=True, use_container_width=True)
+
+    conexoes = perfil.resumo("conexao")
+    cache = db.cache.estatisticas()
+    st.sidebar.write(
+        f"**Conexões abertas:** {db.pool.total_conexoes} "
+        f"(abertura média {conexoes['media_ms'].mean() if not conexoes.empty else 0:.1f} ms)"
+    )
+    st.sidebar.write(f"**Cache:** {cache['acertos']} acertos, {cache['falhas']} falhas "
+                     f"({cache['taxa_acerto']:.0%}), {cache['entradas']} entradas")
+    if st.sidebar.button("Zerar estatísticas", key="botao_zerar_perfil"):
+        perfil.limpar()
+        logger.info("Estatísticas de desempenho zeradas.")
+
+
+def tempo_secao(nome):
+    """
+    Cronometra uma seção; o painel de desempenho mostra o último tempo de
+    cada seção, inclusive das execuções só do fragmento.
+    """
+    tempos = st.session_state.setdefault("tempos_render", {})
+    tempos.pop(nome, None)
+    return cronometro(tempos, nome)
+
+
+# Cada seção é um fragmento: a interação com os seus widgets executa de novo
+# só a seção, e não a página inteira (ver main_app)
+@st.fragment
+def secao_cadastro_viagem(db: DBManager):
+    with tempo_secao("Cadastro de Viagem"):
+        contexto = ContextoDados(db)
         st.subheader("Cadastro de Nova Viagem")
         user_name = st.session_state.get("user_name", "Desconhecido")
 
-        # Carrega origens e destinos
-        origens = db.obter_origens()
-        destinos = db.obter_destinos()
-
-        opcoes_origem = [
-            f"{o['cep']} {o['logradouro']} {o['complemento']} {o['bairro']} {o['localidade']} {o['uf']} {o['numero']}"
-            for o in origens
-        ]
-        opcoes_destino = [
-            f"{d['cep']} {d['logradouro']} {d['complemento']} {d['bairro']} {d['localidade']} {d['uf']} {d['numero']}"
-            for d in destinos
-        ]
-
-        tem_origem = len(opcoes_origem) > 0
-        tem_destino = len(opcoes_destino) > 0
-
-        if not tem_origem:
+        # Origem e destino: busca textual no banco, selecionados pelo id
+        if not db.buscar_origens(""):
             st.warning("Nenhuma origem cadastrada. Cadastre uma origem antes de registrar viagens.")
-        if not tem_destino:
+        if not db.buscar_destinos(""):
             st.warning("Nenhum destino cadastrado. Cadastre um destino antes de registrar viagens.")
 
-        origem_escolhida = st.selectbox(
-            "Selecione a Origem",
-            opcoes_origem if tem_origem else ["(Nenhuma origem disponível)"],
-            disabled=(not tem_origem),
-            key="viagem_cadastro_origem"
-        )
-        destino_escolhida = st.selectbox(
-            "Selecione o Destino",
-            opcoes_destino if tem_destino else ["(Nenhum destino disponível)"],
-            disabled=(not tem_destino),
-            key="viagem_cadastro_destino"
-        )
-
-        if tem_origem:
-            origem_idx = opcoes_origem.index(origem_escolhida)
-            origem_id = origens[origem_idx]["origem_id"]
-        else:
-            origem_id = None
-
-        if tem_destino:
-            destino_idx = opcoes_destino.index(destino_escolhida)
-            destino_id = destinos[destino_idx]["destino_id"]
-        else:
-            destino_id = None
+        origem_id = seletor_local("origem", "Selecione a Origem",
+                                  db.buscar_origens, db.obter_origem, "viagem_cadastro_origem")
+        destino_id = seletor_local("destino", "Selecione o Destino",
+                                   db.buscar_destinos, db.obter_destino, "viagem_cadastro_destino")
 
         row1 = st.columns(2)
         with row1[0]:
-            carros = db.obter_carros()
-            carro = st.selectbox("Carro", carros["nome"].tolist(), key="viagem_select_carro")
+            carro = st.selectbox("Carro", contexto.carros()["nome"].tolist(), key="viagem_select_carro")
         with row1[1]:
-            motoristas = db.obter_motoristas()
-            motorista = st.selectbox("Motorista", motoristas["nome"].tolist(), key="viagem_select_motorista")
+            motorista = st.selectbox("Motorista", contexto.motoristas()["nome"].tolist(),
+                                     key="viagem_select_motorista")
 
         row2 = st.columns(3)
         with row2[0]:
@@ -321,13 +395,13 @@ def main_app():
         col_salvar, col_limpar = st.columns(2)
         with col_salvar:
             if st.button("Salvar Viagem", key="botao_salvar_viagem", disabled=(not can_save)):
+                # Total KM, litros e valores são colunas geradas, calculadas pelo SQLite
                 dados = (
                     origem_id, destino_id, carro,
-                    km_saida, km_chegada, calculated_total_km,
+                    km_saida, km_chegada,
                     data_saida, data_volta, valor,
                     motorista, diaria_motorista, despesa_extra,
-                    diesel_s10, diesel_s500, litros,
-                    computed_valor_combustivel, pedagio, computed_valor_total
+                    diesel_s10, diesel_s500, pedagio
                 )
                 db.inserir_viagem(*dados)
                 st.success("Viagem registrada com sucesso!")
@@ -349,147 +423,136 @@ def main_app():
                     "viagem_diaria_motorista", "viagem_valor_total"
                 ])
 
-    # Aba 2: Tabela de Viagens (somente para admin)
-    if user_role == "admin":
-        with aba_tabela:
-            st.subheader("📋 Viagens Registradas")
-
-            # Carrega o DataFrame completo do banco de dados
-            df_viagens = db.obter_viagens_completo()
-
-            if not df_viagens.empty:
-                # 1) Converter colunas relevantes para numérico
-                numeric_cols = [
-                    "Total de KM",
-                    "Valor Total da Viagem",
-                    "Valor do Combustível",
-                    "Valor do Pedágio",
-                    "Despesas Extras",
-                    "Diária do Motorista"
-                ]
-                for col in numeric_cols:
-                    if col in df_viagens.columns:
-                        df_viagens[col] = pd.to_numeric(df_viagens[col], errors="coerce")
-
-                # 2) Converter a coluna "Data de Saída" para datetime
-                if "Data de Saída" in df_viagens.columns:
-                    df_viagens["Data de Saída"] = pd.to_datetime(df_viagens["Data de Saída"], errors="coerce")
-
-                # Atualiza o campo "Valor Total da Viagem" para incluir o Pedágio
-                if all(col in df_viagens.columns for col in ["Valor do Combustível", "Valor do Pedágio", "Despesas Extras", "Diária do Motorista"]):
-                    df_viagens["Valor Total da Viagem"] = (
-                        df_viagens["Valor do Combustível"] +
-                        df_viagens["Valor do Pedágio"] +
-                        df_viagens["Despesas Extras"] +
-                        df_viagens["Diária do Motorista"]
-                    )
 
-                # 3) Criar filtros (Ano, Mês, Origem, Destino, Motorista)
-                col1, col2, col3, col4, col5 = st.columns(5)
+@st.fragment
+def secao_tabela_viagens(db: DBManager):
+    with tempo_secao("Tabela de Viagens"):
+        contexto = ContextoDados(db)
+        user_name = st.session_state.get("user_name", "Desconhecido")
+        st.subheader("📋 Viagens Registradas")
 
-                with col1:
-                    anos = sorted(df_viagens["Data de Saída"].dt.year.dropna().unique().tolist())
-                    anos_str = [str(a) for a in anos]
-                    selected_ano = st.selectbox("Ano", ["Todos"] + anos_str, index=0, key="tabela_filtro_ano")
+        # Opções dos filtros (consultas DISTINCT pelos índices de viagens)
+        opcoes = contexto.opcoes_filtro()
 
-                with col2:
-                    meses = sorted(df_viagens["Data de Saída"].dt.month.dropna().unique().tolist())
-                    meses_str = [str(m) for m in meses]
-                    selected_mes = st.selectbox("Mês", ["Todos"] + meses_str, index=0, key="tabela_filtro_mes")
+        if opcoes["anos"] or opcoes["motoristas"]:
+            rotulos_origem = dict(opcoes["origens"])
+            rotulos_destino = dict(opcoes["destinos"])
 
-                with col3:
-                    origens_list = sorted(df_viagens["Endereço de Origem"].dropna().unique().tolist())
-                    selected_origem = st.selectbox("Origem", ["Todos"] + origens_list, index=0, key="tabela_filtro_origem")
-
-                with col4:
-                    destinos_list = sorted(df_viagens["Endereço de Destino"].dropna().unique().tolist())
-                    selected_destino = st.selectbox("Destino", ["Todos"] + destinos_list, index=0, key="tabela_filtro_destino")
-
-                with col5:
-                    motoristas_list = sorted(df_viagens["Motorista"].dropna().unique().tolist())
-                    selected_motorista = st.selectbox("Motorista", ["Todos"] + motoristas_list, index=0, key="tabela_filtro_motorista")
-
-                # 4) Aplicar os filtros ao DataFrame
-                df_filtrado = df_viagens.copy()
-                if selected_ano != "Todos":
-                    df_filtrado = df_filtrado[df_filtrado["Data de Saída"].dt.year == int(selected_ano)]
-                if selected_mes != "Todos":
-                    df_filtrado = df_filtrado[df_filtrado["Data de Saída"].dt.month == int(selected_mes)]
-                if selected_origem != "Todos":
-                    df_filtrado = df_filtrado[df_filtrado["Endereço de Origem"] == selected_origem]
-                if selected_destino != "Todos":
-                    df_filtrado = df_filtrado[df_filtrado["Endereço de Destino"] == selected_destino]
-                if selected_motorista != "Todos":
-                    df_filtrado = df_filtrado[df_filtrado["Motorista"] == selected_motorista]
-
-                # 5) Calcular subtotais
-                subtotal_total_km = df_filtrado["Total de KM"].sum()
-                subtotal_valor_total = df_filtrado["Valor Total da Viagem"].sum()
-                subtotal_valor_combustivel = df_filtrado["Valor do Combustível"].sum()
-                subtotal_pedagio = df_filtrado["Valor do Pedágio"].sum()
-                subtotal_despesa_extra = df_filtrado["Despesas Extras"].sum()
-                subtotal_diaria = df_filtrado["Diária do Motorista"].sum()
-
-                # 6) Exibir subtotais
-                st.markdown("### Subtotais")
-                st.write(f"**Total KM:** {subtotal_total_km:,.2f}")
-                st.write(f"**Valor Total:** {subtotal_valor_total:,.2f}")
-                st.write(f"**Valor Combustível:** {subtotal_valor_combustivel:,.2f}")
-                st.write(f"**Pedágio:** {subtotal_pedagio:,.2f}")
-                st.write(f"**Despesa Extra:** {subtotal_despesa_extra:,.2f}")
-                st.write(f"**Diária do Motorista:** {subtotal_diaria:,.2f}")
-
-                # 7) Exportar o DataFrame filtrado para Excel
-                excel_data = to_excel_bytes(df_filtrado)
-                st.download_button(
-                    label="Exportar para Excel",
-                    data=excel_data,
-                    file_name="viagens_com_enderecos.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                    key="tabela_botao_exportar_excel"
+            # 1) Criar filtros (Ano, Mês, Origem, Destino, Motorista)
+            col1, col2, col3, col4, col5 = st.columns(5)
+
+            with col1:
+                selected_ano = st.selectbox("Ano", ["Todos"] + opcoes["anos"], index=0, key="tabela_filtro_ano")
+
+            with col2:
+                selected_mes = st.selectbox("Mês", ["Todos"] + opcoes["meses"], index=0, key="tabela_filtro_mes")
+
+            with col3:
+                selected_origem = st.selectbox(
+                    "Origem", ["Todos"] + list(rotulos_origem), index=0, key="tabela_filtro_origem",
+                    format_func=lambda i: rotulos_origem.get(i, i)
                 )
 
-                # 8) Ajustar a exibição da coluna Data de Saída (somente a data, sem hora)
-                df_filtrado["Data de Saída"] = df_filtrado["Data de Saída"].dt.date
+            with col4:
+                selected_destino = st.selectbox(
+                    "Destino", ["Todos"] + list(rotulos_destino), index=0, key="tabela_filtro_destino",
+                    format_func=lambda i: rotulos_destino.get(i, i)
+                )
 
-                # 9) Exibir o DataFrame filtrado
-                st.dataframe(df_filtrado)
+            with col5:
+                selected_motorista = st.selectbox("Motorista", ["Todos"] + opcoes["motoristas"], index=0, key="tabela_filtro_motorista")
+
+            filtros = {
+                "ano": None if selected_ano == "Todos" else selected_ano,
+                "mes": None if selected_mes == "Todos" else selected_mes,
+                "origem_id": None if selected_origem == "Todos" else selected_origem,
+                "destino_id": None if selected_destino == "Todos" else selected_destino,
+                "motorista": None if selected_motorista == "Todos" else selected_motorista,
+            }
+            ordem = st.radio(
+                "Ordenar por", ["-data_saida", "data_saida"], horizontal=True, key="tabela_ordem",
+                format_func=lambda o: "Mais recentes" if o.startswith("-") else "Mais antigas"
+            )
+
+            # 2) Paginação por chave: guarda os cursores das páginas já visitadas
+            #    e recomeça da primeira página quando os filtros mudam
+            chave_filtros = (tuple(filtros.items()), ordem)
+            if st.session_state.get("tabela_chave_filtros") != chave_filtros:
+                st.session_state.tabela_chave_filtros = chave_filtros
+                st.session_state.tabela_cursores = [None]
+            cursores = st.session_state.tabela_cursores
+
+            resultado = db.buscar_viagens(filtros, ordem=ordem, limite=TAMANHO_PAGINA, cursor=cursores[-1])
+            df_filtrado = resultado["viagens"]
+            subtotais = resultado["subtotais"]
+
+            # 3) Exibir subtotais (calculados no SQL sobre todo o filtro)
+            st.markdown("### Subtotais")
+            st.write(f"**Total KM:** {subtotais['total_km']:,.2f}")
+            st.write(f"**Valor Total:** {subtotais['valor_total']:,.2f}")
+            st.write(f"**Valor Combustível:** {subtotais['valor_combustivel']:,.2f}")
+            st.write(f"**Pedágio:** {subtotais['pedagio']:,.2f}")
+            st.write(f"**Despesa Extra:** {subtotais['despesa_extra']:,.2f}")
+            st.write(f"**Diária do Motorista:** {subtotais['diaria_motorista']:,.2f}")
+
+            # 4) Exportar todas as viagens filtradas (o arquivo só é gerado quando pedido)
+            col_formato, col_gerar = st.columns(2)
+            with col_formato:
+                formato = st.selectbox("Formato", list(FORMATOS_EXPORTACAO), key="tabela_formato_exportacao",
+                                       format_func=str.upper)
+            with col_gerar:
+                if st.button("Gerar arquivo para exportação", key="tabela_botao_gerar_exportacao"):
+                    with st.spinner("Gerando arquivo..."):
+                        dados, nome_arquivo, mime = exportar_viagens_bytes(db, formato, filtros, ordem)
+                    st.download_button(
+                        label=f"Baixar {formato.upper()}",
+                        data=dados,
+                        file_name=nome_arquivo,
+                        mime=mime,
+                        key="tabela_botao_exportar_excel"
+                    )
+                    logger.info(f"[EXPORTACAO] Viagens exportadas em {formato.upper()} por {user_name}")
+
+            # 5) Exibir a página atual
+            st.dataframe(df_filtrado)
+
+            total_paginas = max(1, -(-resultado["total_viagens"] // TAMANHO_PAGINA))
+            col_anterior, col_pagina, col_proxima = st.columns(3)
+            with col_anterior:
+                if st.button("◀ Anterior", key="tabela_pagina_anterior", disabled=len(cursores) == 1):
+                    cursores.pop()
+                    st.rerun()
+            with col_pagina:
+                st.write(f"Página {len(cursores)} de {total_paginas} ({resultado['total_viagens']} viagens)")
+            with col_proxima:
+                if st.button("Próxima ▶", key="tabela_pagina_proxima", disabled=resultado["proximo_cursor"] is None):
+                    cursores.append(resultado["proximo_cursor"])
+                    st.rerun()
+
+        else:
+            st.info("Nenhuma viagem registrada ainda.")
 
-            else:
-                st.info("Nenhuma viagem registrada ainda.")
 
-    # Aba 3: Gráficos de Viagens
-    with aba_grafico:
+@st.fragment
+def secao_graficos(db: DBManager):
+    # Import local: o altair só é carregado quando a seção de gráficos é aberta
+    import altair as alt
+
+    with tempo_secao("Gráfico de Viagens"):
+        contexto = ContextoDados(db)
         st.subheader("📊 Gráficos de Viagens")
-        df_viagens = db.obter_viagens_completo()
-        if not df_viagens.empty:
-            # Garantir que a coluna de data seja do tipo datetime
-            df_viagens["Data de Saída"] = pd.to_datetime(df_viagens["Data de Saída"], errors="coerce")
-            
-            # Cria seis abas para os gráficos
-            grafico_tab1, grafico_tab2, grafico_tab3, grafico_tab4, grafico_tab5, grafico_tab6 = st.tabs([
-                "Total KM & Custos por Data",
-                "Distribuição dos Custos",
-                "Valor Total x Total KM",
-                "Histograma de Total KM",
-                "Evolução dos Custos",
-                "Previsão de Viagens Futuras"
-            ])
-            
+        # Resumo diário (uma linha por dia), mantido por triggers em viagens
+        resumo = contexto.resumo()
+        if not resumo.empty:
+
+            # Seletor dos seis gráficos: só o escolhido é montado (com st.tabs,
+            # os seis seriam calculados e enviados ao navegador a cada execução)
+            grafico = st.radio("Gráfico", GRAFICOS, horizontal=True, key="grafico_selecionado",
+                               label_visibility="collapsed")
+
             # Gráfico 1: Linha para Total KM, Valor Total e Valor do Combustível por Data
-            with grafico_tab1:
-                df_grouped = df_viagens.groupby("Data de Saída", as_index=False).agg({
-                    "Total de KM": "sum",
-                    "Valor Total da Viagem": "sum",
-                    "Valor do Combustível": "sum"
-                })
-                # Reestruturar os dados para plotagem
-                df_melted = df_grouped.melt(
-                    id_vars="Data de Saída", 
-                    value_vars=["Total de KM", "Valor Total da Viagem", "Valor do Combustível"],
-                    var_name="Métrica", 
-                    value_name="Valor"
-                )
+            if grafico == GRAFICOS[0]:
+                df_melted = dados_evolucao_diaria(resumo)
                 chart1 = alt.Chart(df_melted).mark_line(point=True).encode(
                     x=alt.X("Data de Saída:T", title="Data"),
                     y=alt.Y("Valor:Q", title="Valor / KM"),
@@ -504,17 +567,8 @@ def main_app():
                 st.write("Este gráfico mostra a evolução diária do Total de KM percorridos, do Valor Total das viagens e do Valor do Combustível, permitindo identificar tendências e sazonalidades.")
             
             # Gráfico 2: Distribuição dos Custos (pizza)
-            with grafico_tab2:
-                custos = pd.DataFrame({
-                    "Categoria": ["Pedágio", "Despesa Extra", "Diária do Motorista", "Valor do Combustível"],
-                    "Valor": [
-                        df_viagens["Valor do Pedágio"].sum(),
-                        df_viagens["Despesas Extras"].sum(),
-                        df_viagens["Diária do Motorista"].sum(),
-                        df_viagens["Valor do Combustível"].sum()
-                    ]
-                })
-                custos["Percentual"] = (custos["Valor"] / custos["Valor"].sum()) * 100
+            elif grafico == GRAFICOS[1]:
+                custos = dados_distribuicao_custos(resumo)
                 chart2 = alt.Chart(custos).mark_arc(innerRadius=50).encode(
                     theta=alt.Theta(field="Valor", type="quantitative"),
                     color=alt.Color(field="Categoria", type="nominal"),
@@ -528,27 +582,51 @@ def main_app():
                 st.write("Este gráfico analisa a distribuição percentual dos custos das viagens, evidenciando onde os recursos estão sendo mais consumidos.")
             
             # Gráfico 3: Dispersão entre Total KM e Valor Total com bubble size representando Valor do Combustível
-            with grafico_tab3:
-                chart3 = alt.Chart(df_viagens).mark_circle().encode(
-                    x=alt.X("Total de KM:Q", title="Total KM"),
-                    y=alt.Y("Valor Total da Viagem:Q", title="Valor Total"),
-                    size=alt.Size("Valor do Combustível:Q", title="Valor do Combustível"),
-                    color=alt.Color("Endereço de Origem:N", title="Origem"),
-                    tooltip=["Endereço de Origem", "Endereço de Destino", "Total de KM", "Valor Total da Viagem", "Valor do Combustível"]
-                ).properties(
-                    title="Relação: Total KM x Valor Total (tamanho = Valor do Combustível)",
-                    width=700,
-                    height=400
-                ).interactive()
+            elif grafico == GRAFICOS[2]:
+                visualizacao = st.radio("Visualização", ["Pontos (amostra)", "Densidade"],
+                                        horizontal=True, key="grafico3_visualizacao")
+                if visualizacao == "Densidade":
+                    densidade = db.densidade_viagens("total_km", "valor_total")
+                    chart3 = alt.Chart(densidade).mark_rect().encode(
+                        x=alt.X("x_inicio:Q", bin="binned", title="Total KM"),
+                        x2="x_fim:Q",
+                        y=alt.Y("y_inicio:Q", bin="binned", title="Valor Total"),
+                        y2="y_fim:Q",
+                        color=alt.Color("Número de Viagens:Q", scale=alt.Scale(scheme="blues")),
+                        tooltip=["x_inicio:Q", "x_fim:Q", "y_inicio:Q", "y_fim:Q", "Número de Viagens:Q"]
+                    ).properties(
+                        title="Relação: Total KM x Valor Total (número de viagens por faixa)",
+                        width=700,
+                        height=400
+                    )
+                else:
+                    amostra = db.amostra_viagens(LIMITE_PONTOS_DISPERSAO)
+                    if len(amostra["viagens"]) < amostra["total_viagens"]:
+                        st.caption(f"Exibindo uma amostra estratificada por origem de {len(amostra['viagens'])} "
+                                   f"de {amostra['total_viagens']} viagens.")
+                    chart3 = alt.Chart(amostra["viagens"]).mark_circle().encode(
+                        x=alt.X("Total de KM:Q", title="Total KM"),
+                        y=alt.Y("Valor Total da Viagem:Q", title="Valor Total"),
+                        size=alt.Size("Valor do Combustível:Q", title="Valor do Combustível"),
+                        color=alt.Color("Endereço de Origem:N", title="Origem"),
+                        tooltip=["Endereço de Origem", "Endereço de Destino", "Total de KM", "Valor Total da Viagem", "Valor do Combustível"]
+                    ).properties(
+                        title="Relação: Total KM x Valor Total (tamanho = Valor do Combustível)",
+                        width=700,
+                        height=400
+                    ).interactive()
                 st.altair_chart(chart3, use_container_width=True)
                 st.write("Este gráfico de dispersão relaciona o Total de KM com o Valor Total das viagens, utilizando o tamanho dos pontos para indicar o Valor do Combustível, o que pode revelar oportunidades de melhoria e eficiência operacional.")
             
-            # Gráfico 4: Histograma do Total de KM
-            with grafico_tab4:
-                chart4 = alt.Chart(df_viagens).mark_bar().encode(
-                    alt.X("Total de KM:Q", bin=alt.Bin(maxbins=20), title="Intervalos de Total KM"),
-                    y=alt.Y("count():Q", title="Número de Viagens"),
-                    color=alt.Color("Total de KM:Q", scale=alt.Scale(scheme='greens'))
+            # Gráfico 4: Histograma do Total de KM (intervalos calculados no SQL)
+            elif grafico == GRAFICOS[3]:
+                histograma = db.histograma_viagens("total_km", max_bins=20)
+                chart4 = alt.Chart(histograma).mark_bar().encode(
+                    alt.X("Início:Q", bin="binned", title="Intervalos de Total KM"),
+                    x2="Fim:Q",
+                    y=alt.Y("Número de Viagens:Q", title="Número de Viagens"),
+                    color=alt.Color("Início:Q", scale=alt.Scale(scheme='greens'), title="Total de KM"),
+                    tooltip=["Início:Q", "Fim:Q", "Número de Viagens:Q"]
                 ).properties(
                     title="Distribuição do Total de KM por Viagem",
                     width=700,
@@ -558,10 +636,8 @@ def main_app():
                 st.write("Este histograma mostra como as viagens se distribuem em relação à distância percorrida, destacando os intervalos mais comuns.")
             
             # Gráfico 5: Evolução dos Custos de Viagem (área empilhada)
-            with grafico_tab5:
-                df_costos = df_viagens.groupby("Data de Saída")[
-                    ["Valor do Pedágio", "Despesas Extras", "Diária do Motorista", "Valor do Combustível"]
-                ].sum().reset_index()
+            elif grafico == GRAFICOS[4]:
+                df_costos = dados_custos_por_data(resumo)
                 chart5 = alt.Chart(df_costos).mark_area().encode(
                     x=alt.X('Data de Saída:T', title="Data"),
                     y=alt.Y('value:Q', stack='zero', title="Custo Total"),
@@ -579,68 +655,95 @@ def main_app():
                 st.write("O gráfico de área empilhada ilustra a evolução dos diferentes custos das viagens ao longo do tempo, possibilitando identificar tendências e sazonalidades em cada categoria.")
             
             # Gráfico 6: Previsão de Viagens Futuras com Regressão Linear Simples
-            with grafico_tab6:
-                import numpy as np
-                import datetime
-                
-                # Agrupa por data e conta o número de viagens
-                df_grouped = df_viagens.groupby("Data de Saída").size().reset_index(name="NumViagens")
-                df_grouped = df_grouped.sort_values("Data de Saída")
-                
-                # Converte a data para um número ordinal para ajuste de regressão
-                df_grouped["date_ord"] = df_grouped["Data de Saída"].apply(lambda d: d.toordinal())
-                
-                # Se houver dados suficientes, ajusta uma regressão linear
-                if len(df_grouped) >= 2:
-                    coef = np.polyfit(df_grouped["date_ord"], df_grouped["NumViagens"], 1)
-                    poly_model = np.poly1d(coef)
-                    
-                    # Gera datas futuras para os próximos 30 dias
-                    max_date = df_grouped["Data de Saída"].max()
-                    future_dates = [max_date + datetime.timedelta(days=i) for i in range(1, 31)]
-                    future_ord = [d.toordinal() for d in future_dates]
-                    future_predictions = poly_model(future_ord)
-                    
-                    df_forecast = pd.DataFrame({
-                        "Data": future_dates,
-                        "Previsao": future_predictions
-                    })
-                    
-                    # Dados históricos para comparação
-                    df_grouped_hist = df_grouped.rename(columns={"Data de Saída": "Data", "NumViagens": "Histórico"})
-                    
+            elif grafico == GRAFICOS[5]:
+                opcoes_previsao = contexto.opcoes_filtro()
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    carro_previsao = st.selectbox("Carro", ["Todos"] + opcoes_previsao["carros"], index=0,
+                                                  key="previsao_carro")
+                with col2:
+                    motorista_previsao = st.selectbox("Motorista", ["Todos"] + opcoes_previsao["motoristas"],
+                                                      index=0, key="previsao_motorista")
+                with col3:
+                    horizonte = st.number_input("Horizonte (dias)", min_value=7, max_value=180, value=30,
+                                                step=1, key="previsao_horizonte")
+
+                # Ajuste em cache enquanto as viagens não mudarem (ver src/services/forecast.py)
+                previsao = prever_viagens(
+                    db, horizonte,
+                    carro=None if carro_previsao == "Todos" else carro_previsao,
+                    motorista=None if motorista_previsao == "Todos" else motorista_previsao,
+                )
+
+                # Se houver dados suficientes, exibe o histórico e a previsão de cada modelo
+                if previsao is not None:
+                    df_grouped_hist = reduzir_serie(previsao["historico"], "Data", "Viagens")
+
                     line_hist = alt.Chart(df_grouped_hist).mark_line(color="blue").encode(
                         x=alt.X("Data:T", title="Data"),
-                        y=alt.Y("Histórico:Q", title="Número de Viagens"),
-                        tooltip=["Data:T", "Histórico:Q"]
+                        y=alt.Y("Viagens:Q", title="Número de Viagens"),
+                        tooltip=["Data:T", "Viagens:Q"]
                     )
-                    line_forecast = alt.Chart(df_forecast).mark_line(color="red", strokeDash=[5,5]).encode(
+                    line_forecast = alt.Chart(previsao["previsoes"]).mark_line(strokeDash=[5,5]).encode(
                         x=alt.X("Data:T", title="Data"),
-                        y=alt.Y("Previsao:Q", title="Número de Viagens"),
-                        tooltip=["Data:T", "Previsao:Q"]
+                        y=alt.Y("Previsão:Q", title="Número de Viagens"),
+                        color=alt.Color("Modelo:N", title="Modelo"),
+                        tooltip=["Data:T", "Modelo:N", alt.Tooltip("Previsão:Q", format=".2f")]
                     )
                     combined_chart = alt.layer(line_hist, line_forecast).properties(
-                        title="Previsão de Número de Viagens Futuras (Próximos 30 dias)",
+                        title=f"Previsão de Número de Viagens Futuras (Próximos {horizonte} dias)",
                         width=800,
                         height=400
                     )
                     st.altair_chart(combined_chart, use_container_width=True)
-                    st.write("Este gráfico mostra a tendência histórica do número de viagens (linha azul) e uma previsão linear para os próximos 30 dias (linha vermelha tracejada). Essa análise pode auxiliar na definição de estratégias para aumentar a quantidade de viagens.")
+                    st.write(f"Este gráfico mostra o número de viagens por dia (linha azul, com zero nos dias sem viagens) e a previsão de cada modelo para os próximos {horizonte} dias (linhas tracejadas). Melhor modelo no backtest: **{previsao['melhor']}**.")
+                    st.dataframe(previsao["erros"].round(3), hide_index=True, use_container_width=True)
                 else:
                     st.info("Não há dados suficientes para gerar uma previsão.")
         else:
             st.info("Nenhuma viagem registrada ainda.")
 
 
-    # Aba 4: Cadastros
-    with aba_cadastros:
+@st.fragment
+def secao_frota(db: DBManager):
+    with tempo_secao("Gestão da Frota"):
+        st.subheader("🚌 Gestão da Frota")
+
+        # Indicadores mantidos em tabelas próprias: as viagens novas ou
+        # alteradas são recalculadas pelo escritor antes da leitura, que
+        # fica no cache (ver src/database/frota.py)
+        db.atualizar_frota()
+        frota = db.obter_frota()
+        if frota["carros"].empty:
+            st.info("Nenhuma viagem registrada ainda.")
+            return
+
+        st.markdown("### Veículos")
+        st.dataframe(frota["carros"].round(2), hide_index=True, use_container_width=True)
+        st.write("KM/L e custo por KM consideram todas as viagens de cada carro. Uma descontinuidade é uma viagem "
+                 "cujo KM de saída difere do KM de chegada da viagem anterior do mesmo carro.")
+
+        st.markdown("### Motoristas")
+        st.dataframe(frota["motoristas"].round(2), hide_index=True, use_container_width=True)
+
+        st.markdown("### Descontinuidades do Hodômetro Mais Recentes")
+        if frota["descontinuidades"].empty:
+            st.write("Nenhuma descontinuidade encontrada.")
+        else:
+            st.dataframe(frota["descontinuidades"], hide_index=True, use_container_width=True)
+
+
+@st.fragment
+def secao_cadastros(db: DBManager):
+    with tempo_secao("Cadastros"):
         st.subheader("Cadastro de Dados")
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs([
             "Carros",
             "Origens",
             "Destinos",
             "Tipos de Óleo",
-            "Motoristas"
+            "Motoristas",
+            "Importar Planilha"
         ])
         with tab1:
             cadastro_carros(db)
@@ -652,9 +755,50 @@ def main_app():
             cadastro_tipos_oleo(db)
         with tab5:
             cadastro_motoristas(db)
+        with tab6:
+            importacao_viagens(db)
+
+
+# Seções da página, na ordem do seletor; operadores só veem a primeira
+SECOES = {
+    "Cadastro de Viagem": secao_cadastro_viagem,
+    "Tabela de Viagens": secao_tabela_viagens,
+    "Gráfico de Viagens": secao_graficos,
+    "Gestão da Frota": secao_frota,
+    "Cadastros": secao_cadastros,
+}
+
+
+def main_app():
+    inicio_rerun = time.perf_counter()
+    db = obter_db()
+
+    st.sidebar.title("Menu")
+    if st.sidebar.button("Logout", key="botao_logout"):
+        st.session_state.authenticated = False
+        st.experimental_rerun()
+        logger.info("Usuário fez logout.")
+
+    st.title("📌 Sistema de Gestão de Viagem - Horizonte Turismo")
+
+    # Define a variável user_role no escopo desta função
+    user_role = st.session_state.get("role", "operator")
+    logger.info(f"Usuário com papel {user_role} acessando a aplicação.")
+
+    # Diferente de st.tabs, que executa o corpo de todas as abas, só a seção
+    # escolhida é executada
+    secao = "Cadastro de Viagem"
+    if user_role == "admin":
+        secao = st.radio("Seção", list(SECOES), horizontal=True, key="secao", label_visibility="collapsed")
+    SECOES[secao](db)
+
+    if user_role == "admin":
+        tempos_render = dict(st.session_state.get("tempos_render", {}))
+        tempos_render["Total da execução"] = time.perf_counter() - inicio_rerun
+        painel_desempenho(db, tempos_render)
 
 def main():
-    auth = AuthManager(env_file=".env")
+    auth = obter_auth(env_file=".env")
     if auth.login():
         main_app()
 
@@ -8,3 +8,57 @@ class Config:
     USERNAME = (os.getenv("USERNAME") or "").strip()
     PASSWORD = (os.getenv("PASSWORD") or "").strip()
     OTP_SECRET = (os.getenv("OTP_SECRET") or "").strip()
+
+    # Banco de dados (SQLite)
+    DB_PATH = (os.getenv("DB_PATH") or "viagens.db").strip()
+    DB_JOURNAL_MODE = (os.getenv("DB_JOURNAL_MODE") or "WAL").strip()
+    DB_SYNCHRONOUS = (os.getenv("DB_SYNCHRONOUS") or "NORMAL").strip()
+    DB_MMAP_SIZE = int(os.getenv("DB_MMAP_SIZE") or 256 * 1024 * 1024)
+    # Valor negativo = tamanho em KiB (convenção do PRAGMA cache_size)
+    DB_CACHE_SIZE = int(os.getenv("DB_CACHE_SIZE") or -64 * 1024)
+    DB_CACHED_STATEMENTS = int(os.getenv("DB_CACHED_STATEMENTS") or 256)
+    # Espera (s) por um lock do banco antes de falhar; escritas agrupadas por
+    # transação no escritor único e tentativas quando o banco está ocupado
+    # (ver src/database/escritor.py)
+    DB_BUSY_TIMEOUT = float(os.getenv("DB_BUSY_TIMEOUT") or 5)
+    DB_ESCRITA_LOTE = int(os.getenv("DB_ESCRITA_LOTE") or 500)
+    DB_ESCRITA_TENTATIVAS = int(os.getenv("DB_ESCRITA_TENTATIVAS") or 3)
+    # Número máximo de resultados guardados no cache de leituras do DBManager
+    DB_CACHE_ENTRADAS = int(os.getenv("DB_CACHE_ENTRADAS") or 128)
+    # Instrumentação de desempenho: "0" desliga a medição por comando SQL;
+    # chamadas acima do limite (ms) são registradas no log como [LENTO]
+    DB_PERFIL = (os.getenv("DB_PERFIL") or "1").strip() != "0"
+    DB_LIMITE_LENTO_MS = float(os.getenv("DB_LIMITE_LENTO_MS") or 500)
+    DB_PERFIL_AMOSTRAS = int(os.getenv("DB_PERFIL_AMOSTRAS") or 1000)
+    # "1" usa o armazém colunar em memória (src/database/colunar.py) na tabela
+    # de viagens e nos histogramas, em vez de consultas SQL
+    DB_ARMAZEM_COLUNAR = (os.getenv("DB_ARMAZEM_COLUNAR") or "0").strip() == "1"
+    # Arquivo Arrow com a tabela completa de viagens compartilhado entre
+    # processos ("" desliga; ver src/database/instantaneo.py) e espera, em
+    # segundos, após a última escrita antes de regravá-lo
+    DB_INSTANTANEO = (os.getenv("DB_INSTANTANEO") or "").strip()
+    DB_INSTANTANEO_ATRASO = float(os.getenv("DB_INSTANTANEO_ATRASO") or 2)
+    # Réplica somente leitura das consultas de relatório ("" desliga,
+    # "memoria" ou caminho de um arquivo; ver src/database/replica.py):
+    # copiada a cada INTERVALO segundos ou após ESCRITAS escritas nas tabelas
+    # que ela atende (0 = só pelo intervalo), usada só se confirmada há no
+    # máximo ATRASO_MAXIMO segundos; PAGINAS por passo do backup (-1 = tudo
+    # de uma vez, sem bloquear escritas no modo WAL)
+    DB_REPLICA = (os.getenv("DB_REPLICA") or "").strip()
+    DB_REPLICA_INTERVALO = float(os.getenv("DB_REPLICA_INTERVALO") or 5)
+    DB_REPLICA_ESCRITAS = int(os.getenv("DB_REPLICA_ESCRITAS") or 50)
+    DB_REPLICA_ATRASO_MAXIMO = float(os.getenv("DB_REPLICA_ATRASO_MAXIMO") or 30)
+    DB_REPLICA_PAGINAS = int(os.getenv("DB_REPLICA_PAGINAS") or -1)
+
+    # Consulta de CEP (ViaCEP)
+    CEP_API_URL = (os.getenv("CEP_API_URL") or "https://viacep.com.br/ws").strip().rstrip("/")
+    CEP_TIMEOUT_CONEXAO = float(os.getenv("CEP_TIMEOUT_CONEXAO") or 3.05)
+    CEP_TIMEOUT_LEITURA = float(os.getenv("CEP_TIMEOUT_LEITURA") or 5)
+    CEP_TENTATIVAS = int(os.getenv("CEP_TENTATIVAS") or 3)
+    CEP_BACKOFF = float(os.getenv("CEP_BACKOFF") or 0.3)
+    # Validade (segundos) das respostas guardadas: CEPs encontrados e CEPs inexistentes
+    CEP_CACHE_TTL = int(os.getenv("CEP_CACHE_TTL") or 30 * 24 * 3600)
+    CEP_CACHE_TTL_NEGATIVO = int(os.getenv("CEP_CACHE_TTL_NEGATIVO") or 24 * 3600)
+    # Base offline de CEPs: "preferir" (consulta local antes da API),
+    # "fallback" (somente quando a API falhar) ou "desligado"
+    CEP_OFFLINE = (os.getenv("CEP_OFFLINE") or "preferir").strip().lower()
@@ -0,0 +1,65 @@
+"""
+Inicialização da aplicação, uma única vez por processo.
+
+O Streamlit executa o main.py inteiro a cada interação, mas importa os
+módulos de src uma única vez. O que não precisa ser refeito a cada execução
+fica guardado aqui:
+
+- configurar_logs: destinos do loguru (console e um arquivo de log por
+  processo, em vez de um arquivo novo a cada execução);
+- obter_auth: AuthManager, que lê o .env;
+- obter_db: DBManager do banco configurado, com as migrações aplicadas
+  na criação.
+
+As dependências pesadas que só alguns caminhos usam (altair, requests,
+openpyxl, xlsxwriter) são importadas dentro das funções que as usam (o
+pyarrow já é importado pelo próprio pandas). O tempo de importação do
+main.py é conferido por python -m benchmarks.tempo_importacao e por
+tests/test_partida.py.
+"""
+import os
+import sys
+import threading
+
+from loguru import logger
+
+from src.config.config import Config
+
+_recursos = {}
+_recursos_lock = threading.Lock()
+
+
+def _obter(chave, criar):
+    with _recursos_lock:
+        if chave not in _recursos:
+            _recursos[chave] = criar()
+        return _recursos[chave]
+
+
+def _criar_logs():
+    os.makedirs("logs", exist_ok=True)
+    logger.remove()
+    logger.add(sys.stdout, level="INFO")
+    logger.add("logs/app_log_{time}.log", level="INFO")
+    logger.info("Iniciando a aplicação Streamlit")
+    return True
+
+
+def configurar_logs():
+    _obter("logs", _criar_logs)
+
+
+def obter_auth(env_file=".env"):
+    from src.auth.auth import AuthManager
+
+    return _obter(("auth", env_file), lambda: AuthManager(env_file=env_file))
+
+
+def obter_db():
+    """
+    DBManager compartilhado pelas sessões do processo (pool, cache e
+    escritor já são compartilhados por banco; ver src/database).
+    """
+    from src.database.db_manager import DBManager
+
+    return _obter(("db", Config.DB_PATH), DBManager)
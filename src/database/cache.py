@@ -0,0 +1,183 @@
+import atexit
+import sqlite3
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from src.config.config import Config
+
+
+def _copiar(valor):
+    """
+    Copia os resultados mutáveis (DataFrames, listas e dicionários) para que
+    quem chama possa alterá-los sem corromper a entrada guardada no cache.
+    """
+    if isinstance(valor, pd.DataFrame):
+        return valor.copy()
+    if isinstance(valor, dict):
+        return {chave: _copiar(item) for chave, item in valor.items()}
+    if isinstance(valor, list):
+        # Listas de registros somente leitura (ver modelos.py) só precisam de cópia rasa
+        if valor and isinstance(valor[0], (pd.DataFrame, dict, list)):
+            return [_copiar(item) for item in valor]
+        return list(valor)
+    return valor
+
+
+def congelar(valor):
+    """
+    Converte argumentos (dicionários, listas) em tuplas, para uso como chave.
+    """
+    if isinstance(valor, dict):
+        return tuple(sorted((chave, congelar(item)) for chave, item in valor.items()))
+    if isinstance(valor, (list, tuple)):
+        return tuple(congelar(item) for item in valor)
+    return valor
+
+
+class CacheConsultas:
+    """
+    Cache LRU de resultados de leitura, compartilhado entre as sessões.
+
+    Cada entrada guarda a "geração" das tabelas de que depende. As escritas
+    do DBManager incrementam a geração das tabelas alteradas, invalidando
+    apenas as entradas afetadas. Escritas feitas por outras conexões (outros
+    processos ou scripts) são detectadas por PRAGMA data_version em uma
+    conexão monitora e invalidam o cache inteiro.
+    """
+
+    def __init__(self, db_path, max_entradas=None):
+        self.db_path = db_path
+        self.max_entradas = Config.DB_CACHE_ENTRADAS if max_entradas is None else max_entradas
+        self._entradas = OrderedDict()
+        self._geracoes = {}
+        self._epoca = 0
+        self._lock = threading.Lock()
+        self._monitor = None
+        self._data_version = None
+        self.acertos = 0
+        self.falhas = 0
+
+    def _verificar_data_version(self):
+        """
+        Invalida tudo se outra conexão gravou no banco desde a última
+        verificação. Deve ser chamado com self._lock adquirido.
+        """
+        if self._monitor is None:
+            self._monitor = sqlite3.connect(self.db_path, check_same_thread=False)
+        data_version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            if self._data_version is not None:
+                self._epoca += 1
+            self._data_version = data_version
+
+    def _versao(self, tabelas):
+        return (self._epoca, tuple(self._geracoes.get(tabela, 0) for tabela in tabelas))
+
+    def obter(self, chave, tabelas, carregar):
+        """
+        Retorna o resultado guardado em chave se nenhuma das tabelas mudou;
+        caso contrário executa carregar() e guarda o resultado.
+        """
+        with self._lock:
+            self._verificar_data_version()
+            versao = self._versao(tabelas)
+            entrada = self._entradas.get(chave)
+            if entrada is not None and entrada[0] == versao:
+                self._entradas.move_to_end(chave)
+                self.acertos += 1
+                return _copiar(entrada[1])
+            self.falhas += 1
+
+        valor = carregar()
+
+        with self._lock:
+            # Só guarda se nenhuma escrita ocorreu durante o carregamento
+            if self._versao(tabelas) == versao:
+                self._entradas[chave] = (versao, _copiar(valor))
+                self._entradas.move_to_end(chave)
+                while len(self._entradas) > self.max_entradas:
+                    self._entradas.popitem(last=False)
+        return valor
+
+    def versao(self, *tabelas):
+        """
+        Versão atual das tabelas: muda a cada invalidar() delas e a cada
+        escrita de outra conexão.
+        """
+        with self._lock:
+            self._verificar_data_version()
+            return self._versao(tabelas)
+
+    def sincronizar(self):
+        """
+        Registra as escritas de outras conexões feitas até agora. Chamado
+        antes de uma escrita do próprio processo (ver invalidar).
+        """
+        with self._lock:
+            self._verificar_data_version()
+
+    def invalidar(self, *tabelas):
+        """
+        Incrementa a geração das tabelas alteradas por uma escrita do próprio
+        processo. A mudança de PRAGMA data_version causada por essa escrita
+        é absorvida aqui, sem invalidar o cache inteiro (as escritas externas
+        anteriores já foram registradas por sincronizar()). Retorna a versão
+        das tabelas (antes, depois) da escrita.
+        """
+        with self._lock:
+            antes = self._versao(tabelas)
+            for tabela in tabelas:
+                self._geracoes[tabela] = self._geracoes.get(tabela, 0) + 1
+            if self._monitor is not None:
+                self._data_version = self._monitor.execute("PRAGMA data_version").fetchone()[0]
+            return antes, self._versao(tabelas)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._epoca += 1
+
+    def estatisticas(self):
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                "acertos": self.acertos,
+                "falhas": self.falhas,
+                "taxa_acerto": self.acertos / consultas if consultas else 0.0,
+                "entradas": len(self._entradas),
+            }
+
+    def fechar(self):
+        with self._lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+            self._entradas.clear()
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def obter_cache(db_path, **opcoes):
+    """
+    Retorna o cache compartilhado do banco informado, criando-o se necessário.
+    """
+    with _caches_lock:
+        cache = _caches.get(db_path)
+        if cache is None:
+            cache = CacheConsultas(db_path, **opcoes)
+            _caches[db_path] = cache
+        return cache
+
+
+def fechar_caches():
+    with _caches_lock:
+        for cache in _caches.values():
+            cache.fechar()
+        _caches.clear()
+
+
+atexit.register(fechar_caches)
@@ -0,0 +1,400 @@
+"""
+Armazém colunar das viagens em memória (TripStore).
+
+A tabela viagens é carregada uma vez em arrays NumPy, uma por coluna:
+carro, motorista, origem e destino codificados por dicionário (int32),
+datas como número de dias desde 1970-01-01 (int32) e métricas em float64.
+As inclusões e exclusões feitas pelo DBManager são aplicadas no próprio
+armazém (a inclusão acrescenta uma linha, a exclusão marca a linha como
+removida); qualquer outra alteração de viagens (importação, mescla de
+endereços, outro processo) muda a versão da tabela no cache de consultas
+e o armazém é recarregado na próxima leitura.
+
+Os filtros da aba "Tabela de Viagens" viram máscaras booleanas e as
+agregações dos gráficos, somas com np.bincount, sem consultar o SQLite.
+O armazém é usado no lugar das consultas SQL quando DB_ARMAZEM_COLUNAR
+está ativo (ver DBManager.buscar_viagens).
+"""
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+# Dia das viagens sem data (ou com data inválida); ordena antes de todas
+SEM_DATA = np.iinfo(np.int32).min
+_EPOCA = datetime.date(1970, 1, 1).toordinal()
+# julianday() do SQLite -> dias desde 1970-01-01
+_DIA_SQL = "CAST(julianday({coluna}) - 2440587.5 AS INTEGER)"
+
+COLUNAS_CODIFICADAS = ("origem_id", "destino_id", "carro", "motorista")
+COLUNAS_METRICAS = ("km_saida", "km_chegada", "total_km", "valor", "diaria_motorista", "despesa_extra",
+                    "diesel_s10", "diesel_s500", "litros", "valor_combustivel", "pedagio", "valor_total")
+
+# Colunas da página (mesmos nomes e ordem de COLUNAS_TABELA_SQL) -> coluna do armazém
+COLUNAS_PAGINA = {
+    "ID": "id",
+    "Carro": "carro",
+    "Quilometragem de Saída": "km_saida",
+    "Quilometragem de Chegada": "km_chegada",
+    "Total de KM": "total_km",
+    "Data de Saída": "dia_saida",
+    "Data de Retorno": "dia_volta",
+    "Valor da Viagem": "valor",
+    "Motorista": "motorista",
+    "Diária do Motorista": "diaria_motorista",
+    "Despesas Extras": "despesa_extra",
+    "Diesel S10 (Litros)": "diesel_s10",
+    "Diesel S500 (Litros)": "diesel_s500",
+    "Total de Combustível (Litros)": "litros",
+    "Valor do Combustível": "valor_combustivel",
+    "Valor do Pedágio": "pedagio",
+    "Valor Total da Viagem": "valor_total",
+    "Endereço de Origem": "origem_id",
+    "Endereço de Destino": "destino_id",
+}
+
+
+def dia_numero(data):
+    """
+    Converte a data "AAAA-MM-DD" em dias desde 1970-01-01 (SEM_DATA se vazia
+    ou inválida), como julianday() no carregamento.
+    """
+    try:
+        return datetime.date.fromisoformat(str(data)[:10]).toordinal() - _EPOCA
+    except ValueError:
+        return SEM_DATA
+
+
+def texto_dias(dias):
+    """
+    Converte um array de dias em datas "AAAA-MM-DD" (None para SEM_DATA).
+    """
+    datas = np.datetime_as_string(dias.astype("datetime64[D]"), unit="D").astype(object)
+    datas[dias == SEM_DATA] = None
+    return datas
+
+
+class Dicionario:
+    """
+    Codificação por dicionário: cada valor distinto (inclusive None) recebe
+    um código int32, na ordem em que aparece.
+    """
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codificar(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def codigo(self, valor):
+        """
+        Código do valor, ou -1 se ele nunca apareceu.
+        """
+        return self._codigos.get(valor, -1)
+
+    def decodificar(self, codigos):
+        return np.array(self.valores, dtype=object)[codigos] if len(codigos) else np.array([], dtype=object)
+
+
+class TripStore:
+    """
+    Cópia colunar da tabela viagens. Os arrays têm folga para crescer: as
+    primeiras self.n posições são válidas e self.ativa marca as linhas não
+    excluídas. Todos os métodos públicos sincronizam com o banco antes de ler.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.n = 0
+        self._colunas = {}
+        self._dicionarios = {}
+        self._versao = None
+        self._ordem = None
+        self._lock = threading.RLock()
+
+    # Carga e atualização incremental
+    def _carregar(self, versao):
+        inicio = datetime.datetime.now()
+        cursor = self.db._conexao().execute(f'''
+            SELECT id, {", ".join(COLUNAS_CODIFICADAS)},
+                   {_DIA_SQL.format(coluna="data_saida")}, {_DIA_SQL.format(coluna="data_volta")},
+                   {", ".join(COLUNAS_METRICAS)}
+            FROM viagens
+            ORDER BY id
+        ''')
+        linhas = cursor.fetchall()
+        n = len(linhas)
+        colunas = list(zip(*linhas)) if n else [()] * (1 + len(COLUNAS_CODIFICADAS) + 2 + len(COLUNAS_METRICAS))
+        del linhas
+
+        self._dicionarios = {nome: Dicionario() for nome in COLUNAS_CODIFICADAS}
+        capacidade = max(1024, int(n * 1.25))
+        self._colunas = {"id": np.zeros(capacidade, dtype=np.int64), "ativa": np.zeros(capacidade, dtype=bool)}
+        self._colunas["id"][:n] = colunas[0]
+        self._colunas["ativa"][:n] = True
+        for i, nome in enumerate(COLUNAS_CODIFICADAS, start=1):
+            dicionario = self._dicionarios[nome]
+            self._colunas[nome] = np.zeros(capacidade, dtype=np.int32)
+            self._colunas[nome][:n] = np.fromiter((dicionario.codificar(v) for v in colunas[i]),
+                                                  dtype=np.int32, count=n)
+        for i, nome in enumerate(("dia_saida", "dia_volta"), start=1 + len(COLUNAS_CODIFICADAS)):
+            dias = np.array(colunas[i], dtype=float)
+            self._colunas[nome] = np.full(capacidade, SEM_DATA, dtype=np.int32)
+            self._colunas[nome][:n] = np.where(np.isnan(dias), SEM_DATA, dias)
+        for i, nome in enumerate(COLUNAS_METRICAS, start=3 + len(COLUNAS_CODIFICADAS)):
+            self._colunas[nome] = np.full(capacidade, np.nan)
+            self._colunas[nome][:n] = np.array(colunas[i], dtype=float)
+        self._colunas["ano"], self._colunas["mes"] = self._ano_mes(self._colunas["dia_saida"])
+
+        self.n = n
+        self._ordem = None
+        self._versao = versao
+        logger.info(f"[ARMAZEM] {n} viagens carregadas em "
+                    f"{(datetime.datetime.now() - inicio).total_seconds():.2f} s")
+
+    @staticmethod
+    def _ano_mes(dias):
+        datas = dias.astype("datetime64[D]")
+        ano = datas.astype("datetime64[Y]").astype(np.int64) + 1970
+        mes = datas.astype("datetime64[M]").astype(np.int64) % 12 + 1
+        sem_data = dias == SEM_DATA
+        return np.where(sem_data, 0, ano).astype(np.int16), np.where(sem_data, 0, mes).astype(np.int8)
+
+    def _sincronizar(self):
+        versao = self.db.cache.versao("viagens")
+        if versao != self._versao:
+            self._carregar(versao)
+
+    def _crescer(self):
+        # Dobra a capacidade; as posições novas são preenchidas por registrar_insercao
+        for nome, array in self._colunas.items():
+            self._colunas[nome] = np.concatenate([array, np.empty_like(array)])
+
+    def registrar_insercao(self, viagem, versoes):
+        """
+        Acrescenta a viagem inserida pelo DBManager ({coluna: valor} retornado
+        pelo INSERT, com as colunas geradas). versoes = (antes, depois) da
+        invalidação no cache: se o armazém não estava na versão "antes" (não
+        carregado ou desatualizado), nada é feito e ele será recarregado na
+        próxima leitura.
+
+        Uma leitura entre o COMMIT e a invalidação recarrega o armazém já com
+        a viagem, na versão "antes" (a mudança de PRAGMA data_version muda a
+        época do cache): uma viagem já carregada não é acrescentada de novo.
+        """
+        antes, depois = versoes
+        with self._lock:
+            if self._versao is None or self._versao != antes:
+                return
+            ids = self.coluna("id")
+            if self.n and viagem["id"] <= ids[-1]:
+                # Já carregada; fora da ordem dos ids, recarrega na próxima leitura
+                i = np.searchsorted(ids, viagem["id"])
+                self._versao = depois if ids[i] == viagem["id"] else None
+                return
+            if self.n == len(self._colunas["id"]):
+                self._crescer()
+            i = self.n
+            self._colunas["id"][i] = viagem["id"]
+            self._colunas["ativa"][i] = True
+            for nome in COLUNAS_CODIFICADAS:
+                self._colunas[nome][i] = self._dicionarios[nome].codificar(viagem[nome])
+            dia = dia_numero(viagem["data_saida"])
+            self._colunas["dia_saida"][i] = dia
+            self._colunas["dia_volta"][i] = dia_numero(viagem["data_volta"])
+            ano, mes = self._ano_mes(np.array([dia], dtype=np.int32))
+            self._colunas["ano"][i], self._colunas["mes"][i] = ano[0], mes[0]
+            for nome in COLUNAS_METRICAS:
+                self._colunas[nome][i] = np.nan if viagem[nome] is None else float(viagem[nome])
+            self.n += 1
+            self._ordem = None
+            self._versao = depois
+
+    def registrar_exclusao(self, viagem_id, versoes):
+        """
+        Marca a viagem excluída pelo DBManager como removida (ver
+        registrar_insercao); uma viagem que a recarga já não trouxe é ignorada.
+        """
+        antes, depois = versoes
+        with self._lock:
+            if self._versao is None or self._versao != antes:
+                return
+            ids = self._colunas["id"][:self.n]
+            i = np.searchsorted(ids, viagem_id)
+            if i < self.n and ids[i] == viagem_id:
+                self._colunas["ativa"][i] = False
+            self._versao = depois
+
+    # Leitura
+    def coluna(self, nome):
+        """
+        Array das linhas válidas (inclusive as excluídas; ver "ativa").
+        """
+        return self._colunas[nome][:self.n]
+
+    def mascara(self, filtros=None):
+        """
+        Máscara das viagens ativas que atendem aos filtros de
+        DBManager.buscar_viagens (ano, mes, origem_id, destino_id, motorista).
+        """
+        filtros = filtros or {}
+        mascara = self.coluna("ativa").copy()
+        if filtros.get("ano"):
+            mascara &= self.coluna("ano") == int(filtros["ano"])
+        if filtros.get("mes"):
+            mascara &= self.coluna("mes") == int(filtros["mes"])
+        for chave in ("origem_id", "destino_id", "motorista"):
+            valor = filtros.get(chave)
+            if valor is not None:
+                mascara &= self.coluna(chave) == self._dicionarios[chave].codigo(valor)
+        return mascara
+
+    def _ordenacao(self):
+        """
+        Índices das linhas em ordem crescente de (data de saída, id),
+        recalculados só depois de inclusões.
+        """
+        if self._ordem is None:
+            self._ordem = np.lexsort((self.coluna("id"), self.coluna("dia_saida")))
+        return self._ordem
+
+    def _decodificar(self, nome, indices):
+        return self._dicionarios[nome].decodificar(self.coluna(nome)[indices])
+
+    def buscar_viagens(self, filtros=None, ordem="-data_saida", limite=50, cursor=None, rotulos=None):
+        """
+        Mesmo resultado de DBManager.buscar_viagens, calculado sobre os arrays.
+        rotulos(tabela, ids) retorna {id: rótulo do endereço} para a página.
+        """
+        with self._lock:
+            self._sincronizar()
+            mascara = self.mascara(filtros)
+            selecionadas = np.flatnonzero(mascara)
+            subtotais = {
+                chave: float(np.nansum(self.coluna(nome)[selecionadas]))
+                for chave, nome in (("total_km", "total_km"), ("valor_total", "valor_total"),
+                                    ("valor_combustivel", "valor_combustivel"), ("pedagio", "pedagio"),
+                                    ("despesa_extra", "despesa_extra"), ("diaria_motorista", "diaria_motorista"))
+            }
+            total_viagens = len(selecionadas)
+
+            indices = self._ordenacao()
+            indices = indices[mascara[indices]]
+            if ordem.startswith("-"):
+                indices = indices[::-1]
+            if cursor is not None:
+                dia_cursor = SEM_DATA if cursor[0] is None else dia_numero(cursor[0])
+                dias, ids = self.coluna("dia_saida")[indices], self.coluna("id")[indices]
+                if ordem.startswith("-"):
+                    depois = (dias < dia_cursor) | ((dias == dia_cursor) & (ids < cursor[1]))
+                else:
+                    depois = (dias > dia_cursor) | ((dias == dia_cursor) & (ids > cursor[1]))
+                indices = indices[depois]
+            if limite is not None:
+                indices = indices[:int(limite) + 1]
+
+            pagina = {}
+            for rotulo, nome in COLUNAS_PAGINA.items():
+                if nome in ("dia_saida", "dia_volta"):
+                    pagina[rotulo] = texto_dias(self.coluna(nome)[indices])
+                elif nome in self._dicionarios:
+                    pagina[rotulo] = self._decodificar(nome, indices)
+                else:
+                    pagina[rotulo] = self.coluna(nome)[indices]
+        pagina = pd.DataFrame(pagina)
+        for rotulo, tabela in (("Endereço de Origem", "origens"), ("Endereço de Destino", "destinos")):
+            ids = [int(i) for i in pagina[rotulo].dropna().unique()]
+            nomes = rotulos(tabela, ids) if rotulos and ids else {}
+            pagina[rotulo] = pagina[rotulo].map(nomes)
+
+        proximo_cursor = None
+        if limite is not None and len(pagina) > limite:
+            pagina = pagina.iloc[:limite]
+            ultima = pagina.iloc[-1]
+            proximo_cursor = (ultima["Data de Saída"], int(ultima["ID"]))
+        return {
+            "viagens": pagina.reset_index(drop=True),
+            "subtotais": subtotais,
+            "total_viagens": total_viagens,
+            "proximo_cursor": proximo_cursor,
+        }
+
+    def _faixa(self, valores, max_bins, passo_bins):
+        """
+        (início, largura, quantidade de intervalos) dos valores não nulos,
+        com a mesma regra de DBManager._faixa_bins.
+        """
+        if not len(valores):
+            return None
+        minimo, maximo = float(valores.min()), float(valores.max())
+        largura = passo_bins(minimo, maximo, max_bins)
+        inicio = np.floor(minimo / largura) * largura
+        return inicio, largura, max(1, int(np.ceil((maximo - inicio) / largura)))
+
+    @staticmethod
+    def _bins(valores, inicio, largura, quantidade):
+        return np.minimum(((valores - inicio) / largura).astype(np.int64), quantidade - 1)
+
+    def histograma(self, coluna, max_bins, passo_bins):
+        """
+        Mesmo resultado de DBManager.histograma_viagens, com np.bincount.
+        """
+        with self._lock:
+            self._sincronizar()
+            valores = self.coluna(coluna)[self.coluna("ativa")]
+        valores = valores[~np.isnan(valores)]
+        faixa = self._faixa(valores, max_bins, passo_bins)
+        if faixa is None:
+            return pd.DataFrame(columns=["Início", "Fim", "Número de Viagens"])
+        inicio, largura, quantidade = faixa
+        contagens = np.bincount(self._bins(valores, inicio, largura, quantidade), minlength=quantidade)
+        bins = np.flatnonzero(contagens)
+        return pd.DataFrame({"Início": inicio + bins * largura, "Fim": inicio + (bins + 1) * largura,
+                             "Número de Viagens": contagens[bins]})
+
+    def densidade(self, coluna_x, coluna_y, max_bins, passo_bins):
+        """
+        Mesmo resultado de DBManager.densidade_viagens, com np.bincount
+        sobre o código da célula (bx * ny + by).
+        """
+        colunas = ["x_inicio", "x_fim", "y_inicio", "y_fim", "Número de Viagens"]
+        with self._lock:
+            self._sincronizar()
+            ativa = self.coluna("ativa")
+            x, y = self.coluna(coluna_x)[ativa], self.coluna(coluna_y)[ativa]
+        faixa_x = self._faixa(x[~np.isnan(x)], max_bins, passo_bins)
+        faixa_y = self._faixa(y[~np.isnan(y)], max_bins, passo_bins)
+        if faixa_x is None or faixa_y is None:
+            return pd.DataFrame(columns=colunas)
+        (x0, dx, nx), (y0, dy, ny) = faixa_x, faixa_y
+        validos = ~np.isnan(x) & ~np.isnan(y)
+        celulas = (self._bins(x[validos], x0, dx, nx) * ny + self._bins(y[validos], y0, dy, ny))
+        contagens = np.bincount(celulas, minlength=nx * ny)
+        bx, by = np.divmod(np.flatnonzero(contagens), ny)
+        return pd.DataFrame({"x_inicio": x0 + bx * dx, "x_fim": x0 + (bx + 1) * dx,
+                             "y_inicio": y0 + by * dy, "y_fim": y0 + (by + 1) * dy,
+                             "Número de Viagens": contagens[bx * ny + by]})[colunas]
+
+
+_armazens = {}
+_armazens_lock = threading.Lock()
+
+
+def obter_armazem(db):
+    """
+    Retorna o armazém compartilhado do banco do DBManager, criando-o se
+    necessário (os dados só são carregados na primeira leitura).
+    """
+    with _armazens_lock:
+        armazem = _armazens.get(db.db_path)
+        if armazem is None:
+            armazem = TripStore(db)
+            _armazens[db.db_path] = armazem
+        return armazem
@@ -0,0 +1,198 @@
+"""
+Valores derivados das viagens como colunas geradas do SQLite.
+
+total_km, litros, valor_combustivel e valor_total eram calculados em Python
+(formulário, importação de planilhas) e gravados como colunas comuns, de
+modo que cada caminho de gravação repetia as fórmulas e o "Valor Total da
+Viagem" exibido era recalculado a cada consulta. Agora são colunas
+GENERATED ALWAYS AS (...) STORED: o SQLite as calcula a cada inclusão ou
+alteração da linha e elas podem ser lidas, somadas e indexadas como
+qualquer outra coluna. ano e mes (de data_saida) também são colunas
+geradas, indexadas, usadas pelos filtros da aba "Tabela de Viagens".
+
+km_informado guarda a distância das planilhas importadas que trazem o
+total de KM sem a quilometragem de saída e chegada (ou com valores que não
+batem); sem ele, total_km é a diferença entre as quilometragens.
+
+Como o SQLite não acrescenta colunas STORED com ALTER TABLE, a migração
+reconstrói a tabela viagens (cria a nova, copia as linhas e troca os nomes)
+e recria os índices e triggers que a troca descarta. Os litros e valores
+gravados que diferem dos recalculados pelas fórmulas (linhas gravadas fora
+do formulário e da importação) ficam registrados na tabela
+valores_recalculados. Para listá-los:
+
+    python -m src.database.colunas_geradas relatorio [--db viagens.db]
+"""
+import argparse
+
+from loguru import logger
+
+from src.database.instantaneo import recriar_triggers_versao_viagens
+from src.database.resumos import _triggers as _triggers_resumos
+from src.database.resumos import reconstruir_resumos
+
+# Distância pela quilometragem (sem hodômetro, 0)
+KM_QUILOMETRAGEM_SQL = "MAX(0.0, COALESCE(km_chegada, 0) - COALESCE(km_saida, 0))"
+
+# data_saida no formato AAAA-MM-...; outros textos ficam sem ano e mês
+_DATA_VALIDA_SQL = "data_saida GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]*'"
+
+COLUNAS_BASE = ("id", "origem_id", "destino_id", "carro", "km_saida", "km_chegada", "data_saida", "data_volta",
+                "valor", "motorista", "diaria_motorista", "despesa_extra", "diesel_s10", "diesel_s500", "pedagio")
+
+CRIAR_VIAGENS_SQL = f'''
+    CREATE TABLE {{tabela}} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        origem_id INTEGER,
+        destino_id INTEGER,
+        carro TEXT,
+        km_saida REAL,
+        km_chegada REAL,
+        km_informado REAL,
+        data_saida TEXT,
+        data_volta TEXT,
+        valor REAL,
+        motorista TEXT,
+        diaria_motorista REAL,
+        despesa_extra REAL,
+        diesel_s10 REAL,
+        diesel_s500 REAL,
+        pedagio REAL,
+        total_km REAL GENERATED ALWAYS AS (COALESCE(km_informado, {KM_QUILOMETRAGEM_SQL})) STORED,
+        litros REAL GENERATED ALWAYS AS (COALESCE(diesel_s10, 0) + COALESCE(diesel_s500, 0)) STORED,
+        valor_combustivel REAL GENERATED ALWAYS AS (litros * COALESCE(valor, 0)) STORED,
+        valor_total REAL GENERATED ALWAYS AS (
+            valor_combustivel + COALESCE(pedagio, 0) + COALESCE(despesa_extra, 0) + COALESCE(diaria_motorista, 0)
+        ) STORED,
+        ano INTEGER GENERATED ALWAYS AS (
+            CASE WHEN {_DATA_VALIDA_SQL} THEN CAST(substr(data_saida, 1, 4) AS INTEGER) END
+        ) STORED,
+        mes INTEGER GENERATED ALWAYS AS (
+            CASE WHEN {_DATA_VALIDA_SQL} THEN CAST(substr(data_saida, 6, 2) AS INTEGER) END
+        ) STORED,
+        FOREIGN KEY(origem_id) REFERENCES origens(id),
+        FOREIGN KEY(destino_id) REFERENCES destinos(id){{restricoes}}
+    )
+'''
+
+# Colunas de que total_km, litros e os valores gerados são calculados: são as
+# que disparam os triggers dos resumos na alteração de uma viagem
+COLUNAS_ENTRADA = ("km_saida", "km_chegada", "km_informado", "diesel_s10", "diesel_s500", "valor",
+                   "pedagio", "despesa_extra", "diaria_motorista")
+
+# Colunas gravadas que passam a ser calculadas pelas fórmulas -> tolerância da
+# comparação com o valor anterior (total_km vai para km_informado)
+COLUNAS_RECALCULADAS = {"litros": 0.001, "valor_combustivel": 0.005, "valor_total": 0.005}
+
+CRIAR_VALORES_RECALCULADOS_SQL = '''
+    CREATE TABLE IF NOT EXISTS valores_recalculados (
+        viagem_id INTEGER NOT NULL,
+        coluna TEXT NOT NULL,
+        valor_anterior REAL,
+        valor_recalculado REAL,
+        PRIMARY KEY (viagem_id, coluna)
+    ) WITHOUT ROWID
+'''
+
+# Filtros por ano e por mês (qualquer ano) sem varrer a tabela
+INDICES_ANO_MES = [
+    "CREATE INDEX IF NOT EXISTS idx_viagens_ano_mes ON viagens(ano, mes, data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_viagens_mes ON viagens(mes, data_saida)",
+]
+
+
+def reconstruir_viagens(conn, restricoes=""):
+    """
+    Recria viagens com as colunas geradas (e as restrições adicionais da
+    tabela, ex.: ", CHECK (...)"), preservando ids e a sequência do
+    AUTOINCREMENT. Um total_km gravado que não bate com a quilometragem vai
+    para km_informado; os litros e valores que mudam com o recálculo são
+    registrados em valores_recalculados. Não controla a transação (roda
+    dentro da migração). Retorna o número de valores diferentes.
+    """
+    sequencia = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'viagens'").fetchone()
+    colunas = ", ".join(COLUNAS_BASE)
+    conn.execute(CRIAR_VIAGENS_SQL.format(tabela="viagens_nova", restricoes=restricoes))
+    conn.execute(f'''
+        INSERT INTO viagens_nova ({colunas}, km_informado)
+        SELECT {colunas},
+               CASE WHEN abs(total_km - {KM_QUILOMETRAGEM_SQL}) > 0.001 THEN total_km END
+        FROM viagens
+    ''')
+    conn.execute(CRIAR_VALORES_RECALCULADOS_SQL)
+    diferentes = 0
+    for coluna, tolerancia in COLUNAS_RECALCULADAS.items():
+        diferentes += conn.execute(f'''
+            INSERT OR REPLACE INTO valores_recalculados (viagem_id, coluna, valor_anterior, valor_recalculado)
+            SELECT v.id, ?, v.{coluna}, n.{coluna}
+            FROM viagens v
+            JOIN viagens_nova n ON n.id = v.id
+            WHERE abs(COALESCE(v.{coluna}, 0) - n.{coluna}) > ?
+        ''', (coluna, tolerancia)).rowcount
+    if diferentes:
+        logger.warning(f"[MIGRACAO] {diferentes} litros/valores gravados em viagens diferem dos recalculados "
+                       "pelas fórmulas (valores anteriores em valores_recalculados)")
+    conn.execute("DROP TABLE viagens")
+    conn.execute("ALTER TABLE viagens_nova RENAME TO viagens")
+    conn.execute("DELETE FROM sqlite_sequence WHERE name = 'viagens'")
+    conn.execute('''
+        INSERT INTO sqlite_sequence (name, seq)
+        SELECT 'viagens', MAX(COALESCE(?, 0), COALESCE((SELECT MAX(id) FROM viagens), 0))
+    ''', (sequencia[0] if sequencia else None,))
+    return diferentes
+
+
+def recriar_viagens(restricoes=""):
+    """
+    Passos de migração que reconstroem viagens (ver reconstruir_viagens) e
+    recriam o que a troca de tabela descarta; src/database/migrations.py
+    acrescenta INDICES_VIAGENS. Os resumos são recalculados com os valores
+    gerados.
+    """
+    return (
+        [lambda conn: reconstruir_viagens(conn, restricoes)]
+        + INDICES_ANO_MES
+        + _triggers_resumos(COLUNAS_ENTRADA)
+        + [recriar_triggers_versao_viagens, reconstruir_resumos,
+           "UPDATE versao_dados SET versao = versao + 1 WHERE id = 1"]
+    )
+
+
+# Passos da migração das colunas geradas
+COLUNAS_GERADAS = recriar_viagens()
+
+# Bancos migrados com os triggers de alteração dos resumos ainda disparados
+# pelas colunas geradas (que um UPDATE não cita): recria-os pelas entradas e
+# recalcula os resumos que ficaram defasados
+TRIGGERS_RESUMOS_ENTRADAS = (
+    ["DROP TRIGGER IF EXISTS trg_viagens_resumo_update_old",
+     "DROP TRIGGER IF EXISTS trg_viagens_resumo_update_new"]
+    + _triggers_resumos(COLUNAS_ENTRADA)
+    + [reconstruir_resumos]
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Colunas geradas das viagens")
+    parser.add_argument("comando", choices=["relatorio"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+
+    db = DBManager(args.db)
+    conn = db._conexao()
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'valores_recalculados'").fetchone() is None:
+        print("banco migrado antes do registro dos valores recalculados: nada a listar")
+        return
+    linhas = conn.execute('''
+        SELECT viagem_id, coluna, valor_anterior, valor_recalculado FROM valores_recalculados
+        ORDER BY viagem_id, coluna
+    ''').fetchall()
+    for viagem_id, coluna, anterior, recalculado in linhas:
+        print(f"viagem {viagem_id}: {coluna} {anterior!r} -> {recalculado!r}")
+    print(f"{len(linhas)} valores gravados diferentes dos recalculados na migração")
+
+
+if __name__ == "__main__":
+    main()
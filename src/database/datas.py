@@ -0,0 +1,137 @@
+"""
+Datas das viagens: texto ISO (AAAA-MM-DD) validado pelo banco.
+
+data_saida e data_volta continuam TEXT, o formato que o formulário, a
+importação, os resumos diários e a paginação já usam, mas a tabela viagens
+passa a ter restrições CHECK que só aceitam datas ISO existentes (ou NULL).
+Com o formato garantido, a ordem do texto é a ordem das datas: um ano ou um
+mês vira uma faixa "data_saida BETWEEN ? AND ?" (faixa_datas) sobre os
+índices de data_saida, e a leitura para o pandas não precisa de
+errors="coerce".
+
+A migração converte para ISO as datas gravadas em outros formatos
+reconhecidos (os mesmos aceitos na importação de planilhas) e anula as que
+não puderem ser convertidas, registrando o valor original na tabela
+datas_invalidas. Para listar esses registros:
+
+    python -m src.database.datas relatorio [--db viagens.db]
+"""
+import argparse
+import calendar
+import datetime
+
+from loguru import logger
+
+from src.database.colunas_geradas import recriar_viagens
+
+COLUNAS_DATA = ("data_saida", "data_volta")
+FORMATOS_DATA = ("%Y-%m-%d", "%d/%m/%Y", "%d/%m/%y", "%d-%m-%Y", "%Y/%m/%d")
+
+# Data ISO existente ({coluna}): a ida e volta por julianday() leva dias
+# inexistentes a outra data (2024-02-30 -> 2024-03-01) e meses inválidos a
+# NULL; IS em vez de = para que o CHECK não aceite o resultado NULL
+DATA_ISO_SQL = "{coluna} GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]' AND date(julianday({coluna})) IS {coluna}"
+
+RESTRICOES_DATAS = "".join(
+    f",\n        CONSTRAINT {coluna}_iso CHECK ({coluna} IS NULL OR ({DATA_ISO_SQL.format(coluna=coluna)}))"
+    for coluna in COLUNAS_DATA
+)
+
+
+def normalizar_data(valor):
+    """
+    Converte a data (date, datetime ou texto em um de FORMATOS_DATA) para o
+    texto ISO gravado no banco. Vazio vira None; levanta ValueError se a
+    data não for reconhecida.
+    """
+    if valor is None or valor == "":
+        return None
+    if isinstance(valor, datetime.datetime):
+        return valor.date().isoformat()
+    if isinstance(valor, datetime.date):
+        return valor.isoformat()
+    texto = str(valor).strip()[:10]
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.datetime.strptime(texto, formato).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    raise ValueError(f"data inválida: {valor!r}")
+
+
+def faixa_datas(ano, mes=None):
+    """
+    Primeiro e último dia (AAAA-MM-DD) do ano ou do mês, para filtros
+    "data BETWEEN ? AND ?".
+    """
+    ano = int(ano)
+    if mes is None:
+        return f"{ano:04d}-01-01", f"{ano:04d}-12-31"
+    mes = int(mes)
+    return f"{ano:04d}-{mes:02d}-01", f"{ano:04d}-{mes:02d}-{calendar.monthrange(ano, mes)[1]:02d}"
+
+
+def corrigir_datas(conn):
+    """
+    Converte para ISO as datas de viagens fora do formato e anula as
+    irreconhecíveis, registrando-as em datas_invalidas. Retorna
+    {"convertidas": n, "invalidas": n}. Não controla a transação (roda
+    dentro da migração).
+    """
+    relatorio = {"convertidas": 0, "invalidas": 0}
+    for coluna in COLUNAS_DATA:
+        linhas = conn.execute(f'''
+            SELECT id, {coluna} FROM viagens
+            WHERE {coluna} IS NOT NULL AND NOT ({DATA_ISO_SQL.format(coluna=coluna)})
+        ''').fetchall()
+        for viagem_id, valor in linhas:
+            try:
+                data = normalizar_data(str(valor).strip())
+            except ValueError:
+                data = None
+            if data is not None:
+                relatorio["convertidas"] += 1
+            elif str(valor).strip():
+                conn.execute("INSERT OR REPLACE INTO datas_invalidas (viagem_id, coluna, valor) VALUES (?, ?, ?)",
+                             (viagem_id, coluna, str(valor)))
+                relatorio["invalidas"] += 1
+            conn.execute(f"UPDATE viagens SET {coluna} = ? WHERE id = ?", (data, viagem_id))
+    if relatorio["invalidas"]:
+        logger.warning(f"[MIGRACAO] {relatorio['invalidas']} datas de viagens não reconhecidas foram anuladas "
+                       "(valores originais em datas_invalidas)")
+    logger.info(f"[MIGRACAO] Datas das viagens validadas: {relatorio}")
+    return relatorio
+
+
+# Passos da migração (ver src/database/migrations.py, que acrescenta INDICES_VIAGENS)
+DATAS_VALIDADAS = [
+    '''
+    CREATE TABLE IF NOT EXISTS datas_invalidas (
+        viagem_id INTEGER NOT NULL,
+        coluna TEXT NOT NULL,
+        valor TEXT,
+        PRIMARY KEY (viagem_id, coluna)
+    ) WITHOUT ROWID
+    ''',
+    corrigir_datas,
+] + recriar_viagens(RESTRICOES_DATAS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Datas das viagens")
+    parser.add_argument("comando", choices=["relatorio"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+
+    db = DBManager(args.db)
+    linhas = db._conexao().execute(
+        "SELECT viagem_id, coluna, valor FROM datas_invalidas ORDER BY viagem_id, coluna").fetchall()
+    for viagem_id, coluna, valor in linhas:
+        print(f"viagem {viagem_id}: {coluna} = {valor!r}")
+    print(f"{len(linhas)} datas não reconhecidas na migração")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,251 +1,461 @@
-import sqlite3
+import functools
+import json
+import math
+
 import pandas as pd
 
-class DBManager:
-    def __init__(self, db_path="viagens.db"):
-        self.db_path = db_path
-        self._create_tables()
+from src.config.config import Config
+from src.database.cache import congelar, obter_cache
+from src.database.colunar import obter_armazem
+from src.database.datas import faixa_datas
+from src.database.enderecos import (CAMPOS_ENDERECO, UPSERT_ENDERECO_SQL, UPSERT_LOCAL_SQL, expressao_busca,
+                                    mesclar_enderecos, normalizar_endereco, termos_busca)
+from src.database.escritor import obter_escritor
+from src.database.frota import DESCONTINUA_SQL, TABELAS_FROTA, atualizar_frota, reconstruir_frota
+from src.database.instantaneo import (TABELAS_INSTANTANEO, instalar_triggers_versao, obter_instantaneo,
+                                      triggers_versao_instalados, versao_dados)
+from src.database.migrations import aplicar_migracoes
+from src.database.modelos import COLUNAS_VIAGEM, Local, Viagem, compactar_viagens, fabrica_linhas
+from src.database.perfil import medido
+from src.database.pool import obter_pool
+from src.database.replica import REPLICA, obter_replica
+from src.database.resumos import reconstruir_resumos
 
-    def _create_tables(self):
-        """
-        Cria as tabelas necessárias se elas não existirem.
-        """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Tabela de endereços
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS enderecos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cep TEXT,
-                logradouro TEXT,
-                complemento TEXT,
-                bairro TEXT,
-                localidade TEXT,
-                uf TEXT,
-                numero TEXT
-            )
-        ''')
+# Endereço concatenado usado como rótulo de origens e destinos ({e} = alias de enderecos)
+ROTULO_ENDERECO_SQL = (
+    "({e}.cep || ', ' || {e}.logradouro || ', ' || COALESCE({e}.complemento, '') || ', ' || "
+    "{e}.bairro || ', ' || {e}.localidade || ', ' || {e}.uf || ', ' || {e}.numero)"
+)
 
-        # Tabela de origens (referenciando enderecos)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS origens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                endereco_id INTEGER,
-                FOREIGN KEY(endereco_id) REFERENCES enderecos(id)
-            )
-        ''')
+# Colunas da aba "Tabela de Viagens" e das exportações (aliases para exibição)
+COLUNAS_TABELA_SQL = f'''
+    v.id AS "ID",
+    v.carro AS "Carro",
+    v.km_saida AS "Quilometragem de Saída",
+    v.km_chegada AS "Quilometragem de Chegada",
+    v.total_km AS "Total de KM",
+    v.data_saida AS "Data de Saída",
+    v.data_volta AS "Data de Retorno",
+    v.valor AS "Valor da Viagem",
+    v.motorista AS "Motorista",
+    v.diaria_motorista AS "Diária do Motorista",
+    v.despesa_extra AS "Despesas Extras",
+    v.diesel_s10 AS "Diesel S10 (Litros)",
+    v.diesel_s500 AS "Diesel S500 (Litros)",
+    v.litros AS "Total de Combustível (Litros)",
+    v.valor_combustivel AS "Valor do Combustível",
+    v.pedagio AS "Valor do Pedágio",
+    v.valor_total AS "Valor Total da Viagem",
+    {ROTULO_ENDERECO_SQL.format(e="e1")} AS "Endereço de Origem",
+    {ROTULO_ENDERECO_SQL.format(e="e2")} AS "Endereço de Destino"
+'''
 
-        # Tabela de destinos (referenciando enderecos)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS destinos (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                endereco_id INTEGER,
-                FOREIGN KEY(endereco_id) REFERENCES enderecos(id)
-            )
-        ''')
+# Junções de viagens com os endereços de origem (e1) e destino (e2)
+JUNCOES_VIAGENS_SQL = '''
+    FROM viagens v
+    LEFT JOIN origens o ON v.origem_id = o.id
+    LEFT JOIN enderecos e1 ON o.endereco_id = e1.id
+    LEFT JOIN destinos d ON v.destino_id = d.id
+    LEFT JOIN enderecos e2 ON d.endereco_id = e2.id
+'''
 
-        # Tabela de carros
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS carros (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT UNIQUE
-            )
-        ''')
+# Inserção de uma viagem, na ordem dos parâmetros de DBManager.inserir_viagem
+# total_km, litros, valor_combustivel, valor_total, ano e mes são colunas
+# geradas, calculadas pelo SQLite (ver src/database/colunas_geradas.py)
+INSERIR_VIAGEM_SQL = '''
+    INSERT INTO viagens (
+        origem_id, destino_id, carro,
+        km_saida, km_chegada,
+        data_saida, data_volta, valor,
+        motorista, diaria_motorista, despesa_extra,
+        diesel_s10, diesel_s500, pedagio,
+        km_informado
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
 
-        # Tabela de tipos de óleo
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS tipos_oleo (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT UNIQUE
-            )
-        ''')
+# Colunas numéricas de viagens aceitas nos histogramas e densidades dos gráficos
+COLUNAS_NUMERICAS_VIAGENS = ("total_km", "valor_total", "valor_combustivel", "pedagio",
+                             "despesa_extra", "diaria_motorista", "litros", "km_saida", "km_chegada")
 
-        # Tabela de motoristas
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS motoristas (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                nome TEXT UNIQUE
-            )
-        ''')
+# Tabelas lidas pelas consultas que juntam viagens e endereços
+TABELAS_VIAGENS = ("viagens", "origens", "destinos", "enderecos")
+
+# Tabelas das consultas atendidas pela réplica (os resumos diários mudam com
+# viagens): escritas em outras (cache de CEP, frota) não a desatualizam
+TABELAS_REPLICA = TABELAS_VIAGENS
 
-        # Tabela de viagens (usa FK para origens e destinos)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS viagens (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                origem_id INTEGER,
-                destino_id INTEGER,
-                carro TEXT,
-                km_saida REAL,
-                km_chegada REAL,
-                total_km REAL,
-                data_saida TEXT,
-                data_volta TEXT,
-                valor REAL,
-                motorista TEXT,
-                diaria_motorista REAL,
-                despesa_extra REAL,
-                diesel_s10 REAL,
-                diesel_s500 REAL,
-                litros REAL,
-                valor_combustivel REAL,
-                pedagio REAL,
-                valor_total REAL,
-                FOREIGN KEY(origem_id) REFERENCES origens(id),
-                FOREIGN KEY(destino_id) REFERENCES destinos(id)
-            )
-        ''')
 
-        conn.commit()
-        conn.close()
+def passo_bins(minimo, maximo, max_bins):
+    """
+    Largura "redonda" (1, 2 ou 5 x 10^n) dos intervalos de um histograma,
+    a menor que divide [minimo, maximo] em no máximo max_bins intervalos.
+    """
+    bruto = (maximo - minimo) / max_bins
+    if bruto <= 0:
+        return 1.0
+    magnitude = 10 ** math.floor(math.log10(bruto))
+    for fator in (1, 2, 5, 10):
+        if fator * magnitude >= bruto:
+            return fator * magnitude
+    return 10 * magnitude
+
+
+def em_cache(*tabelas):
+    """
+    Guarda o resultado do método no cache compartilhado (ver CacheConsultas),
+    válido enquanto nenhuma das tabelas informadas for alterada.
+    """
+    def decorador(metodo):
+        @functools.wraps(metodo)
+        def envoltorio(self, *args, **kwargs):
+            chave = (metodo.__name__, congelar(args), congelar(kwargs))
+            return self.cache.obter(chave, tabelas, lambda: metodo(self, *args, **kwargs))
+        return envoltorio
+    return decorador
+
+
+class DBManager:
+    def __init__(self, db_path=None):
+        self.db_path = db_path or Config.DB_PATH
+        self.pool = obter_pool(self.db_path)
+        self.cache = obter_cache(self.db_path)
+        self._busca_fts = None
+        self._create_tables()
+        # Todas as gravações passam pela fila do escritor único (ver src/database/escritor.py)
+        self.escritor = obter_escritor(self, max_lote=Config.DB_ESCRITA_LOTE,
+                                       tentativas=Config.DB_ESCRITA_TENTATIVAS)
+        # Armazém colunar das viagens (None = consultas SQL; ver Config.DB_ARMAZEM_COLUNAR)
+        self._armazem = obter_armazem(self) if Config.DB_ARMAZEM_COLUNAR else None
+        # Instantâneo Arrow da tabela completa de viagens (ver Config.DB_INSTANTANEO)
+        self._instantaneo = self._gravador = None
+        if Config.DB_INSTANTANEO:
+            self._instantaneo, self._gravador = obter_instantaneo(
+                self, Config.DB_INSTANTANEO, Config.DB_INSTANTANEO_ATRASO)
+        # Réplica das consultas de relatório (ver Config.DB_REPLICA e _conexao_leitura)
+        self._replica = None
+        if Config.DB_REPLICA:
+            self._replica = obter_replica(
+                self, Config.DB_REPLICA, intervalo=Config.DB_REPLICA_INTERVALO,
+                escritas=Config.DB_REPLICA_ESCRITAS, atraso_maximo=Config.DB_REPLICA_ATRASO_MAXIMO,
+                paginas=Config.DB_REPLICA_PAGINAS, medir=Config.DB_PERFIL)
+        # Os triggers que mantêm versao_dados só existem com o instantâneo ativo
+        if self._instantaneo is not None and not triggers_versao_instalados(self._conexao()):
+            self.escritor.executar(instalar_triggers_versao)
+
+    def registrar_escrita(self, *tabelas):
+        """
+        Chamado pelo escritor após cada escrita: invalida o cache das tabelas
+        alteradas e, se elas forem lidas da réplica ou do instantâneo Arrow,
+        suspende o uso da réplica até a próxima cópia e agenda a regravação
+        do instantâneo. Retorna as versões (antes, depois) das tabelas no cache.
+        """
+        versoes = self.cache.invalidar(*tabelas)
+        if self._replica is not None and set(tabelas) & set(TABELAS_REPLICA):
+            self._replica.registrar_escrita()
+        if self._gravador is not None and set(tabelas) & set(TABELAS_INSTANTANEO):
+            self._gravador.agendar()
+        return versoes
+
+    def _conexao(self):
+        """
+        Retorna a conexão persistente da thread atual (ver ConnectionPool).
+        """
+        return self.pool.obter_conexao()
+
+    def _conexao_leitura(self):
+        """
+        Conexão das consultas de relatório: a réplica, quando ativa e dentro
+        do atraso máximo (ver src/database/replica.py), ou a principal.
+        Os métodos que a usam incluem REPLICA nas tabelas de @em_cache.
+        """
+        if self._replica is not None:
+            conn = self._replica.conexao()
+            if conn is not None:
+                return conn
+        return self._conexao()
+
+    def _create_tables(self):
+        """
+        Cria as tabelas e índices aplicando as migrações pendentes
+        (ver src/database/migrations.py).
+        """
+        aplicar_migracoes(self._conexao())
 
     # Métodos para Endereços, Origens e Destinos
+    @medido
     def inserir_endereco(self, cep, logradouro, complemento, bairro, localidade, uf, numero):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO enderecos (cep, logradouro, complemento, bairro, localidade, uf, numero)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (cep, logradouro, complemento, bairro, localidade, uf, numero))
-        conn.commit()
-        last_id = cursor.lastrowid
-        conn.close()
-        return last_id
+        """
+        Cadastra o endereço ou, se o mesmo CEP + número + complemento já
+        existir, atualiza os dados dele. Retorna o id do endereço.
+        """
+        campos = normalizar_endereco(cep, logradouro, complemento, bairro, localidade, uf, numero)
+        return self.escritor.executar(
+            lambda conn: conn.execute(UPSERT_ENDERECO_SQL, campos).fetchone()[0], "enderecos")
 
+    @medido
     def inserir_origem(self, endereco_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO origens (endereco_id) VALUES (?)', (endereco_id,))
-        conn.commit()
-        origem_id = cursor.lastrowid
-        conn.close()
-        return origem_id
+        """
+        Retorna a origem do endereço, criando-a se ainda não existir.
+        """
+        sql = UPSERT_LOCAL_SQL.format(tabela="origens")
+        return self.escritor.executar(lambda conn: conn.execute(sql, (endereco_id,)).fetchone()[0], "origens")
 
+    @medido
     def inserir_destino(self, endereco_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO destinos (endereco_id) VALUES (?)', (endereco_id,))
-        conn.commit()
-        destino_id = cursor.lastrowid
-        conn.close()
-        return destino_id
+        """
+        Retorna o destino do endereço, criando-o se ainda não existir.
+        """
+        sql = UPSERT_LOCAL_SQL.format(tabela="destinos")
+        return self.escritor.executar(lambda conn: conn.execute(sql, (endereco_id,)).fetchone()[0], "destinos")
 
+    def _registros(self, tipo, sql, params=()):
+        """
+        Executa a consulta e retorna as linhas como instâncias de tipo
+        (ver src/database/modelos.py).
+        """
+        cursor = self._conexao().cursor()
+        cursor.row_factory = fabrica_linhas(tipo)
+        return cursor.execute(sql, params).fetchall()
+
+    @medido
+    @em_cache("origens", "enderecos")
     def obter_origens(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT o.id AS origem_id,
-                   e.id AS endereco_id,
-                   e.cep, e.logradouro, e.complemento,
-                   e.bairro, e.localidade, e.uf, e.numero
+        return self._registros(Local, f'''
+            SELECT o.id, e.id, {", ".join("e." + campo for campo in CAMPOS_ENDERECO)}
             FROM origens o
             JOIN enderecos e ON o.endereco_id = e.id
         ''')
-        rows = cursor.fetchall()
-        conn.close()
-        columns = ["origem_id", "endereco_id", "cep", "logradouro", "complemento",
-                   "bairro", "localidade", "uf", "numero"]
-        return [dict(zip(columns, row)) for row in rows]
 
+    @medido
+    @em_cache("destinos", "enderecos")
     def obter_destinos(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            SELECT d.id AS destino_id,
-                   e.id AS endereco_id,
-                   e.cep, e.logradouro, e.complemento,
-                   e.bairro, e.localidade, e.uf, e.numero
+        return self._registros(Local, f'''
+            SELECT d.id, e.id, {", ".join("e." + campo for campo in CAMPOS_ENDERECO)}
             FROM destinos d
             JOIN enderecos e ON d.endereco_id = e.id
         ''')
-        rows = cursor.fetchall()
-        conn.close()
-        columns = ["destino_id", "endereco_id", "cep", "logradouro", "complemento",
-                   "bairro", "localidade", "uf", "numero"]
-        return [dict(zip(columns, row)) for row in rows]
+
+    def _tem_busca_fts(self, conn):
+        if self._busca_fts is None:
+            self._busca_fts = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'enderecos_busca'").fetchone() is not None
+        return self._busca_fts
+
+    def _buscar_locais(self, tabela, texto, limite, local_id=None):
+        """
+        Origens/destinos cujo endereço contém todos os termos do texto (como
+        prefixo), dos mais relevantes para os menos, até limite linhas. Sem
+        texto, retorna os cadastrados mais recentemente; com local_id, apenas
+        esse registro.
+        """
+        conn = self._conexao()
+        selecao = f"t.id, e.id, {', '.join('e.' + campo for campo in CAMPOS_ENDERECO)}"
+        expressao = expressao_busca(texto)
+        if local_id is not None:
+            sql = f"SELECT {selecao} FROM {tabela} t JOIN enderecos e ON t.endereco_id = e.id WHERE t.id = ?"
+            params = [local_id]
+        elif expressao is None:
+            sql = (f"SELECT {selecao} FROM {tabela} t JOIN enderecos e ON t.endereco_id = e.id "
+                   f"ORDER BY t.id DESC LIMIT ?")
+            params = [limite]
+        elif self._tem_busca_fts(conn):
+            sql = f'''
+                SELECT {selecao}
+                FROM enderecos_busca
+                JOIN enderecos e ON e.id = enderecos_busca.rowid
+                JOIN {tabela} t ON t.endereco_id = e.id
+                WHERE enderecos_busca MATCH ?
+                ORDER BY enderecos_busca.rank
+                LIMIT ?
+            '''
+            params = [expressao, limite]
+        else:
+            termos = termos_busca(texto)
+            rotulo = f"lower({ROTULO_ENDERECO_SQL.format(e='e')})"
+            sql = (f"SELECT {selecao} FROM {tabela} t JOIN enderecos e ON t.endereco_id = e.id "
+                   f"WHERE {' AND '.join([rotulo + ' LIKE ?'] * len(termos))} ORDER BY t.id DESC LIMIT ?")
+            params = [f"%{termo}%" for termo in termos] + [limite]
+        return self._registros(Local, sql, params)
+
+    @medido
+    @em_cache("origens", "enderecos")
+    def buscar_origens(self, texto="", limite=20):
+        """
+        Busca textual de origens (CEP, logradouro, bairro, cidade...),
+        retornando no máximo limite registros Local.
+        """
+        return self._buscar_locais("origens", texto, limite)
+
+    @medido
+    @em_cache("destinos", "enderecos")
+    def buscar_destinos(self, texto="", limite=20):
+        """
+        Busca textual de destinos; ver buscar_origens.
+        """
+        return self._buscar_locais("destinos", texto, limite)
+
+    @medido
+    @em_cache("origens", "enderecos")
+    def obter_origem(self, origem_id):
+        locais = self._buscar_locais("origens", "", 1, local_id=origem_id)
+        return locais[0] if locais else None
+
+    @medido
+    @em_cache("destinos", "enderecos")
+    def obter_destino(self, destino_id):
+        locais = self._buscar_locais("destinos", "", 1, local_id=destino_id)
+        return locais[0] if locais else None
+
+    @medido
+    def mesclar_enderecos(self):
+        """
+        Mescla endereços, origens e destinos duplicados em uma única transação,
+        apontando as viagens para os registros mantidos
+        (ver src/database/enderecos.py). Retorna as quantidades alteradas.
+        """
+        return self.escritor.executar(mesclar_enderecos, *TABELAS_VIAGENS)
 
     # Métodos para Carros, Motoristas e Tipos de Óleo
+    def _inserir_nome(self, tabela, nome):
+        return self.escritor.executar(
+            lambda conn: conn.execute(f'INSERT INTO {tabela} (nome) VALUES (?)', (nome,)).lastrowid, tabela)
+
+    @medido
     def inserir_carro(self, nome):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO carros (nome) VALUES (?)', (nome,))
-        conn.commit()
-        conn.close()
+        return self._inserir_nome("carros", nome)
 
+    @medido
     def inserir_motorista(self, nome):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO motoristas (nome) VALUES (?)', (nome,))
-        conn.commit()
-        conn.close()
+        return self._inserir_nome("motoristas", nome)
 
+    @medido
     def inserir_tipo_oleo(self, nome):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('INSERT INTO tipos_oleo (nome) VALUES (?)', (nome,))
-        conn.commit()
-        conn.close()
+        return self._inserir_nome("tipos_oleo", nome)
 
+    @medido
+    @em_cache("carros")
     def obter_carros(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conexao()
         df = pd.read_sql('SELECT * FROM carros', conn)
-        conn.close()
         return df
 
+    @medido
+    @em_cache("motoristas")
     def obter_motoristas(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conexao()
         df = pd.read_sql('SELECT * FROM motoristas', conn)
-        conn.close()
         return df
 
+    @medido
+    @em_cache("tipos_oleo")
     def obter_tipos_oleo(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conexao()
         df = pd.read_sql('SELECT * FROM tipos_oleo', conn)
-        conn.close()
         return df
 
     # Método para excluir registro
+    @medido
     def excluir_registro(self, tabela, registro_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(f"DELETE FROM {tabela} WHERE id = ?", (registro_id,))
-        conn.commit()
-        conn.close()
+        apos = None
+        if tabela == "viagens" and self._armazem is not None:
+            apos = lambda _, versoes: self._armazem.registrar_exclusao(registro_id, versoes)  # noqa: E731
+        self.escritor.executar(
+            lambda conn: conn.execute(f"DELETE FROM {tabela} WHERE id = ?", (registro_id,)).rowcount,
+            tabela, apos=apos)
 
     # Métodos para Viagens
-    def inserir_viagem(self, origem_id, destino_id, carro, km_saida, km_chegada, total_km,
-                       data_saida, data_volta, valor, motorista, diaria_motorista, despesa_extra,
-                       diesel_s10, diesel_s500, litros, valor_combustivel, pedagio, valor_total):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO viagens (
-                origem_id, destino_id, carro,
-                km_saida, km_chegada, total_km,
-                data_saida, data_volta, valor,
-                motorista, diaria_motorista, despesa_extra,
-                diesel_s10, diesel_s500, litros,
-                valor_combustivel, pedagio, valor_total
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (origem_id, destino_id, carro, km_saida, km_chegada, total_km,
-              data_saida, data_volta, valor, motorista, diaria_motorista,
-              despesa_extra, diesel_s10, diesel_s500, litros, valor_combustivel,
-              pedagio, valor_total))
-        conn.commit()
-        conn.close()
+    def enfileirar_viagem(self, origem_id, destino_id, carro, km_saida, km_chegada, data_saida, data_volta,
+                          valor, motorista, diaria_motorista, despesa_extra, diesel_s10, diesel_s500, pedagio,
+                          km_informado=None):
+        """
+        Envia a viagem à fila do escritor sem esperar a gravação. Retorna um
+        Future com a viagem gravada, {coluna: valor} inclusive o id e as
+        colunas geradas (ver src/database/escritor.py). km_informado é a
+        distância de quem não tem a quilometragem (ver colunas_geradas.py).
+        """
+        valores = (origem_id, destino_id, carro, km_saida, km_chegada, data_saida, data_volta, valor,
+                   motorista, diaria_motorista, despesa_extra, diesel_s10, diesel_s500, pedagio, km_informado)
+
+        def inserir(conn):
+            cursor = conn.execute(INSERIR_VIAGEM_SQL + " RETURNING *", valores)
+            linha = cursor.fetchone()
+            return dict(zip((descricao[0] for descricao in cursor.description), linha))
+
+        apos = None
+        if self._armazem is not None:
+            apos = lambda viagem, versoes: self._armazem.registrar_insercao(viagem, versoes)  # noqa: E731
+        return self.escritor.enviar(inserir, "viagens", apos=apos)
 
+    @medido
+    def inserir_viagem(self, *args, **kwargs):
+        """
+        Grava a viagem (mesmos parâmetros de enfileirar_viagem) e retorna o id.
+        """
+        return self.enfileirar_viagem(*args, **kwargs).result()["id"]
+
+    @medido
+    @em_cache("viagens")
     def obter_viagens(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conexao()
         df = pd.read_sql('SELECT * FROM viagens', conn)
-        conn.close()
         return df
 
+    @medido
+    @em_cache("viagens")
+    def listar_viagens(self):
+        """
+        Retorna todas as viagens como registros Viagem, em ordem de data de saída.
+        """
+        return self._registros(Viagem, f"SELECT {', '.join(COLUNAS_VIAGEM)} FROM viagens ORDER BY data_saida, id")
+
+    def _categoria_locais(self, conn, tabela, ids):
+        """
+        Rótulos dos endereços de origem/destino (ids) como Categorical: cada
+        rótulo é montado uma vez por endereço, não uma vez por viagem.
+        """
+        rotulos = dict(conn.execute(f'''
+            SELECT t.id, {ROTULO_ENDERECO_SQL.format(e="e")}
+            FROM {tabela} t
+            JOIN enderecos e ON t.endereco_id = e.id
+        ''').fetchall())
+        return pd.Categorical(ids.map(rotulos))
+
+    def _rotulos_locais(self, tabela, ids):
+        """
+        {id: rótulo do endereço} das origens/destinos informados.
+        """
+        marcadores = ", ".join("?" * len(ids))
+        return dict(self._conexao().execute(f'''
+            SELECT t.id, {ROTULO_ENDERECO_SQL.format(e="e")}
+            FROM {tabela} t
+            JOIN enderecos e ON t.endereco_id = e.id
+            WHERE t.id IN ({marcadores})
+        ''', list(ids)).fetchall())
+
+    @medido
     def obter_viagens_completo(self):
         """
-        Retorna todas as viagens com os dados de endereço concatenados.
-        Os aliases utilizam nomes com espaços para exibição.
+        Retorna todas as viagens com os endereços de origem e destino.
+        Os aliases utilizam nomes com espaços para exibição. O DataFrame é
+        compacto (ver compactar_viagens): datas em datetime64, carro,
+        motorista e endereços como category e valores em float64.
+        Com DB_INSTANTANEO, é lido do instantâneo Arrow quando ele está na
+        versão atual do banco (senão, a regravação é agendada): as colunas
+        apontam para o arquivo mapeado, somente leitura, e não passam pelo
+        cache, que guardaria uma cópia por processo.
         """
-        conn = sqlite3.connect(self.db_path)
+        if self._instantaneo is not None:
+            df = self._instantaneo.ler(versao_dados(self._conexao()))
+            if df is not None:
+                return df
+            self._gravador.agendar()
+        return self._viagens_completo_sql()
+
+    @em_cache(*TABELAS_VIAGENS, REPLICA)
+    def _viagens_completo_sql(self):
+        return self._consultar_viagens_completo(self._conexao_leitura())
+
+    def _consultar_viagens_completo(self, conn):
         query = '''
             SELECT 
                v.carro AS "Carro",
@@ -264,16 +474,490 @@ class DBManager:
                v.valor_combustivel AS "Valor do Combustível",
                v.pedagio AS "Valor do Pedágio",
                v.valor_total AS "Valor Total da Viagem",
-               (e1.cep || ', ' || e1.logradouro || ', ' || COALESCE(e1.complemento, '') || ', ' || 
-                e1.bairro || ', ' || e1.localidade || ', ' || e1.uf || ', ' || e1.numero) AS "Endereço de Origem",
-               (e2.cep || ', ' || e2.logradouro || ', ' || COALESCE(e2.complemento, '') || ', ' || 
-                e2.bairro || ', ' || e2.localidade || ', ' || e2.uf || ', ' || e2.numero) AS "Endereço de Destino"
+               v.origem_id,
+               v.destino_id
             FROM viagens v
+        '''
+        df = pd.read_sql(query, conn)
+        df["Endereço de Origem"] = self._categoria_locais(conn, "origens", df.pop("origem_id"))
+        df["Endereço de Destino"] = self._categoria_locais(conn, "destinos", df.pop("destino_id"))
+        return compactar_viagens(df)
+
+    # Métodos para a aba "Tabela de Viagens" (filtros e paginação no SQL)
+    @staticmethod
+    def filtro_periodo(ano=None, mes=None):
+        """
+        Condição e parâmetros do período selecionado na interface. Ano, ou
+        ano e mês, viram "v.data_saida BETWEEN ? AND ?" (ver faixa_datas),
+        que usa idx_viagens_data_saida ou o índice (filtro, data_saida) e
+        já entrega as linhas na ordem da paginação; o mês de qualquer ano
+        usa a coluna gerada mes (idx_viagens_mes). Sem período, retorna
+        (None, []).
+        """
+        if ano:
+            return "v.data_saida BETWEEN ? AND ?", list(faixa_datas(ano, mes or None))
+        if mes:
+            return "v.mes = ?", [int(mes)]
+        return None, []
+
+    @classmethod
+    def _filtros_viagens(cls, filtros):
+        """
+        Converte o dicionário de filtros (ano, mes, origem_id, destino_id,
+        motorista) em uma cláusula WHERE parametrizada sobre a tabela viagens.
+        """
+        filtros = filtros or {}
+        condicao, params = cls.filtro_periodo(filtros.get("ano"), filtros.get("mes"))
+        condicoes = [condicao] if condicao else []
+
+        for chave in ("origem_id", "destino_id", "motorista"):
+            valor = filtros.get(chave)
+            if valor is not None:
+                condicoes.append(f"v.{chave} = ?")
+                params.append(valor)
+
+        where = " AND ".join(condicoes) if condicoes else "1 = 1"
+        return where, params
+
+    @medido
+    @em_cache(*TABELAS_VIAGENS, REPLICA)
+    def buscar_viagens(self, filtros=None, ordem="-data_saida", limite=50, cursor=None):
+        """
+        Retorna uma página de viagens filtradas e os subtotais do filtro inteiro,
+        em uma única consulta.
+
+        - filtros: dicionário com ano, mes, origem_id, destino_id e motorista
+          (chaves ausentes ou None não filtram).
+        - ordem: "data_saida" (mais antigas primeiro) ou "-data_saida".
+        - limite: tamanho da página; None retorna todas as viagens filtradas.
+        - cursor: tupla (data_saida, id) da última viagem da página anterior
+          (paginação por chave, sem OFFSET; data_saida None para viagens
+          sem data, que vêm por último em "-data_saida" e primeiro em
+          "data_saida").
+
+        Retorna um dicionário com "viagens" (DataFrame da página),
+        "subtotais", "total_viagens" e "proximo_cursor" (None na última página).
+        Com o armazém colunar ativo, o resultado é calculado sobre os arrays.
+        """
+        if ordem not in ("data_saida", "-data_saida"):
+            raise ValueError(f"Ordenação inválida: {ordem}")
+        if self._armazem is not None:
+            return self._armazem.buscar_viagens(filtros, ordem, limite, cursor, rotulos=self._rotulos_locais)
+        direcao = "DESC" if ordem.startswith("-") else "ASC"
+
+        where, params = self._filtros_viagens(filtros)
+        limite_sql = -1 if limite is None else int(limite) + 1
+        # Cada trecho da página percorre o índice de data_saida em ordem
+        trechos, params_pagina = [], []
+        for condicao, params_condicao in self._trechos_cursor(ordem, cursor):
+            trechos.append(f'''
+                SELECT * FROM (
+                    SELECT
+                       {COLUNAS_TABELA_SQL}
+                    {JUNCOES_VIAGENS_SQL}
+                    WHERE {where} AND {condicao}
+                    ORDER BY v.data_saida {direcao}, v.id {direcao}
+                    LIMIT ?
+                )
+            ''')
+            params_pagina += params + params_condicao + [limite_sql]
+
+        query = f'''
+            SELECT t.*, p.*
+            FROM (
+                SELECT COUNT(*) AS total_viagens,
+                       COALESCE(SUM(v.total_km), 0) AS total_km,
+                       COALESCE(SUM(v.valor_total), 0) AS valor_total,
+                       COALESCE(SUM(v.valor_combustivel), 0) AS valor_combustivel,
+                       COALESCE(SUM(v.pedagio), 0) AS pedagio,
+                       COALESCE(SUM(v.despesa_extra), 0) AS despesa_extra,
+                       COALESCE(SUM(v.diaria_motorista), 0) AS diaria_motorista
+                FROM viagens v
+                WHERE {where}
+            ) t
+            LEFT JOIN (
+                {" UNION ALL ".join(trechos)}
+            ) p ON 1 = 1
+            ORDER BY p."Data de Saída" {direcao}, p."ID" {direcao}
+        '''
+        conn = self._conexao_leitura()
+        df = pd.read_sql(query, conn, params=params + params_pagina)
+
+        colunas_totais = ["total_viagens", "total_km", "valor_total", "valor_combustivel",
+                          "pedagio", "despesa_extra", "diaria_motorista"]
+        subtotais = df.iloc[0][colunas_totais].to_dict()
+        total_viagens = int(subtotais.pop("total_viagens"))
+
+        pagina = df.drop(columns=colunas_totais).dropna(subset=["ID"])
+        pagina["ID"] = pagina["ID"].astype("int64")
+
+        proximo_cursor = None
+        if limite is not None and len(pagina) > limite:
+            pagina = pagina.iloc[:limite]
+            ultima = pagina.iloc[-1]
+            data = ultima["Data de Saída"]
+            proximo_cursor = (None if pd.isna(data) else data, int(ultima["ID"]))
+
+        return {
+            "viagens": pagina.reset_index(drop=True),
+            "subtotais": subtotais,
+            "total_viagens": total_viagens,
+            "proximo_cursor": proximo_cursor,
+        }
+
+    @staticmethod
+    def _trechos_cursor(ordem, cursor):
+        """
+        Condições [(sql, parâmetros)] das viagens após o cursor (data_saida,
+        id), na ordem da página. O SQLite ordena as datas nulas antes de
+        todas as outras (por último em "-data_saida"), mas a comparação
+        (v.data_saida, v.id) < (?, ?) é NULL quando uma das datas é nula:
+        as viagens sem data formam um trecho à parte, em vez de um OR que
+        faria a consulta varrer o índice desde o início.
+        """
+        if cursor is None:
+            return [("1 = 1", [])]
+        data, viagem_id = cursor
+        if ordem.startswith("-"):
+            if data is None:
+                return [("v.data_saida IS NULL AND v.id < ?", [viagem_id])]
+            return [("(v.data_saida, v.id) < (?, ?)", [data, viagem_id]), ("v.data_saida IS NULL", [])]
+        if data is None:
+            return [("v.data_saida IS NULL AND v.id > ?", [viagem_id]), ("v.data_saida IS NOT NULL", [])]
+        return [("(v.data_saida, v.id) > (?, ?)", [data, viagem_id])]
+
+    @medido
+    def iterar_viagens(self, filtros=None, ordem="-data_saida", tamanho_lote=5000):
+        """
+        Percorre todas as viagens filtradas (mesmas colunas de buscar_viagens)
+        em lotes de tamanho_lote linhas lidas com fetchmany, sem montar um
+        DataFrame. Retorna (nomes das colunas, gerador de listas de tuplas).
+        Não usa o cache: destina-se às exportações.
+        """
+        if ordem not in ("data_saida", "-data_saida"):
+            raise ValueError(f"Ordenação inválida: {ordem}")
+        direcao = "DESC" if ordem.startswith("-") else "ASC"
+        where, params = self._filtros_viagens(filtros)
+
+        cursor = self._conexao_leitura().execute(f'''
+            SELECT {COLUNAS_TABELA_SQL}
+            {JUNCOES_VIAGENS_SQL}
+            WHERE {where}
+            ORDER BY v.data_saida {direcao}, v.id {direcao}
+        ''', params)
+        colunas = [descricao[0] for descricao in cursor.description]
+
+        def lotes():
+            try:
+                while True:
+                    lote = cursor.fetchmany(tamanho_lote)
+                    if not lote:
+                        break
+                    yield lote
+            finally:
+                cursor.close()
+
+        return colunas, lotes()
+
+    @staticmethod
+    def _valores_distintos(conn, coluna):
+        """
+        Lista os valores distintos (não nulos) de uma coluna indexada de viagens
+        com um "skip scan": cada passo busca no índice o menor valor maior que o
+        anterior, então o custo cresce com o número de valores distintos e não
+        com o número de viagens.
+        """
+        rows = conn.execute(f'''
+            WITH RECURSIVE valores(valor) AS (
+                SELECT MIN({coluna}) FROM viagens
+                UNION ALL
+                SELECT (SELECT MIN({coluna}) FROM viagens WHERE {coluna} > valores.valor)
+                FROM valores WHERE valores.valor IS NOT NULL
+            )
+            SELECT valor FROM valores WHERE valor IS NOT NULL
+        ''').fetchall()
+        return [row[0] for row in rows]
+
+    @medido
+    @em_cache(*TABELAS_VIAGENS, REPLICA)
+    def obter_opcoes_filtro(self):
+        """
+        Retorna as opções dos filtros (anos, meses, origens, destinos,
+        motoristas e carros presentes nas viagens), obtidas pelos índices
+        de viagens em vez de carregar a tabela inteira.
+        Origens e destinos são listas de tuplas (id, rótulo do endereço).
+        """
+        conn = self._conexao_leitura()
+
+        opcoes = {"anos": self._valores_distintos(conn, "ano"), "meses": self._valores_distintos(conn, "mes"),
+                  "motoristas": self._valores_distintos(conn, "motorista"),
+                  "carros": self._valores_distintos(conn, "carro")}
+        for chave, tabela, coluna in (("origens", "origens", "origem_id"),
+                                      ("destinos", "destinos", "destino_id")):
+            ids = self._valores_distintos(conn, coluna)
+            rotulos = {}
+            for inicio in range(0, len(ids), 500):
+                lote = ids[inicio:inicio + 500]
+                marcadores = ", ".join("?" * len(lote))
+                rotulos.update(conn.execute(f'''
+                    SELECT t.id, {ROTULO_ENDERECO_SQL.format(e="e")}
+                    FROM {tabela} t
+                    JOIN enderecos e ON t.endereco_id = e.id
+                    WHERE t.id IN ({marcadores})
+                ''', lote).fetchall())
+            opcoes[chave] = sorted(((i, rotulos[i]) for i in ids if rotulos.get(i)), key=lambda o: o[1])
+        return opcoes
+
+    # Métodos para a aba "Gráfico de Viagens" (resumos diários mantidos por triggers)
+    @medido
+    @em_cache("viagens", REPLICA)
+    def obter_resumo_diario(self, carro=None, motorista=None):
+        """
+        Retorna uma linha por data de saída (datetime64) com o número de
+        viagens e as somas de KM, combustível e custos, lida das tabelas de
+        resumo em vez de agregar todas as viagens. Com carro e/ou motorista,
+        soma apenas as linhas correspondentes de resumo_diario_carro_motorista.
+        """
+        colunas = ", ".join(f'SUM({coluna}) AS "{rotulo}"' for coluna, rotulo in (
+            ("viagens", "Número de Viagens"),
+            ("total_km", "Total de KM"),
+            ("valor_total", "Valor Total da Viagem"),
+            ("valor_combustivel", "Valor do Combustível"),
+            ("pedagio", "Valor do Pedágio"),
+            ("despesa_extra", "Despesas Extras"),
+            ("diaria_motorista", "Diária do Motorista"),
+            ("litros", "Total de Combustível (Litros)"),
+        ))
+        condicoes, params = [], []
+        for chave, valor in (("carro", carro), ("motorista", motorista)):
+            if valor is not None:
+                condicoes.append(f"{chave} = ?")
+                params.append(valor)
+        tabela = "resumo_diario_carro_motorista" if condicoes else "resumo_diario"
+        where = " AND ".join(condicoes) if condicoes else "1 = 1"
+        conn = self._conexao_leitura()
+        resumo = pd.read_sql(f'''
+            SELECT data AS "Data de Saída", {colunas}
+            FROM {tabela}
+            WHERE {where}
+            GROUP BY data
+            ORDER BY data
+        ''', conn, params=params)
+        # Convertida uma vez aqui (o resultado fica no cache), não a cada rerun
+        resumo["Data de Saída"] = pd.to_datetime(resumo["Data de Saída"], format="%Y-%m-%d")
+        return resumo
+
+    @medido
+    def reconstruir_resumos(self):
+        """
+        Recalcula as tabelas de resumo diário a partir de todas as viagens.
+        """
+        self.escritor.executar(reconstruir_resumos, "viagens")
+
+    # Métodos para a aba "Gestão da Frota" (indicadores mantidos em src/database/frota.py)
+    @medido
+    def atualizar_frota(self):
+        """
+        Recalcula, pelo escritor, os indicadores das viagens incluídas,
+        alteradas ou excluídas desde a última atualização (por qualquer
+        processo). Sem carros pendentes, não grava nada. Retorna o número de
+        viagens recalculadas.
+        """
+        if self._conexao().execute("SELECT 1 FROM frota_pendentes LIMIT 1").fetchone() is None:
+            return 0
+        return self.escritor.executar(atualizar_frota, *TABELAS_FROTA)
+
+    @medido
+    def reconstruir_frota(self):
+        """
+        Recalcula os indicadores da frota a partir de todas as viagens.
+        """
+        return self.escritor.executar(reconstruir_frota, *TABELAS_FROTA)
+
+    @medido
+    @em_cache("viagens", *TABELAS_FROTA)
+    def obter_frota(self, limite_descontinuidades=100):
+        """
+        Retorna os indicadores da frota gravados (somente leitura; chame
+        atualizar_frota antes para incluir as viagens pendentes):
+        - "carros": viagens, KM, litros, KM/L, custo por KM e
+          descontinuidades do hodômetro de cada carro;
+        - "motoristas": viagens, KM, dias em viagem, KM por dia, custo por KM
+          e participação no KM da frota (ordenados pela posição);
+        - "descontinuidades": as viagens mais recentes cuja quilometragem de
+          saída difere da chegada anterior do mesmo carro.
+        """
+        conn = self._conexao()
+        carros = pd.read_sql('''
+            SELECT carro AS "Carro",
+                   viagens AS "Viagens",
+                   total_km AS "Total de KM",
+                   litros AS "Litros",
+                   total_km / NULLIF(litros, 0) AS "KM/L",
+                   valor_total / NULLIF(total_km, 0) AS "Custo por KM",
+                   CAST(descontinuidades AS INTEGER) AS "Descontinuidades",
+                   km_descontinuidade AS "KM em Descontinuidades"
+            FROM frota_carros
+            ORDER BY carro
+        ''', conn)
+        motoristas = pd.read_sql('''
+            SELECT RANK() OVER (ORDER BY total_km DESC) AS "Posição",
+                   motorista AS "Motorista",
+                   viagens AS "Viagens",
+                   total_km AS "Total de KM",
+                   total_km / viagens AS "KM por Viagem",
+                   dias AS "Dias em Viagem",
+                   total_km / NULLIF(dias, 0) AS "KM por Dia",
+                   valor_total / NULLIF(total_km, 0) AS "Custo por KM",
+                   100.0 * total_km / NULLIF(SUM(total_km) OVER (), 0) AS "% do KM da Frota",
+                   CAST(descontinuidades AS INTEGER) AS "Descontinuidades"
+            FROM frota_motoristas
+            ORDER BY "Posição", motorista
+        ''', conn)
+        descontinuidades = pd.read_sql(f'''
+            SELECT viagem_id AS "ID",
+                   data_saida AS "Data de Saída",
+                   carro AS "Carro",
+                   motorista AS "Motorista",
+                   km_anterior AS "KM de Chegada Anterior",
+                   km_saida AS "KM de Saída",
+                   descontinuidade AS "Diferença (KM)"
+            FROM frota_viagens
+            WHERE {DESCONTINUA_SQL}
+            ORDER BY data_saida DESC, viagem_id DESC
+            LIMIT ?
+        ''', conn, params=(int(limite_descontinuidades),))
+        descontinuidades["Data de Saída"] = pd.to_datetime(descontinuidades["Data de Saída"], format="%Y-%m-%d")
+        return {"carros": carros, "motoristas": motoristas, "descontinuidades": descontinuidades}
+
+    @staticmethod
+    def _validar_coluna_numerica(coluna):
+        if coluna not in COLUNAS_NUMERICAS_VIAGENS:
+            raise ValueError(f"Coluna numérica inválida: {coluna}")
+
+    @staticmethod
+    def _faixa_bins(conn, coluna, max_bins):
+        """
+        Retorna (início, largura, quantidade de intervalos) para a coluna,
+        ou None se ela não tiver valores.
+        """
+        minimo, maximo = conn.execute(
+            f"SELECT MIN({coluna}), MAX({coluna}) FROM viagens"
+        ).fetchone()
+        if minimo is None:
+            return None
+        largura = passo_bins(minimo, maximo, max_bins)
+        inicio = math.floor(minimo / largura) * largura
+        return inicio, largura, max(1, math.ceil((maximo - inicio) / largura))
+
+    @medido
+    @em_cache("viagens", REPLICA)
+    def histograma_viagens(self, coluna="total_km", max_bins=20):
+        """
+        Histograma de uma coluna numérica de viagens calculado no SQL, com
+        intervalos de largura "redonda". Retorna um DataFrame com "Início",
+        "Fim" e "Número de Viagens" (no máximo max_bins linhas).
+        """
+        self._validar_coluna_numerica(coluna)
+        if self._armazem is not None:
+            return self._armazem.histograma(coluna, max_bins, passo_bins)
+        conn = self._conexao_leitura()
+        faixa = self._faixa_bins(conn, coluna, max_bins)
+        if faixa is None:
+            return pd.DataFrame(columns=["Início", "Fim", "Número de Viagens"])
+        inicio, largura, quantidade = faixa
+        df = pd.read_sql(f'''
+            SELECT MIN(CAST(({coluna} - ?) / ? AS INTEGER), ?) AS bin, COUNT(*) AS "Número de Viagens"
+            FROM viagens
+            WHERE {coluna} IS NOT NULL
+            GROUP BY bin
+            ORDER BY bin
+        ''', conn, params=[inicio, largura, quantidade - 1])
+        df.insert(0, "Início", inicio + df.pop("bin") * largura)
+        df.insert(1, "Fim", df["Início"] + largura)
+        return df
+
+    @medido
+    @em_cache("viagens", REPLICA)
+    def densidade_viagens(self, coluna_x="total_km", coluna_y="valor_total", max_bins=40):
+        """
+        Contagem de viagens em uma grade 2D (coluna_x x coluna_y) calculada no
+        SQL. Retorna um DataFrame com "x_inicio", "x_fim", "y_inicio", "y_fim"
+        e "Número de Viagens", apenas para as células não vazias.
+        """
+        self._validar_coluna_numerica(coluna_x)
+        self._validar_coluna_numerica(coluna_y)
+        if self._armazem is not None:
+            return self._armazem.densidade(coluna_x, coluna_y, max_bins, passo_bins)
+        conn = self._conexao_leitura()
+        faixa_x, faixa_y = self._faixa_bins(conn, coluna_x, max_bins), self._faixa_bins(conn, coluna_y, max_bins)
+        colunas = ["x_inicio", "x_fim", "y_inicio", "y_fim", "Número de Viagens"]
+        if faixa_x is None or faixa_y is None:
+            return pd.DataFrame(columns=colunas)
+        (x0, dx, nx), (y0, dy, ny) = faixa_x, faixa_y
+        df = pd.read_sql(f'''
+            SELECT MIN(CAST(({coluna_x} - ?) / ? AS INTEGER), ?) AS bx,
+                   MIN(CAST(({coluna_y} - ?) / ? AS INTEGER), ?) AS by,
+                   COUNT(*) AS "Número de Viagens"
+            FROM viagens
+            WHERE {coluna_x} IS NOT NULL AND {coluna_y} IS NOT NULL
+            GROUP BY bx, by
+        ''', conn, params=[x0, dx, nx - 1, y0, dy, ny - 1])
+        df["x_inicio"] = x0 + df["bx"] * dx
+        df["x_fim"] = df["x_inicio"] + dx
+        df["y_inicio"] = y0 + df["by"] * dy
+        df["y_fim"] = df["y_inicio"] + dy
+        return df[colunas]
+
+    @medido
+    @em_cache(*TABELAS_VIAGENS, REPLICA)
+    def amostra_viagens(self, limite=2000):
+        """
+        Amostra estratificada por origem de cerca de limite viagens, para os
+        gráficos de dispersão. Cada origem recebe uma cota proporcional ao seu
+        número de viagens (ao menos uma); dentro da origem as viagens são
+        escolhidas por um hash fixo do id, então a amostra não muda entre
+        execuções. Retorna um dicionário com "viagens" (DataFrame da amostra)
+        e "total_viagens".
+        """
+        conn = self._conexao_leitura()
+        contagens = conn.execute(
+            "SELECT COALESCE(origem_id, -1), COUNT(*) FROM viagens GROUP BY origem_id"
+        ).fetchall()
+        total = sum(n for _, n in contagens)
+        cotas = {origem: max(1, round(limite * n / total)) if total > limite else n
+                 for origem, n in contagens}
+        # Pré-filtro pelo hash com folga (2x a cota), para que a ordenação
+        # por estrato percorra só alguns milhares de linhas. Cada origem é
+        # lida por idx_viagens_origem (origem sem id = chave -1)
+        parametros = {str(origem): [cotas[origem], min(1.0, (2 * cotas[origem] + 10) / n) * 4294967296]
+                      for origem, n in contagens}
+        df = pd.read_sql(f'''
+            WITH cotas(origem, cota, limiar) AS MATERIALIZED (
+                SELECT NULLIF(CAST(key AS INTEGER), -1), json_extract(value, '$[0]'), json_extract(value, '$[1]')
+                FROM json_each(?)
+            ),
+            candidatas AS (
+                SELECT v.*, ct.cota,
+                       ROW_NUMBER() OVER (
+                           PARTITION BY ct.origem ORDER BY (v.id * 2654435761) % 4294967296
+                       ) AS ordem
+                FROM cotas ct
+                JOIN viagens v ON v.origem_id IS ct.origem
+                WHERE (v.id * 2654435761) % 4294967296 < ct.limiar
+            )
+            SELECT v.id AS "ID",
+                   v.total_km AS "Total de KM",
+                   v.valor_total AS "Valor Total da Viagem",
+                   v.valor_combustivel AS "Valor do Combustível",
+                   {ROTULO_ENDERECO_SQL.format(e="e1")} AS "Endereço de Origem",
+                   {ROTULO_ENDERECO_SQL.format(e="e2")} AS "Endereço de Destino"
+            FROM candidatas v
             LEFT JOIN origens o ON v.origem_id = o.id
             LEFT JOIN enderecos e1 ON o.endereco_id = e1.id
             LEFT JOIN destinos d ON v.destino_id = d.id
             LEFT JOIN enderecos e2 ON d.endereco_id = e2.id
-        '''
-        df = pd.read_sql(query, conn)
-        conn.close()
-        return df
+            WHERE v.ordem <= v.cota
+            ORDER BY v.id
+        ''', conn, params=[json.dumps(parametros)])
+        return {"viagens": df, "total_viagens": total}
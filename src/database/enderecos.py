@@ -0,0 +1,242 @@
+"""
+Endereços sem duplicatas.
+
+Um endereço é identificado por (cep, numero, complemento), já normalizados:
+CEP sem pontuação nem espaços e número/complemento sem espaços nas pontas
+(complemento ausente vira ''). Endereços sem CEP (importados de planilhas
+que só trazem a cidade) não entram na chave única e são comparados pelos
+demais campos. Cada endereço tem no máximo uma origem e um destino.
+
+Bancos existentes são mesclados pela migração que cria as chaves únicas;
+a mesma rotina pode ser executada (ou simulada) pela linha de comando:
+
+    python -m src.database.enderecos mesclar [--db viagens.db] [--simular]
+
+A busca de origens e destinos do formulário de viagens usa um índice FTS5
+(enderecos_busca, com conteúdo externo em enderecos) mantido por triggers.
+Se o SQLite não tiver FTS5, a migração apenas registra um aviso e a busca
+passa a usar LIKE.
+"""
+import argparse
+import re
+import sqlite3
+
+from loguru import logger
+
+from src.utils.utils import normalizar_texto
+
+# Chave de comparação de um endereço em SQL (mesma regra de normalizar_endereco)
+CHAVE_ENDERECO_SQL = (
+    "CASE WHEN cep <> '' THEN cep ELSE '~' || COALESCE(logradouro, '') || '|' || COALESCE(bairro, '') "
+    "|| '|' || COALESCE(localidade, '') || '|' || COALESCE(uf, '') END, numero, complemento"
+)
+
+# Inclusão com UPSERT: um endereço já cadastrado tem os dados atualizados e
+# o id existente é retornado
+UPSERT_ENDERECO_SQL = '''
+    INSERT INTO enderecos (cep, logradouro, complemento, bairro, localidade, uf, numero)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (cep, numero, complemento) WHERE cep <> '' DO UPDATE SET
+        logradouro = excluded.logradouro,
+        bairro = excluded.bairro,
+        localidade = excluded.localidade,
+        uf = excluded.uf
+    RETURNING id
+'''
+
+# {tabela} = origens ou destinos
+UPSERT_LOCAL_SQL = '''
+    INSERT INTO {tabela} (endereco_id) VALUES (?)
+    ON CONFLICT (endereco_id) DO UPDATE SET endereco_id = excluded.endereco_id
+    RETURNING id
+'''
+
+
+def _limpar(valor):
+    return str(valor if valor is not None else "").strip()
+
+
+def normalizar_endereco(cep, logradouro, complemento, bairro, localidade, uf, numero):
+    """
+    Retorna os campos (na mesma ordem) no formato gravado em enderecos.
+    """
+    cep = _limpar(cep).replace("-", "").replace(".", "").replace(" ", "")
+    return (cep, _limpar(logradouro), _limpar(complemento), _limpar(bairro),
+            _limpar(localidade), _limpar(uf), _limpar(numero))
+
+
+def mesclar_enderecos(conn):
+    """
+    Normaliza os endereços, mantém o de menor id de cada grupo de duplicatas
+    e aponta origens, destinos e viagens para os registros mantidos.
+    Não controla a transação: quem chama faz o commit (ou rollback, para
+    simular). Retorna um dicionário com as quantidades alteradas.
+    """
+    conn.execute('''
+        UPDATE enderecos SET
+            cep = replace(replace(replace(trim(COALESCE(cep, '')), '-', ''), '.', ''), ' ', ''),
+            logradouro = trim(COALESCE(logradouro, '')),
+            complemento = trim(COALESCE(complemento, '')),
+            bairro = trim(COALESCE(bairro, '')),
+            localidade = trim(COALESCE(localidade, '')),
+            uf = trim(COALESCE(uf, '')),
+            numero = trim(COALESCE(numero, ''))
+    ''')
+    conn.execute("DROP TABLE IF EXISTS temp.mapa_enderecos")
+    conn.execute(f'''
+        CREATE TEMP TABLE mapa_enderecos AS
+        SELECT id AS antigo, MIN(id) OVER (PARTITION BY {CHAVE_ENDERECO_SQL}) AS novo
+        FROM enderecos
+    ''')
+    conn.execute("DELETE FROM temp.mapa_enderecos WHERE antigo = novo")
+    conn.execute("CREATE INDEX temp.idx_mapa_enderecos ON mapa_enderecos(antigo)")
+    relatorio = {"enderecos_removidos": conn.execute("SELECT COUNT(*) FROM temp.mapa_enderecos").fetchone()[0]}
+
+    for tabela, coluna, chave_viagens, chave_removidos in (
+        ("origens", "origem_id", "viagens_origem_atualizadas", "origens_removidas"),
+        ("destinos", "destino_id", "viagens_destino_atualizadas", "destinos_removidos"),
+    ):
+        # Para cada origem/destino: o endereço que ficará e o registro mantido
+        # (menor id entre os que passarão a apontar para o mesmo endereço)
+        conn.execute(f"DROP TABLE IF EXISTS temp.mapa_{tabela}")
+        conn.execute(f'''
+            CREATE TEMP TABLE mapa_{tabela} AS
+            SELECT antigo, MIN(antigo) OVER (PARTITION BY endereco) AS novo, endereco
+            FROM (
+                SELECT t.id AS antigo, COALESCE(m.novo, t.endereco_id) AS endereco
+                FROM {tabela} t
+                LEFT JOIN temp.mapa_enderecos m ON m.antigo = t.endereco_id
+            )
+        ''')
+        conn.execute(f"CREATE INDEX temp.idx_mapa_{tabela} ON mapa_{tabela}(antigo)")
+        relatorio[chave_viagens] = conn.execute(f'''
+            UPDATE viagens SET {coluna} = (
+                SELECT novo FROM temp.mapa_{tabela} WHERE antigo = viagens.{coluna}
+            )
+            WHERE {coluna} IN (SELECT antigo FROM temp.mapa_{tabela} WHERE antigo <> novo)
+        ''').rowcount
+        relatorio[chave_removidos] = conn.execute(
+            f"DELETE FROM {tabela} WHERE id IN (SELECT antigo FROM temp.mapa_{tabela} WHERE antigo <> novo)"
+        ).rowcount
+        conn.execute(f'''
+            UPDATE {tabela} SET endereco_id = (
+                SELECT endereco FROM temp.mapa_{tabela} WHERE antigo = {tabela}.id
+            )
+            WHERE endereco_id IN (SELECT antigo FROM temp.mapa_enderecos)
+        ''')
+        conn.execute(f"DROP TABLE temp.mapa_{tabela}")
+
+    conn.execute("DELETE FROM enderecos WHERE id IN (SELECT antigo FROM temp.mapa_enderecos)")
+    conn.execute("DROP TABLE temp.mapa_enderecos")
+    return relatorio
+
+
+def _mesclar_na_migracao(conn):
+    relatorio = mesclar_enderecos(conn)
+    logger.info(f"[MIGRACAO] Endereços mesclados: {relatorio}")
+
+
+# Passos da migração que cria as chaves únicas (ver src/database/migrations.py)
+ENDERECOS_UNICOS = [
+    _mesclar_na_migracao,
+    '''
+    CREATE UNIQUE INDEX IF NOT EXISTS idx_enderecos_chave
+    ON enderecos(cep, numero, complemento) WHERE cep <> ''
+    ''',
+    "DROP INDEX IF EXISTS idx_origens_endereco",
+    "DROP INDEX IF EXISTS idx_destinos_endereco",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_origens_endereco ON origens(endereco_id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_destinos_endereco ON destinos(endereco_id)",
+]
+
+
+# Campos de enderecos, na ordem de normalizar_endereco (e das colunas do índice de busca)
+CAMPOS_ENDERECO = ("cep", "logradouro", "complemento", "bairro", "localidade", "uf", "numero")
+
+_TOKENS = re.compile(r"\w+")
+# "01310-100" e "01.310-100" viram um único termo, como o CEP gravado
+_PONTUACAO_CEP = re.compile(r"(?<=\d)[-.](?=\d)")
+
+
+def termos_busca(texto):
+    """
+    Termos (sem acentos, minúsculos) do texto digitado na busca de endereços.
+    """
+    return _TOKENS.findall(_PONTUACAO_CEP.sub("", normalizar_texto(texto)))
+
+
+def expressao_busca(texto):
+    """
+    Expressão MATCH do FTS5 em que todos os termos devem aparecer, cada um
+    como prefixo ("av paul" encontra "Avenida Paulista"). Retorna None se
+    o texto não tiver termos.
+    """
+    termos = termos_busca(texto)
+    return " ".join(f'"{termo}"*' for termo in termos) or None
+
+
+def _linha(prefixo):
+    return ", ".join(f"{prefixo}.{campo}" for campo in CAMPOS_ENDERECO)
+
+
+def _criar_busca(conn):
+    try:
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS enderecos_busca USING fts5(
+                {", ".join(CAMPOS_ENDERECO)},
+                content='enderecos', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        logger.warning(f"[MIGRACAO] Busca de endereços sem FTS5 ({e}); usando LIKE")
+        return
+    campos = ", ".join(CAMPOS_ENDERECO)
+    inserir = f"INSERT INTO enderecos_busca (rowid, {campos}) VALUES (NEW.id, {_linha('NEW')});"
+    remover = (f"INSERT INTO enderecos_busca (enderecos_busca, rowid, {campos}) "
+               f"VALUES ('delete', OLD.id, {_linha('OLD')});")
+    for nome, evento, corpo in (
+        ("insert", "AFTER INSERT", inserir),
+        ("delete", "AFTER DELETE", remover),
+        ("update", "AFTER UPDATE", remover + "\n            " + inserir),
+    ):
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_enderecos_busca_{nome} {evento} ON enderecos
+            BEGIN
+            {corpo}
+            END
+        ''')
+    conn.execute("INSERT INTO enderecos_busca (enderecos_busca) VALUES ('rebuild')")
+
+
+# Passos da migração que cria o índice de busca (ver src/database/migrations.py)
+BUSCA_ENDERECOS = [_criar_busca]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mescla endereços, origens e destinos duplicados")
+    parser.add_argument("comando", choices=["mesclar"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    parser.add_argument("--simular", action="store_true", help="apenas mostra o que seria alterado")
+    args = parser.parse_args()
+
+    from src.config.config import Config
+    from src.database.db_manager import DBManager
+
+    if args.simular:
+        # Conexão direta, sem aplicar as migrações (que já mesclariam o banco)
+        conn = sqlite3.connect(args.db or Config.DB_PATH)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            relatorio = mesclar_enderecos(conn)
+        finally:
+            conn.rollback()
+            conn.close()
+    else:
+        relatorio = DBManager(args.db).mesclar_enderecos()
+    for chave, valor in relatorio.items():
+        print(f"{chave}: {valor}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Escritor único do banco.
+
+As gravações do DBManager (cadastros, viagens, exclusões, mescla de
+endereços e reconstrução dos resumos) não são executadas pela thread da
+sessão do Streamlit: viram pedidos em uma fila, atendidos por uma única
+thread que é dona da conexão de escrita. Sessões que salvam ao mesmo tempo
+não disputam o lock do SQLite entre si.
+
+- enviar(funcao, *tabelas) enfileira funcao(conn) e retorna um Future com
+  o valor retornado por ela (por exemplo, o id inserido);
+- os pedidos que chegam juntos são gravados em uma única transação
+  (BEGIN IMMEDIATE ... COMMIT, até DB_ESCRITA_LOTE pedidos): cada pedido
+  roda em um SAVEPOINT, então o erro de um deles (por exemplo, uma
+  restrição violada) só desfaz aquele pedido e é entregue no seu Future;
+- se o banco estiver ocupado por outro processo (importação pela linha de
+  comando, por exemplo) além do busy_timeout da conexão (DB_BUSY_TIMEOUT),
+  o lote inteiro é desfeito e tentado de novo até DB_ESCRITA_TENTATIVAS vezes.
+
+Os Futures só são concluídos após o commit, depois que o cache de
+consultas foi invalidado (DBManager.registrar_escrita): quem espera o
+resultado já lê os dados novos.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from loguru import logger
+
+
+def _ocupado(erro):
+    return isinstance(erro, sqlite3.OperationalError) and ("locked" in str(erro) or "busy" in str(erro))
+
+
+class FilaEscrita:
+    def __init__(self, db, max_lote, tentativas):
+        self.db = db
+        self.max_lote = max_lote
+        self.tentativas = tentativas
+        self._fila = queue.Queue()
+        self.transacoes = 0
+        self.pedidos = 0
+        self._thread = threading.Thread(target=self._executar, name="escritor", daemon=True)
+        self._thread.start()
+
+    def enviar(self, funcao, *tabelas, apos=None):
+        """
+        Enfileira funcao(conn), executada pela thread do escritor dentro de
+        uma transação (funcao não deve fazer commit nem chamar os métodos de
+        escrita do DBManager). tabelas são as tabelas alteradas e
+        apos(resultado, versoes), se informado, é chamado após o commit com
+        as versões (antes, depois) dessas tabelas no cache. Retorna um
+        Future com o resultado de funcao.
+        """
+        futuro = Future()
+        self._fila.put((funcao, tabelas, apos, futuro))
+        return futuro
+
+    def executar(self, funcao, *tabelas, apos=None):
+        """
+        Mesmo que enviar(...).result(): espera a gravação e retorna o resultado.
+        """
+        return self.enviar(funcao, *tabelas, apos=apos).result()
+
+    def _executar(self):
+        while True:
+            lote = [self._fila.get()]
+            while len(lote) < self.max_lote:
+                try:
+                    lote.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._gravar(lote)
+            except Exception as e:
+                # A thread não pode morrer: quem espera os Futures ficaria bloqueado
+                logger.error(f"[ESCRITOR] Falha inesperada no lote de {len(lote)} escritas: {e}")
+                for _, _, _, futuro in lote:
+                    if not futuro.done():
+                        futuro.set_exception(e)
+
+    def _gravar(self, lote):
+        conn = self.db._conexao()
+        for tentativa in range(1, self.tentativas + 1):
+            self.db.cache.sincronizar()
+            resultados = []
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                for funcao, _, _, _ in lote:
+                    conn.execute("SAVEPOINT pedido")
+                    try:
+                        resultados.append((True, funcao(conn)))
+                        conn.execute("RELEASE pedido")
+                    except Exception as e:
+                        # Banco ocupado no meio do lote: desfaz tudo e tenta de novo
+                        if _ocupado(e):
+                            raise
+                        conn.execute("ROLLBACK TO pedido")
+                        conn.execute("RELEASE pedido")
+                        resultados.append((False, e))
+                conn.execute("COMMIT")
+                break
+            except Exception as e:
+                if conn.in_transaction:
+                    conn.rollback()
+                if _ocupado(e) and tentativa < self.tentativas:
+                    logger.warning(f"[ESCRITOR] Banco ocupado ({e}); tentativa {tentativa + 1} de {self.tentativas}")
+                    time.sleep(0.05 * tentativa)
+                    continue
+                logger.error(f"[ESCRITOR] Lote de {len(lote)} escritas desfeito: {e}")
+                for _, _, _, futuro in lote:
+                    futuro.set_exception(e)
+                return
+
+        self.transacoes += 1
+        self.pedidos += len(lote)
+        for (_, tabelas, apos, futuro), (sucesso, resultado) in zip(lote, resultados):
+            if not sucesso:
+                futuro.set_exception(resultado)
+                continue
+            try:
+                versoes = self.db.registrar_escrita(*tabelas)
+                if apos is not None:
+                    apos(resultado, versoes)
+            except Exception as e:
+                logger.error(f"[ESCRITOR] Falha após o commit: {e}")
+            futuro.set_result(resultado)
+
+
+_escritores = {}
+_escritores_lock = threading.Lock()
+
+
+def obter_escritor(db, **opcoes):
+    """
+    Retorna o escritor compartilhado do banco do DBManager, criando-o (e
+    iniciando a sua thread) se necessário.
+    """
+    with _escritores_lock:
+        escritor = _escritores.get(db.db_path)
+        if escritor is None:
+            escritor = FilaEscrita(db, **opcoes)
+            _escritores[db.db_path] = escritor
+        return escritor
@@ -0,0 +1,229 @@
+"""
+Indicadores da frota (aba "Gestão da Frota").
+
+frota_viagens guarda, para cada viagem com carro e data de saída, os
+valores calculados com funções de janela sobre as viagens do mesmo carro em
+ordem de (data_saida, id):
+
+- km_anterior = LAG(km_chegada): quilometragem de chegada da viagem anterior;
+- descontinuidade = km_saida - km_anterior: quilômetros não registrados
+  (positiva) ou sobrepostos (negativa) no hodômetro;
+- km_acumulado = SUM(total_km) OVER: quilômetros rodados até a viagem.
+
+frota_carros e frota_motoristas somam essas viagens por carro e por
+motorista (viagens, KM, litros, custo, dias em viagem e descontinuidades
+acima de TOLERANCIA_KM); KM/L, custo por KM e participação de cada
+motorista são calculados na leitura sobre essas poucas linhas.
+
+A atualização é incremental: triggers de viagens registram, em
+frota_pendentes, cada carro com viagens incluídas, alteradas ou excluídas e
+a data mais antiga afetada. atualizar_frota recalcula só as viagens desse
+carro a partir dessa data (a janela continua da última viagem anterior já
+calculada) e corrige as somas subtraindo o trecho antigo e somando o novo.
+A aba chama DBManager.atualizar_frota (uma gravação pelo escritor, só se
+houver pendentes) antes de DBManager.obter_frota, que apenas lê.
+Para recalcular tudo:
+
+    python -m src.database.frota reconstruir [--db viagens.db]
+"""
+import argparse
+import time
+
+from loguru import logger
+
+# Diferença (em KM) entre a saída e a chegada anterior tratada como descontinuidade
+TOLERANCIA_KM = 0.5
+DESCONTINUA_SQL = f"abs(descontinuidade) > {TOLERANCIA_KM}"
+
+TABELAS_FROTA = ("frota_viagens", "frota_carros", "frota_motoristas", "frota_pendentes")
+
+# Tabela de somas -> coluna de agrupamento
+AGREGADOS_FROTA = {"frota_carros": "carro", "frota_motoristas": "motorista"}
+
+# Coluna das somas -> expressão sobre frota_viagens
+METRICAS_FROTA = {
+    "viagens": "COUNT(*)",
+    "total_km": "TOTAL(total_km)",
+    "litros": "TOTAL(litros)",
+    "valor_total": "TOTAL(valor_total)",
+    "dias": "TOTAL(dias)",
+    "descontinuidades": f"TOTAL({DESCONTINUA_SQL})",
+    "km_descontinuidade": f"TOTAL(CASE WHEN {DESCONTINUA_SQL} THEN abs(descontinuidade) END)",
+}
+
+# Viagens do carro a partir de :desde, continuando a janela da viagem anterior
+# (:km_anterior e :km_acumulado); usa idx_viagens_carro (carro, data_saida, id),
+# que já entrega as linhas na ordem da janela. ROWS evita a comparação de
+# pares do quadro padrão (RANGE), desnecessária com id na ordenação.
+INSERIR_FROTA_SQL = '''
+    INSERT INTO frota_viagens (
+        viagem_id, carro, motorista, data_saida, km_saida, km_chegada,
+        km_anterior, descontinuidade, km_acumulado, total_km, litros, valor_total, dias
+    )
+    SELECT id, carro, motorista, data_saida, km_saida, km_chegada,
+           km_anterior, km_saida - km_anterior, km_acumulado, total_km, litros, valor_total, dias
+    FROM (
+        SELECT id, carro, COALESCE(motorista, '') AS motorista, data_saida, km_saida, km_chegada,
+               LAG(km_chegada, 1, :km_anterior) OVER janela AS km_anterior,
+               :km_acumulado + SUM(total_km) OVER janela AS km_acumulado,
+               total_km, litros, valor_total,
+               MAX(1, julianday(COALESCE(data_volta, data_saida)) - julianday(data_saida) + 1) AS dias
+        FROM viagens
+        WHERE carro = :carro AND data_saida >= :desde
+        WINDOW janela AS (ORDER BY data_saida, id ROWS UNBOUNDED PRECEDING)
+    )
+'''
+
+
+def _criar_agregado(tabela, chave):
+    metricas = ",\n        ".join(f"{coluna} {'INTEGER' if coluna == 'viagens' else 'REAL'} NOT NULL"
+                                  for coluna in METRICAS_FROTA)
+    return f'''
+    CREATE TABLE IF NOT EXISTS {tabela} (
+        {chave} TEXT PRIMARY KEY,
+        {metricas}
+    )
+    '''
+
+
+def _marcar(linha):
+    # Carro e data mais antiga a recalcular; ON CONFLICT mantém a menor data
+    return (f"INSERT INTO frota_pendentes (carro, desde) VALUES ({linha}.carro, {linha}.data_saida)\n"
+            f"        ON CONFLICT (carro) DO UPDATE SET desde = MIN(desde, excluded.desde);")
+
+
+def _triggers():
+    condicao = "{linha}.data_saida IS NOT NULL AND {linha}.carro <> ''"
+    colunas = ("carro, motorista, data_saida, data_volta, km_saida, km_chegada, km_informado, valor, "
+               "diaria_motorista, despesa_extra, diesel_s10, diesel_s500, pedagio")
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_viagens_frota_{nome} AFTER {evento} ON viagens
+        WHEN {condicao.format(linha=linha)}
+        BEGIN
+        {_marcar(linha)}
+        END
+        '''
+        for nome, evento, linha in (
+            ("insert", "INSERT", "NEW"),
+            ("delete", "DELETE", "OLD"),
+            # Na alteração, o carro (e a data) antigos e os novos
+            ("update_old", f"UPDATE OF {colunas}", "OLD"),
+            ("update_new", f"UPDATE OF {colunas}", "NEW"),
+        )
+    ]
+
+
+def _acumular(conn, carro, desde, sinal):
+    """
+    Soma (sinal 1) ou subtrai (-1) das tabelas de somas as viagens do carro
+    a partir de desde já presentes em frota_viagens.
+    """
+    colunas = ", ".join(METRICAS_FROTA)
+    for tabela, chave in AGREGADOS_FROTA.items():
+        conn.execute(f'''
+            INSERT INTO {tabela} ({chave}, {colunas})
+            SELECT {chave}, {", ".join(f"{sinal} * {expressao}" for expressao in METRICAS_FROTA.values())}
+            FROM frota_viagens
+            WHERE carro = ? AND data_saida >= ?
+            GROUP BY {chave}
+            ON CONFLICT ({chave}) DO UPDATE SET
+                {", ".join(f"{coluna} = {coluna} + excluded.{coluna}" for coluna in METRICAS_FROTA)}
+        ''', (carro, desde))
+
+
+def atualizar_frota(conn):
+    """
+    Recalcula as viagens dos carros pendentes a partir da data mais antiga
+    afetada e corrige as somas. Retorna o número de viagens recalculadas.
+    Não controla a transação: quem chama decide (o DBManager usa o escritor).
+    """
+    recalculadas = 0
+    for carro, desde in conn.execute("SELECT carro, desde FROM frota_pendentes").fetchall():
+        _acumular(conn, carro, desde, -1)
+        conn.execute("DELETE FROM frota_viagens WHERE carro = ? AND data_saida >= ?", (carro, desde))
+        anterior = conn.execute('''
+            SELECT km_chegada, km_acumulado FROM frota_viagens
+            WHERE carro = ?
+            ORDER BY data_saida DESC, viagem_id DESC
+            LIMIT 1
+        ''', (carro,)).fetchone() or (None, 0.0)
+        recalculadas += conn.execute(INSERIR_FROTA_SQL, {
+            "carro": carro, "desde": desde, "km_anterior": anterior[0], "km_acumulado": anterior[1] or 0.0,
+        }).rowcount
+        _acumular(conn, carro, desde, 1)
+    conn.execute("DELETE FROM frota_pendentes")
+    for tabela in AGREGADOS_FROTA:
+        conn.execute(f"DELETE FROM {tabela} WHERE viagens <= 0")
+    return recalculadas
+
+
+def reconstruir_frota(conn):
+    """
+    Recalcula os indicadores a partir de todas as viagens. Não controla a
+    transação (a migração já roda dentro de uma).
+    """
+    for tabela in TABELAS_FROTA:
+        conn.execute(f"DELETE FROM {tabela}")
+    conn.execute('''
+        INSERT INTO frota_pendentes (carro, desde)
+        SELECT carro, MIN(data_saida) FROM viagens
+        WHERE data_saida IS NOT NULL AND carro <> ''
+        GROUP BY carro
+    ''')
+    return atualizar_frota(conn)
+
+
+# Passos da migração que cria os indicadores (ver src/database/migrations.py)
+FROTA = (
+    [
+        '''
+        CREATE TABLE IF NOT EXISTS frota_viagens (
+            viagem_id INTEGER PRIMARY KEY,
+            carro TEXT NOT NULL,
+            motorista TEXT NOT NULL,
+            data_saida TEXT NOT NULL,
+            km_saida REAL,
+            km_chegada REAL,
+            km_anterior REAL,
+            descontinuidade REAL,
+            km_acumulado REAL,
+            total_km REAL,
+            litros REAL,
+            valor_total REAL,
+            dias REAL
+        )
+        ''',
+        "CREATE INDEX IF NOT EXISTS idx_frota_viagens_carro ON frota_viagens(carro, data_saida)",
+        # Só as viagens com descontinuidade, para a lista das mais recentes
+        f"CREATE INDEX IF NOT EXISTS idx_frota_descontinuidades ON frota_viagens(data_saida) "
+        f"WHERE {DESCONTINUA_SQL}",
+        '''
+        CREATE TABLE IF NOT EXISTS frota_pendentes (
+            carro TEXT PRIMARY KEY,
+            desde TEXT NOT NULL
+        ) WITHOUT ROWID
+        ''',
+    ]
+    + [_criar_agregado(tabela, chave) for tabela, chave in AGREGADOS_FROTA.items()]
+    + _triggers()
+    + [reconstruir_frota]
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção dos indicadores da frota")
+    parser.add_argument("comando", choices=["reconstruir", "atualizar"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+
+    db = DBManager(args.db)
+    inicio = time.perf_counter()
+    viagens = db.reconstruir_frota() if args.comando == "reconstruir" else db.atualizar_frota()
+    logger.info(f"[FROTA] {viagens} viagens recalculadas em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
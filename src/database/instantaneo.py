@@ -0,0 +1,291 @@
+"""
+Instantâneo Arrow das viagens, compartilhado entre processos.
+
+Com vários processos do Streamlit servindo o mesmo banco, cada um montaria
+a tabela completa de viagens (obter_viagens_completo) com a junção no SQL.
+Com DB_INSTANTANEO configurado, essa tabela é gravada em um arquivo Arrow
+IPC, sem compressão, e os processos a leem com pyarrow.memory_map: os dados
+não são desserializados e as páginas do arquivo ficam uma única vez no
+cache de páginas do sistema operacional, compartilhadas por todos.
+
+- versao_dados: contador incrementado por triggers a cada alteração em
+  viagens, origens, destinos e enderecos (de qualquer processo), com um
+  identificador aleatório do banco. O instantâneo guarda nos metadados a
+  versão lida antes da consulta; o leitor só usa o instantâneo se ela for
+  igual à versão atual do banco e, caso contrário, a consulta volta ao SQL
+  e uma nova gravação é agendada. Os triggers custam uma escrita a mais em
+  cada alteração dessas tabelas, por isso só são instalados quando um
+  processo inicia com DB_INSTANTANEO (e continuam no banco, valendo para
+  todos os processos, até "python -m src.database.instantaneo remover").
+- Leitura: a tabela aberta com memory_map é convertida com
+  to_pandas(split_blocks=True), em que cada coluna do DataFrame aponta para
+  o próprio arquivo mapeado (somente leitura), sem cópia; por isso esse
+  DataFrame não passa pelo cache de consultas, que guardaria uma cópia.
+- Gravação: em uma thread de fundo, alguns segundos após a última escrita
+  (DB_INSTANTANEO_ATRASO), para que um lote de escritas gere um único
+  arquivo. O arquivo é gravado ao lado do destino e trocado com
+  os.replace: quem já abriu a versão anterior continua lendo-a e as novas
+  aberturas veem o arquivo novo inteiro.
+
+Para gravar manualmente (por exemplo, após uma importação pela linha de
+comando):
+
+    python -m src.database.instantaneo gravar [--db viagens.db] [--saida viagens.arrow]
+
+Para retirar os triggers de versão de um banco em que o instantâneo foi
+desligado (em todos os processos):
+
+    python -m src.database.instantaneo remover [--db viagens.db]
+"""
+import argparse
+import os
+import threading
+import time
+
+import pyarrow as pa
+from loguru import logger
+
+# Tabelas lidas por obter_viagens_completo
+TABELAS_INSTANTANEO = ("viagens", "origens", "destinos", "enderecos")
+_CHAVE_VERSAO = b"versao_dados"
+
+
+def _nomes_triggers_versao(tabelas=TABELAS_INSTANTANEO):
+    return {f"trg_{tabela}_versao_{evento.lower()}": (tabela, evento)
+            for tabela in tabelas for evento in ("INSERT", "UPDATE", "DELETE")}
+
+
+def _triggers_versao(tabelas=TABELAS_INSTANTANEO):
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS {nome} AFTER {evento} ON {tabela}
+        BEGIN
+        UPDATE versao_dados SET versao = versao + 1 WHERE id = 1;
+        END
+        '''
+        for nome, (tabela, evento) in _nomes_triggers_versao(tabelas).items()
+    ]
+
+
+def triggers_versao_instalados(conn):
+    """
+    True se os triggers de versao_dados estão no banco.
+    """
+    nomes = list(_nomes_triggers_versao())
+    marcadores = ", ".join("?" * len(nomes))
+    instalados = conn.execute(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({marcadores})", nomes).fetchone()[0]
+    return instalados == len(nomes)
+
+
+def instalar_triggers_versao(conn):
+    """
+    Instala os triggers de versao_dados e incrementa a versão: as escritas
+    feitas sem eles não mudaram o contador, então um instantâneo gravado
+    antes não pode mais ser considerado atual. Não controla a transação.
+    """
+    for comando in _triggers_versao():
+        conn.execute(comando)
+    conn.execute("UPDATE versao_dados SET versao = versao + 1 WHERE id = 1")
+    logger.info("[INSTANTANEO] Triggers de versão dos dados instalados")
+
+
+def remover_triggers_versao(conn):
+    """
+    Remove os triggers de versao_dados. Não controla a transação.
+    """
+    for nome in _nomes_triggers_versao():
+        conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+
+
+def recriar_triggers_versao_viagens(conn):
+    """
+    Passo das migrações que reconstroem viagens: recria os triggers de
+    versão da tabela (descartados na troca) se eles estiverem instalados
+    nas demais tabelas.
+    """
+    outros = [nome for nome, (tabela, _) in _nomes_triggers_versao().items() if tabela != "viagens"]
+    marcadores = ", ".join("?" * len(outros))
+    if conn.execute(f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({marcadores})",
+                    outros).fetchone()[0]:
+        for comando in _triggers_versao(("viagens",)):
+            conn.execute(comando)
+
+
+# Passos da migração que cria o contador de versão (ver src/database/migrations.py);
+# os triggers eram criados aqui e hoje só com DB_INSTANTANEO (ver SEM_TRIGGERS_VERSAO)
+VERSAO_DADOS = [
+    '''
+    CREATE TABLE IF NOT EXISTS versao_dados (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        versao INTEGER NOT NULL,
+        banco TEXT NOT NULL DEFAULT (lower(hex(randomblob(8))))
+    )
+    ''',
+    "INSERT OR IGNORE INTO versao_dados (id, versao) VALUES (1, 0)",
+] + _triggers_versao()
+
+# Retira os triggers dos bancos já migrados; o DBManager os instala de novo
+# ao iniciar com DB_INSTANTANEO
+SEM_TRIGGERS_VERSAO = [remover_triggers_versao]
+
+
+def versao_dados(conn):
+    """
+    Versão atual dos dados ("banco:contador"); o identificador do banco
+    impede que o instantâneo de outro arquivo seja usado.
+    """
+    banco, versao = conn.execute("SELECT banco, versao FROM versao_dados WHERE id = 1").fetchone()
+    return f"{banco}:{versao}"
+
+
+def gravar_instantaneo(db, caminho):
+    """
+    Grava em caminho a tabela completa de viagens do banco de db. A versão
+    é lida antes da consulta: se houver uma escrita no meio, o instantâneo
+    fica marcado com a versão anterior e será apenas regravado. Retorna a
+    versão gravada.
+    """
+    inicio = time.perf_counter()
+    versao = versao_dados(db._conexao())
+    df = db._consultar_viagens_completo(db._conexao())
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    tabela = tabela.replace_schema_metadata({**(tabela.schema.metadata or {}), _CHAVE_VERSAO: versao})
+
+    temporario = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with pa.OSFile(temporario, "wb") as destino:
+            with pa.ipc.new_file(destino, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    logger.info(f"[INSTANTANEO] Versão {versao} gravada ({len(df)} viagens, "
+                f"{os.path.getsize(caminho) / 1024 / 1024:.1f} MB) em {time.perf_counter() - inicio:.2f} s")
+    return versao
+
+
+class LeitorInstantaneo:
+    """
+    Abre o instantâneo com memory_map e o reabre quando o arquivo é trocado
+    (outro inode, tamanho ou data de modificação).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self._lock = threading.Lock()
+        self._identidade = None
+        self._tabela = None
+        self._versao = None
+
+    def tabela(self):
+        """
+        Retorna (tabela Arrow, versão) do arquivo atual, ou (None, None) se
+        ele não existir.
+        """
+        try:
+            estado = os.stat(self.caminho)
+        except FileNotFoundError:
+            return None, None
+        identidade = (estado.st_ino, estado.st_size, estado.st_mtime_ns)
+        with self._lock:
+            if identidade != self._identidade:
+                # Os buffers da tabela apontam para o mapeamento, que fica
+                # aberto enquanto a tabela for referenciada
+                tabela = pa.ipc.open_file(pa.memory_map(self.caminho, "r")).read_all()
+                self._tabela, self._identidade = tabela, identidade
+                self._versao = tabela.schema.metadata[_CHAVE_VERSAO].decode()
+            return self._tabela, self._versao
+
+    def ler(self, versao):
+        """
+        DataFrame do instantâneo se ele estiver na versão informada (a atual
+        do banco); None se estiver desatualizado ou não existir. As colunas
+        apontam para o arquivo mapeado e são somente leitura (use .copy()
+        para alterá-las).
+        """
+        tabela, versao_tabela = self.tabela()
+        if tabela is None or versao_tabela != versao:
+            return None
+        # Um bloco por coluna: sem consolidar, o pandas usa os buffers Arrow
+        return tabela.to_pandas(split_blocks=True)
+
+
+class GravadorInstantaneo:
+    """
+    Thread de fundo que regrava o instantâneo atraso segundos depois do
+    último agendar(): várias escritas em sequência geram uma única gravação.
+    """
+
+    def __init__(self, db, caminho, atraso):
+        self.db = db
+        self.caminho = caminho
+        self.atraso = atraso
+        self._pedido = threading.Event()
+        self._ultimo_pedido = 0.0
+        self._thread = threading.Thread(target=self._executar, name="gravador-instantaneo", daemon=True)
+        self._thread.start()
+
+    def agendar(self):
+        self._ultimo_pedido = time.monotonic()
+        self._pedido.set()
+
+    def _executar(self):
+        while True:
+            self._pedido.wait()
+            # Espera o lote de escritas terminar
+            while (espera := self._ultimo_pedido + self.atraso - time.monotonic()) > 0:
+                time.sleep(espera)
+            self._pedido.clear()
+            try:
+                gravar_instantaneo(self.db, self.caminho)
+            except Exception as e:
+                logger.error(f"[INSTANTANEO] Falha ao gravar {self.caminho}: {e}")
+
+
+_instantaneos = {}
+_instantaneos_lock = threading.Lock()
+
+
+def obter_instantaneo(db, caminho, atraso):
+    """
+    Retorna (leitor, gravador) compartilhados do arquivo informado,
+    criando-os se necessário.
+    """
+    with _instantaneos_lock:
+        par = _instantaneos.get(caminho)
+        if par is None:
+            par = (LeitorInstantaneo(caminho), GravadorInstantaneo(db, caminho, atraso))
+            _instantaneos[caminho] = par
+        return par
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Instantâneo Arrow das viagens")
+    parser.add_argument("comando", choices=["gravar", "remover"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    parser.add_argument("--saida", help="arquivo Arrow (padrão: DB_INSTANTANEO)")
+    args = parser.parse_args()
+
+    from src.config.config import Config
+    from src.database.db_manager import DBManager
+
+    if args.comando == "remover":
+        db = DBManager(args.db)
+        db.escritor.executar(remover_triggers_versao)
+        print("triggers de versão dos dados removidos")
+        return
+
+    caminho = args.saida or Config.DB_INSTANTANEO
+    if not caminho:
+        parser.error("informe --saida ou configure DB_INSTANTANEO")
+    db = DBManager(args.db)
+    if not triggers_versao_instalados(db._conexao()):
+        db.escritor.executar(instalar_triggers_versao)
+    versao = gravar_instantaneo(db, caminho)
+    print(f"versão {versao} gravada em {caminho}")
+
+
+if __name__ == "__main__":
+    main()
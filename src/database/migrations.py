@@ -0,0 +1,197 @@
+from loguru import logger
+
+from src.database.colunas_geradas import COLUNAS_GERADAS, TRIGGERS_RESUMOS_ENTRADAS
+from src.database.datas import DATAS_VALIDADAS
+from src.database.enderecos import BUSCA_ENDERECOS, ENDERECOS_UNICOS
+from src.database.frota import FROTA
+from src.database.instantaneo import SEM_TRIGGERS_VERSAO, VERSAO_DADOS
+from src.database.resumos import RESUMOS_DIARIOS
+
+# -----------------------------
+# MIGRAÇÕES DO ESQUEMA
+# -----------------------------
+# Cada migração é uma tupla (versão, descrição, passos). Os passos são
+# comandos SQL ou funções que recebem a conexão. A versão aplicada fica
+# registrada em PRAGMA user_version, de modo que um viagens.db existente é
+# atualizado no próprio arquivo, aplicando apenas as migrações pendentes.
+
+ESQUEMA_INICIAL = [
+    # Tabela de endereços
+    '''
+    CREATE TABLE IF NOT EXISTS enderecos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cep TEXT,
+        logradouro TEXT,
+        complemento TEXT,
+        bairro TEXT,
+        localidade TEXT,
+        uf TEXT,
+        numero TEXT
+    )
+    ''',
+    # Tabela de origens (referenciando enderecos)
+    '''
+    CREATE TABLE IF NOT EXISTS origens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endereco_id INTEGER,
+        FOREIGN KEY(endereco_id) REFERENCES enderecos(id)
+    )
+    ''',
+    # Tabela de destinos (referenciando enderecos)
+    '''
+    CREATE TABLE IF NOT EXISTS destinos (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        endereco_id INTEGER,
+        FOREIGN KEY(endereco_id) REFERENCES enderecos(id)
+    )
+    ''',
+    # Tabela de carros
+    '''
+    CREATE TABLE IF NOT EXISTS carros (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT UNIQUE
+    )
+    ''',
+    # Tabela de tipos de óleo
+    '''
+    CREATE TABLE IF NOT EXISTS tipos_oleo (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT UNIQUE
+    )
+    ''',
+    # Tabela de motoristas
+    '''
+    CREATE TABLE IF NOT EXISTS motoristas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        nome TEXT UNIQUE
+    )
+    ''',
+    # Tabela de viagens (usa FK para origens e destinos)
+    '''
+    CREATE TABLE IF NOT EXISTS viagens (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        origem_id INTEGER,
+        destino_id INTEGER,
+        carro TEXT,
+        km_saida REAL,
+        km_chegada REAL,
+        total_km REAL,
+        data_saida TEXT,
+        data_volta TEXT,
+        valor REAL,
+        motorista TEXT,
+        diaria_motorista REAL,
+        despesa_extra REAL,
+        diesel_s10 REAL,
+        diesel_s500 REAL,
+        litros REAL,
+        valor_combustivel REAL,
+        pedagio REAL,
+        valor_total REAL,
+        FOREIGN KEY(origem_id) REFERENCES origens(id),
+        FOREIGN KEY(destino_id) REFERENCES destinos(id)
+    )
+    ''',
+]
+
+# Índices usados pelos filtros e junções da aba "Tabela de Viagens".
+# Todo índice do SQLite termina implicitamente no rowid (v.id), então
+# idx_viagens_data_saida também atende a ordenação (data_saida, id) da
+# paginação e as combinações (coluna, data_saida) atendem filtro + período.
+INDICES_VIAGENS = [
+    "CREATE INDEX IF NOT EXISTS idx_viagens_data_saida ON viagens(data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_viagens_motorista ON viagens(motorista, data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_viagens_carro ON viagens(carro, data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_viagens_origem ON viagens(origem_id, data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_viagens_destino ON viagens(destino_id, data_saida)",
+    "CREATE INDEX IF NOT EXISTS idx_origens_endereco ON origens(endereco_id)",
+    "CREATE INDEX IF NOT EXISTS idx_destinos_endereco ON destinos(endereco_id)",
+    "ANALYZE",
+]
+
+# Cache local das consultas de CEP (dados NULL = CEP inexistente, cache negativo)
+CACHE_CEP = [
+    '''
+    CREATE TABLE IF NOT EXISTS cep_cache (
+        cep TEXT PRIMARY KEY,
+        dados TEXT,
+        atualizado_em REAL NOT NULL
+    ) WITHOUT ROWID
+    ''',
+]
+
+# Base offline de CEPs. logradouro_busca guarda o logradouro sem acentos e em
+# minúsculas; as buscas por prefixo usam faixas (>= prefixo AND < prefixo + 1)
+# sobre a chave primária e sobre o índice, sem depender de LIKE.
+CEPS_OFFLINE = [
+    '''
+    CREATE TABLE IF NOT EXISTS ceps_offline (
+        cep TEXT PRIMARY KEY,
+        logradouro TEXT,
+        complemento TEXT,
+        bairro TEXT,
+        localidade TEXT,
+        uf TEXT,
+        logradouro_busca TEXT
+    ) WITHOUT ROWID
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_ceps_offline_logradouro ON ceps_offline(logradouro_busca)",
+]
+
+MIGRACOES = [
+    (1, "Esquema inicial", ESQUEMA_INICIAL),
+    (2, "Índices para filtros e junções das viagens", INDICES_VIAGENS),
+    (3, "Cache de consultas de CEP", CACHE_CEP),
+    (4, "Base offline de CEPs", CEPS_OFFLINE),
+    (5, "Resumos diários das viagens mantidos por triggers", RESUMOS_DIARIOS),
+    (6, "Endereços, origens e destinos sem duplicatas", ENDERECOS_UNICOS),
+    (7, "Índice de busca textual dos endereços", BUSCA_ENDERECOS),
+    (8, "Versão dos dados para o instantâneo Arrow das viagens", VERSAO_DADOS),
+    # A reconstrução de viagens descarta os seus índices: INDICES_VIAGENS os recria
+    (9, "Colunas geradas das viagens (valores derivados, ano e mês)", COLUNAS_GERADAS + INDICES_VIAGENS),
+    (10, "Datas das viagens validadas (texto ISO com CHECK)", DATAS_VALIDADAS + INDICES_VIAGENS),
+    (11, "Indicadores da frota (consumo, custo por KM, hodômetro e motoristas)", FROTA),
+    (12, "Triggers de versão dos dados só com o instantâneo Arrow ativo", SEM_TRIGGERS_VERSAO),
+    (13, "Resumos diários atualizados pelas colunas de entrada das viagens", TRIGGERS_RESUMOS_ENTRADAS),
+]
+
+
+def versao_esquema(conn):
+    """
+    Retorna a versão do esquema registrada em PRAGMA user_version.
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migracoes(conn, migracoes=MIGRACOES):
+    """
+    Aplica, em ordem, as migrações com versão maior que a do banco.
+    Cada migração roda em sua própria transação (BEGIN IMMEDIATE), então uma
+    falha desfaz apenas a migração corrente e outro processo que tente migrar
+    ao mesmo tempo aguarda o bloqueio e encontra o banco já atualizado.
+    Retorna a versão final do esquema.
+    """
+    ultima = migracoes[-1][0] if migracoes else 0
+    if versao_esquema(conn) >= ultima:
+        return versao_esquema(conn)
+
+    for versao, descricao, passos in migracoes:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if versao_esquema(conn) >= versao:
+                conn.rollback()
+                continue
+            for passo in passos:
+                if callable(passo):
+                    passo(conn)
+                else:
+                    conn.execute(passo)
+            conn.execute(f"PRAGMA user_version = {int(versao)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.exception(f"[MIGRACAO] Falha ao aplicar a migração {versao}: {descricao}")
+            raise
+        logger.info(f"[MIGRACAO] Migração {versao} aplicada: {descricao}")
+
+    return versao_esquema(conn)
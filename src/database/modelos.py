@@ -0,0 +1,103 @@
+"""
+Tipos das linhas lidas do banco.
+
+Os métodos do DBManager que retornam registros (endereços de origem e
+destino, viagens) usam dataclasses com __slots__, criadas direto pela
+row_factory do sqlite3, em vez de dict(zip(colunas, linha)): cada registro
+ocupa menos memória que um dicionário e é criado mais rápido. As listas
+ficam no cache de consultas, compartilhadas entre as sessões, então os
+registros são somente leitura (não são frozen porque o __init__ de uma
+dataclass frozen custa o dobro por linha).
+
+Para a tabela completa de viagens, compactar_viagens reduz o DataFrame:
+datas em datetime64, textos repetidos (carro, motorista, endereços) como
+category e os valores (KM, litros e reais) em float64. Os valores não são
+reduzidos a inteiros pequenos ou float32 mesmo quando caberiam: as contas
+feitas depois sobre o DataFrame (somas, multiplicações) estourariam ou
+perderiam precisão sem aviso.
+"""
+import dataclasses
+
+import pandas as pd
+
+
+@dataclasses.dataclass(slots=True)
+class Local:
+    """
+    Origem ou destino, com os campos do endereço.
+    """
+    id: int
+    endereco_id: int
+    cep: str
+    logradouro: str
+    complemento: str
+    bairro: str
+    localidade: str
+    uf: str
+    numero: str
+
+    @property
+    def rotulo(self):
+        return (f"{self.cep} {self.logradouro} {self.complemento} {self.bairro} "
+                f"{self.localidade} {self.uf} {self.numero}")
+
+
+@dataclasses.dataclass(slots=True)
+class Viagem:
+    """
+    Linha da tabela viagens (mesma ordem das colunas).
+    """
+    id: int
+    origem_id: int
+    destino_id: int
+    carro: str
+    km_saida: float
+    km_chegada: float
+    total_km: float
+    data_saida: str
+    data_volta: str
+    valor: float
+    motorista: str
+    diaria_motorista: float
+    despesa_extra: float
+    diesel_s10: float
+    diesel_s500: float
+    litros: float
+    valor_combustivel: float
+    pedagio: float
+    valor_total: float
+
+
+COLUNAS_VIAGEM = tuple(campo.name for campo in dataclasses.fields(Viagem))
+
+
+def fabrica_linhas(tipo):
+    """
+    row_factory do sqlite3 que cria tipo(*linha) para cada linha.
+    """
+    def fabrica(cursor, linha):
+        return tipo(*linha)
+    return fabrica
+
+
+# Colunas de obter_viagens_completo convertidas por compactar_viagens
+COLUNAS_DATA = ("Data de Saída", "Data de Retorno")
+COLUNAS_CATEGORIA = ("Carro", "Motorista", "Endereço de Origem", "Endereço de Destino")
+
+
+def compactar_viagens(df):
+    """
+    Converte, no próprio DataFrame, as datas para datetime64 (o banco só
+    aceita datas ISO, ver src/database/datas.py; as ausentes viram NaT),
+    os textos repetidos para category e as demais colunas para float64
+    (inclusive as de um resultado vazio, que o read_sql deixa como object).
+    Retorna o DataFrame.
+    """
+    for coluna in df.columns:
+        if coluna in COLUNAS_DATA:
+            df[coluna] = pd.to_datetime(df[coluna], format="%Y-%m-%d")
+        elif coluna in COLUNAS_CATEGORIA:
+            df[coluna] = df[coluna].astype("category")
+        else:
+            df[coluna] = df[coluna].astype("float64")
+    return df
@@ -0,0 +1,240 @@
+"""
+Instrumentação de desempenho da camada de dados.
+
+Registra, no próprio processo, a latência e as linhas retornadas de cada
+método do DBManager e de cada comando SQL, além do tempo de abertura das
+conexões. Cada série guarda as últimas amostras (janela móvel) para o
+cálculo de p50/p95/p99; chamadas acima de DB_LIMITE_LENTO_MS geram uma
+linha de log "[LENTO]" pelo loguru.
+"""
+import contextlib
+import functools
+import re
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import pandas as pd
+from loguru import logger
+
+from src.config.config import Config
+
+_ESPACOS = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def _normalizar_sql(sql):
+    return _ESPACOS.sub(" ", sql).strip()
+
+
+def _percentil(ordenadas, fracao):
+    if not ordenadas:
+        return 0.0
+    return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+
+def contar_linhas(resultado):
+    """
+    Quantidade de linhas de um resultado do DBManager (DataFrame, lista ou
+    dicionário de buscar_viagens); None quando não se aplica.
+    """
+    if isinstance(resultado, (pd.DataFrame, list)):
+        return len(resultado)
+    if isinstance(resultado, dict) and isinstance(resultado.get("viagens"), pd.DataFrame):
+        return len(resultado["viagens"])
+    return None
+
+
+class Serie:
+    """
+    Amostras recentes de uma métrica (latência em segundos e linhas).
+    """
+
+    def __init__(self, max_amostras):
+        self.tempos = deque(maxlen=max_amostras)
+        self.linhas = deque(maxlen=max_amostras)
+        self.chamadas = 0
+        self.tempo_total = 0.0
+
+    def registrar(self, segundos, linhas):
+        self.tempos.append(segundos)
+        self.linhas.append(linhas or 0)
+        self.chamadas += 1
+        self.tempo_total += segundos
+
+    def resumo(self):
+        ordenadas = sorted(self.tempos)
+        return {
+            "chamadas": self.chamadas,
+            "total_ms": self.tempo_total * 1000,
+            "media_ms": self.tempo_total / self.chamadas * 1000 if self.chamadas else 0.0,
+            "p50_ms": _percentil(ordenadas, 0.50) * 1000,
+            "p95_ms": _percentil(ordenadas, 0.95) * 1000,
+            "p99_ms": _percentil(ordenadas, 0.99) * 1000,
+            "linhas_media": sum(self.linhas) / len(self.linhas) if self.linhas else 0.0,
+        }
+
+
+class PerfilDesempenho:
+    """
+    Estatísticas de desempenho do processo, agrupadas por tipo
+    ("metodo", "sql", "conexao") e por nome.
+    """
+
+    def __init__(self, limite_lento_ms=None, max_amostras=None):
+        self.limite_lento = (Config.DB_LIMITE_LENTO_MS if limite_lento_ms is None
+                             else limite_lento_ms) / 1000
+        self.max_amostras = max_amostras or Config.DB_PERFIL_AMOSTRAS
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, nome, segundos, linhas=None):
+        with self._lock:
+            serie = self._series.get((tipo, nome))
+            if serie is None:
+                serie = self._series[(tipo, nome)] = Serie(self.max_amostras)
+            serie.registrar(segundos, linhas)
+        if segundos >= self.limite_lento:
+            logger.warning(f"[LENTO] {tipo} {segundos * 1000:.0f} ms"
+                           f"{'' if linhas is None else f' ({linhas} linhas)'}: {nome[:300]}")
+
+    def resumo(self, tipo):
+        """
+        DataFrame com as estatísticas de um tipo, das séries mais lentas (p95)
+        para as mais rápidas.
+        """
+        with self._lock:
+            linhas = [dict(nome=nome, **serie.resumo())
+                      for (tipo_serie, nome), serie in self._series.items() if tipo_serie == tipo]
+        colunas = ["nome", "chamadas", "total_ms", "media_ms", "p50_ms", "p95_ms", "p99_ms", "linhas_media"]
+        df = pd.DataFrame(linhas, columns=colunas)
+        return df.sort_values("p95_ms", ascending=False).reset_index(drop=True)
+
+    def limpar(self):
+        with self._lock:
+            self._series.clear()
+
+
+_perfil = PerfilDesempenho()
+
+
+def obter_perfil():
+    """
+    Retorna o perfil de desempenho compartilhado pelo processo.
+    """
+    return _perfil
+
+
+def medido(metodo):
+    """
+    Registra a latência e as linhas retornadas de cada chamada do método.
+    """
+    nome = metodo.__name__
+
+    @functools.wraps(metodo)
+    def envoltorio(*args, **kwargs):
+        inicio = time.perf_counter()
+        resultado = metodo(*args, **kwargs)
+        _perfil.registrar("metodo", nome, time.perf_counter() - inicio, contar_linhas(resultado))
+        return resultado
+    return envoltorio
+
+
+class CursorMedido(sqlite3.Cursor):
+    """
+    Cursor que mede o tempo de cada comando, somando execução e leitura das
+    linhas (fetchall/fetchmany/fetchone). O comando é registrado quando as
+    linhas terminam de ser lidas (no primeiro fetchone), no próximo comando
+    ou ao fechar/descartar o cursor.
+    """
+    _pendente = None
+
+    def _registrar_pendente(self):
+        if self._pendente is not None:
+            sql, segundos, linhas = self._pendente
+            self._pendente = None
+            _perfil.registrar("sql", sql, segundos, linhas)
+
+    def execute(self, sql, parametros=()):
+        self._registrar_pendente()
+        inicio = time.perf_counter()
+        super().execute(sql, parametros)
+        segundos = time.perf_counter() - inicio
+        sql = _normalizar_sql(sql)
+        if self.description is None:
+            _perfil.registrar("sql", sql, segundos, max(self.rowcount, 0))
+        else:
+            self._pendente = (sql, segundos, 0)
+        return self
+
+    def executemany(self, sql, sequencia):
+        self._registrar_pendente()
+        inicio = time.perf_counter()
+        super().executemany(sql, sequencia)
+        _perfil.registrar("sql", _normalizar_sql(sql), time.perf_counter() - inicio,
+                          max(self.rowcount, 0))
+        return self
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        linhas = super().fetchall()
+        if self._pendente is not None:
+            sql, segundos, total = self._pendente
+            self._pendente = (sql, segundos + time.perf_counter() - inicio, total + len(linhas))
+            self._registrar_pendente()
+        return linhas
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        linha = super().fetchone()
+        if self._pendente is not None:
+            sql, segundos, total = self._pendente
+            self._pendente = (sql, segundos + time.perf_counter() - inicio, total + (linha is not None))
+            self._registrar_pendente()
+        return linha
+
+    def fetchmany(self, *args, **kwargs):
+        inicio = time.perf_counter()
+        linhas = super().fetchmany(*args, **kwargs)
+        if self._pendente is not None:
+            sql, segundos, total = self._pendente
+            self._pendente = (sql, segundos + time.perf_counter() - inicio, total + len(linhas))
+            if not linhas:
+                self._registrar_pendente()
+        return linhas
+
+    def close(self):
+        self._registrar_pendente()
+        super().close()
+
+    def __del__(self):
+        self._registrar_pendente()
+
+
+class ConexaoMedida(sqlite3.Connection):
+    """
+    Conexão cujos cursores (inclusive os de execute/executemany e os do
+    pandas.read_sql) são CursorMedido.
+    """
+
+    def cursor(self, factory=CursorMedido):
+        return super().cursor(factory)
+
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, sequencia):
+        return self.cursor().executemany(sql, sequencia)
+
+
+@contextlib.contextmanager
+def cronometro(tempos, nome):
+    """
+    Soma em tempos[nome] o tempo (segundos) gasto dentro do bloco.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        tempos[nome] = tempos.get(nome, 0.0) + time.perf_counter() - inicio
@@ -0,0 +1,121 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+from src.config.config import Config
+from src.database.perfil import ConexaoMedida, obter_perfil
+
+
+class ConnectionPool:
+    """
+    Mantém uma conexão SQLite de longa duração por thread.
+
+    O Streamlit executa cada sessão em sua própria thread; em vez de abrir e
+    fechar uma conexão a cada método do DBManager, cada thread reutiliza a
+    mesma conexão, já configurada com os PRAGMAs de desempenho. O cache de
+    comandos preparados do módulo sqlite3 (cached_statements) evita recompilar
+    as mesmas consultas a cada chamada.
+    """
+
+    def __init__(self, db_path, journal_mode=None, synchronous=None, mmap_size=None,
+                 cache_size=None, cached_statements=None, medir=None, busy_timeout=None):
+        self.db_path = db_path
+        self.journal_mode = journal_mode or Config.DB_JOURNAL_MODE
+        self.synchronous = synchronous or Config.DB_SYNCHRONOUS
+        self.mmap_size = Config.DB_MMAP_SIZE if mmap_size is None else mmap_size
+        self.cache_size = Config.DB_CACHE_SIZE if cache_size is None else cache_size
+        self.cached_statements = (Config.DB_CACHED_STATEMENTS
+                                  if cached_statements is None else cached_statements)
+        self.medir = Config.DB_PERFIL if medir is None else medir
+        self.busy_timeout = Config.DB_BUSY_TIMEOUT if busy_timeout is None else busy_timeout
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # ident da thread -> (thread, conexão), usado para o encerramento
+        self._conexoes = {}
+        self.total_conexoes = 0
+
+    def _conectar(self):
+        # check_same_thread=False apenas para permitir que fechar() encerre
+        # conexões de outras threads; cada conexão continua sendo usada
+        # somente pela thread que a criou.
+        inicio = time.perf_counter()
+        conn = sqlite3.connect(
+            self.db_path,
+            # Espera (busy_timeout) antes de falhar com "database is locked"
+            timeout=self.busy_timeout,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=ConexaoMedida if self.medir else sqlite3.Connection,
+        )
+        conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size={int(self.cache_size)}")
+        obter_perfil().registrar("conexao", self.db_path, time.perf_counter() - inicio)
+        return conn
+
+    def _descartar_threads_encerradas(self):
+        """
+        Fecha as conexões de threads que já terminaram (sessões encerradas).
+        Deve ser chamado com self._lock adquirido.
+        """
+        for ident, (thread, conn) in list(self._conexoes.items()):
+            if not thread.is_alive():
+                conn.close()
+                del self._conexoes[ident]
+
+    def obter_conexao(self):
+        """
+        Retorna a conexão da thread atual, criando-a na primeira chamada.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._conectar()
+            self._local.conn = conn
+            with self._lock:
+                self._descartar_threads_encerradas()
+                self._conexoes[threading.get_ident()] = (threading.current_thread(), conn)
+                self.total_conexoes += 1
+        return conn
+
+    def fechar(self):
+        """
+        Fecha todas as conexões abertas pelo pool.
+        """
+        with self._lock:
+            for _, conn in self._conexoes.values():
+                conn.close()
+            self._conexoes.clear()
+        self._local = threading.local()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def obter_pool(db_path, **opcoes):
+    """
+    Retorna o pool compartilhado do banco informado, criando-o se necessário.
+    Todas as instâncias de DBManager do mesmo arquivo usam o mesmo pool.
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, **opcoes)
+            _pools[db_path] = pool
+        return pool
+
+
+def fechar_pools():
+    """
+    Gancho de encerramento: fecha as conexões de todos os pools.
+    """
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.fechar()
+        _pools.clear()
+
+
+atexit.register(fechar_pools)
@@ -0,0 +1,181 @@
+"""
+Réplica somente leitura para as consultas de relatório.
+
+Com DB_REPLICA configurado, as leituras dos gráficos, da tabela de viagens,
+das exportações e das listas de filtros (ver DBManager._conexao_leitura)
+vão para uma cópia do banco em vez do arquivo em que os formulários
+gravam. A cópia é feita pela API de backup do SQLite
+(sqlite3.Connection.backup) em uma thread de fundo:
+
+- a cada DB_REPLICA_INTERVALO segundos, ou antes disso após
+  DB_REPLICA_ESCRITAS escritas do processo nas tabelas que ela atende
+  (DBManager.registrar_escrita), a thread verifica se houve alguma escrita
+  no banco (PRAGMA data_version da sua conexão, que muda a cada commit de
+  outra conexão) e só copia se houve. Cada cópia lê o banco inteiro, então
+  o padrão é copiar pelo intervalo, não a cada escrita;
+- a cópia é feita em uma réplica nova, que substitui a anterior de uma vez
+  (as consultas em andamento terminam na anterior);
+- DB_REPLICA = "memoria" mantém a réplica em memória (banco compartilhado
+  entre as threads do processo); outro valor é o caminho de um arquivo,
+  gravado ao lado e trocado com os.replace.
+
+Garantia de atraso: a réplica só é usada se foi confirmada igual ao banco
+há no máximo DB_REPLICA_ATRASO_MAXIMO segundos e se não houver escrita do
+próprio processo ainda não copiada (quem grava uma viagem a vê em seguida).
+Caso contrário, a consulta vai para o banco principal.
+"""
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+from loguru import logger
+
+from src.database.perfil import ConexaoMedida
+
+# "Tabela" do cache de consultas cuja geração muda a cada troca de réplica:
+# os métodos que leem da réplica a incluem em @em_cache
+REPLICA = "replica"
+
+_numeros = itertools.count(1)
+
+
+class ReplicaLeitura:
+    def __init__(self, db, destino, intervalo, escritas, atraso_maximo, paginas, medir=False):
+        self.db = db
+        self.destino = destino
+        self.intervalo = intervalo
+        self.escritas = escritas
+        self.atraso_maximo = atraso_maximo
+        self.paginas = paginas
+        self.medir = medir
+        self._numero = next(_numeros)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._pedido = threading.Event()
+
+        self._geracao = 0
+        self._uri = None
+        self._ancora = None
+        self._data_version = None
+        self._confirmada_em = None
+        self._escritas_pendentes = 0
+        self.copias = 0
+
+        self._thread = threading.Thread(target=self._executar, name="replica-leitura", daemon=True)
+        self._thread.start()
+
+    # Uso pelo DBManager
+    def registrar_escrita(self):
+        """
+        Chamado após cada escrita do processo nas tabelas da réplica: ela
+        deixa de ser usada até a próxima cópia, que é antecipada após
+        self.escritas escritas (0 = só pelo intervalo).
+        """
+        with self._lock:
+            self._escritas_pendentes += 1
+            if self.escritas and self._escritas_pendentes >= self.escritas:
+                self._pedido.set()
+
+    def conexao(self):
+        """
+        Conexão da thread atual com a réplica, ou None se ela não puder ser
+        usada agora (ainda não copiada, desatualizada ou com escritas do
+        processo ainda não copiadas).
+        """
+        with self._lock:
+            if (self._uri is None or self._escritas_pendentes
+                    or time.monotonic() - self._confirmada_em > self.atraso_maximo):
+                return None
+            geracao, uri = self._geracao, self._uri
+        atual = getattr(self._local, "conexao", None)
+        if atual is None or atual[0] != geracao:
+            if atual is not None:
+                atual[1].close()
+            conn = sqlite3.connect(uri, uri=True, check_same_thread=False,
+                                   factory=ConexaoMedida if self.medir else sqlite3.Connection)
+            conn.execute("PRAGMA query_only=1")
+            atual = self._local.conexao = (geracao, conn)
+        return atual[1]
+
+    def estado(self):
+        with self._lock:
+            return {
+                "copias": self.copias,
+                "idade_s": None if self._confirmada_em is None else time.monotonic() - self._confirmada_em,
+                "escritas_pendentes": self._escritas_pendentes,
+            }
+
+    # Cópia
+    def _executar(self):
+        while True:
+            try:
+                self.atualizar()
+            except Exception as e:
+                logger.error(f"[REPLICA] Falha ao atualizar a réplica: {e}")
+            self._pedido.wait(self.intervalo)
+            self._pedido.clear()
+
+    def atualizar(self):
+        """
+        Copia o banco para uma réplica nova se ele mudou desde a última
+        cópia. Retorna True se houve cópia.
+        """
+        inicio = time.monotonic()
+        # Escritas do processo já confirmadas: estarão na cópia
+        with self._lock:
+            escritas_antes = self._escritas_pendentes
+        origem = self.db._conexao()
+        data_version = origem.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            with self._lock:
+                self._confirmada_em = inicio
+                self._escritas_pendentes -= escritas_antes
+            return False
+
+        geracao = self._geracao + 1
+        if self.destino == "memoria":
+            uri = f"file:replica_{os.getpid()}_{self._numero}_{geracao}?mode=memory&cache=shared"
+            copia = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            origem.backup(copia, pages=self.paginas, sleep=0)
+        else:
+            temporario = f"{self.destino}.{os.getpid()}.tmp"
+            copia = sqlite3.connect(temporario)
+            origem.backup(copia, pages=self.paginas, sleep=0)
+            # O arquivo da réplica nunca é alterado depois de trocado: sem WAL e aberto como imutável
+            copia.execute("PRAGMA journal_mode=DELETE")
+            copia.close()
+            os.replace(temporario, self.destino)
+            uri, copia = f"file:{self.destino}?mode=ro&immutable=1", None
+
+        with self._lock:
+            anterior = self._ancora
+            # Em memória, a conexão da cópia mantém o banco vivo até a próxima troca
+            self._geracao, self._uri, self._ancora = geracao, uri, copia
+            self._data_version, self._confirmada_em = data_version, inicio
+            self._escritas_pendentes -= escritas_antes
+            self.copias += 1
+        if anterior is not None:
+            anterior.close()
+        self.db.cache.sincronizar()
+        self.db.cache.invalidar(REPLICA)
+        logger.info(f"[REPLICA] Banco copiado em {time.monotonic() - inicio:.2f} s")
+        return True
+
+
+_replicas = {}
+_replicas_lock = threading.Lock()
+
+
+def obter_replica(db, destino, **opcoes):
+    """
+    Retorna a réplica compartilhada do banco do DBManager, criando-a (e
+    iniciando a thread de cópia) se necessário.
+    """
+    with _replicas_lock:
+        replica = _replicas.get(db.db_path)
+        if replica is None:
+            replica = ReplicaLeitura(db, destino, **opcoes)
+            _replicas[db.db_path] = replica
+        return replica
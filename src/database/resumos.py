@@ -0,0 +1,165 @@
+"""
+Tabelas de resumo diário das viagens, mantidas por triggers.
+
+- resumo_diario: uma linha por data de saída;
+- resumo_diario_carro_motorista: uma linha por data x carro x motorista
+  (carro/motorista ausentes viram '').
+
+Os triggers de viagens somam a viagem nova ao resumo (UPSERT), subtraem a
+removida e, na alteração, fazem as duas coisas; linhas que ficam sem
+viagens são apagadas. Para bancos existentes (ou após cargas feitas com os
+triggers desligados) os resumos são recalculados do zero:
+
+    python -m src.database.resumos reconstruir [--db viagens.db]
+"""
+import argparse
+import time
+
+from loguru import logger
+
+# coluna do resumo -> coluna de viagens somada
+METRICAS_RESUMO = {
+    "total_km": "total_km",
+    "valor_total": "valor_total",
+    "valor_combustivel": "valor_combustivel",
+    "pedagio": "pedagio",
+    "despesa_extra": "despesa_extra",
+    "diaria_motorista": "diaria_motorista",
+    "litros": "litros",
+}
+
+# tabela -> colunas da chave (além da data), como expressões sobre NEW/OLD
+TABELAS_RESUMO = {
+    "resumo_diario": [],
+    "resumo_diario_carro_motorista": ["carro", "motorista"],
+}
+
+
+def _colunas_metricas():
+    return ",\n        ".join(f"{coluna} REAL NOT NULL DEFAULT 0" for coluna in METRICAS_RESUMO)
+
+
+def _criar_tabela(tabela, chaves):
+    colunas_chave = "".join(f"{chave} TEXT NOT NULL,\n        " for chave in chaves)
+    return f'''
+    CREATE TABLE IF NOT EXISTS {tabela} (
+        data TEXT NOT NULL,
+        {colunas_chave}viagens INTEGER NOT NULL DEFAULT 0,
+        {_colunas_metricas()},
+        PRIMARY KEY (data{"".join(", " + chave for chave in chaves)})
+    ) WITHOUT ROWID
+    '''
+
+
+def _somar(tabela, chaves, linha="NEW"):
+    """
+    UPSERT que soma a viagem NEW ao resumo.
+    """
+    colunas = ["data"] + chaves + ["viagens"] + list(METRICAS_RESUMO)
+    valores = ([f"{linha}.data_saida"] + [f"COALESCE({linha}.{chave}, '')" for chave in chaves] + ["1"]
+               + [f"COALESCE({linha}.{origem}, 0)" for origem in METRICAS_RESUMO.values()])
+    atualizacoes = ", ".join(f"{coluna} = {coluna} + excluded.{coluna}"
+                             for coluna in ["viagens"] + list(METRICAS_RESUMO))
+    return (f"INSERT INTO {tabela} ({', '.join(colunas)}) VALUES ({', '.join(valores)}) "
+            f"ON CONFLICT ({', '.join(['data'] + chaves)}) DO UPDATE SET {atualizacoes};")
+
+
+def _subtrair(tabela, chaves, linha="OLD"):
+    """
+    Subtrai a viagem OLD do resumo e apaga a linha se ela ficar sem viagens.
+    """
+    onde = " AND ".join([f"data = {linha}.data_saida"]
+                        + [f"{chave} = COALESCE({linha}.{chave}, '')" for chave in chaves])
+    atualizacoes = ", ".join(["viagens = viagens - 1"] + [
+        f"{coluna} = {coluna} - COALESCE({linha}.{origem}, 0)" for coluna, origem in METRICAS_RESUMO.items()])
+    return (f"UPDATE {tabela} SET {atualizacoes} WHERE {onde};\n"
+            f"        DELETE FROM {tabela} WHERE {onde} AND viagens <= 0;")
+
+
+def _triggers(entradas=None):
+    """
+    Triggers que mantêm os resumos. Na alteração, disparam pelas colunas da
+    chave e pelas entradas das métricas: as próprias colunas somadas
+    (padrão, de quando eram colunas comuns) ou, com colunas geradas, as
+    colunas de que elas são calculadas.
+    """
+    somar = "\n        ".join(_somar(tabela, chaves) for tabela, chaves in TABELAS_RESUMO.items())
+    subtrair = "\n        ".join(_subtrair(tabela, chaves) for tabela, chaves in TABELAS_RESUMO.items())
+    entradas = sorted(set(METRICAS_RESUMO.values())) if entradas is None else list(entradas)
+    colunas = ", ".join(["data_saida", "carro", "motorista"] + entradas)
+    return [
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_viagens_resumo_insert AFTER INSERT ON viagens
+        WHEN NEW.data_saida IS NOT NULL
+        BEGIN
+        {somar}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_viagens_resumo_delete AFTER DELETE ON viagens
+        WHEN OLD.data_saida IS NOT NULL
+        BEGIN
+        {subtrair}
+        END
+        ''',
+        # Na alteração, as duas metades são condicionais: uma viagem pode
+        # ganhar ou perder a data de saída
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_viagens_resumo_update_old AFTER UPDATE OF {colunas} ON viagens
+        WHEN OLD.data_saida IS NOT NULL
+        BEGIN
+        {subtrair}
+        END
+        ''',
+        f'''
+        CREATE TRIGGER IF NOT EXISTS trg_viagens_resumo_update_new AFTER UPDATE OF {colunas} ON viagens
+        WHEN NEW.data_saida IS NOT NULL
+        BEGIN
+        {somar}
+        END
+        ''',
+    ]
+
+
+def reconstruir_resumos(conn):
+    """
+    Recalcula os resumos a partir de todas as viagens. Não controla a
+    transação: quem chama decide (a migração já roda dentro de uma).
+    """
+    somas = ", ".join(f"COALESCE(SUM({origem}), 0)" for origem in METRICAS_RESUMO.values())
+    for tabela, chaves in TABELAS_RESUMO.items():
+        agrupamento = ", ".join(["data_saida"] + [f"COALESCE({chave}, '')" for chave in chaves])
+        conn.execute(f"DELETE FROM {tabela}")
+        conn.execute(f'''
+            INSERT INTO {tabela} (data, {"".join(chave + ", " for chave in chaves)}viagens, {", ".join(METRICAS_RESUMO)})
+            SELECT {agrupamento}, COUNT(*), {somas}
+            FROM viagens
+            WHERE data_saida IS NOT NULL
+            GROUP BY {agrupamento}
+        ''')
+
+
+# Passos da migração que cria os resumos (ver src/database/migrations.py)
+RESUMOS_DIARIOS = (
+    [_criar_tabela(tabela, chaves) for tabela, chaves in TABELAS_RESUMO.items()]
+    + _triggers()
+    + [reconstruir_resumos]
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manutenção dos resumos diários das viagens")
+    parser.add_argument("comando", choices=["reconstruir"])
+    parser.add_argument("--db", help="arquivo SQLite (padrão: DB_PATH)")
+    args = parser.parse_args()
+
+    from src.database.db_manager import DBManager
+
+    db = DBManager(args.db)
+    inicio = time.perf_counter()
+    db.reconstruir_resumos()
+    logger.info(f"[RESUMOS] Resumos diários reconstruídos em {time.perf_counter() - inicio:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Contexto de dados de uma execução da interface.
+
+Cada execução de uma seção do main.py (a página inteira ou só o fragmento
+da seção, ver st.fragment) cria um ContextoDados: as leituras usadas por
+mais de um componente da seção (opções dos filtros, resumo diário, carros
+e motoristas) são feitas uma única vez na execução e compartilhadas. A
+execução seguinte cria um contexto novo e vê as gravações feitas no meio;
+entre execuções, quem evita ir ao banco sem necessidade é o cache de
+consultas do DBManager.
+"""
+from src.services.graficos import preparar_resumo
+
+
+class ContextoDados:
+    def __init__(self, db):
+        self.db = db
+        self._dados = {}
+
+    def _obter(self, nome, carregar):
+        if nome not in self._dados:
+            self._dados[nome] = carregar()
+        return self._dados[nome]
+
+    def opcoes_filtro(self):
+        return self._obter("opcoes_filtro", self.db.obter_opcoes_filtro)
+
+    def resumo(self):
+        """
+        Resumo diário já preparado para os gráficos (ver preparar_resumo).
+        """
+        return self._obter("resumo", lambda: preparar_resumo(self.db.obter_resumo_diario()))
+
+    def carros(self):
+        return self._obter("carros", self.db.obter_carros)
+
+    def motoristas(self):
+        return self._obter("motoristas", self.db.obter_motoristas)
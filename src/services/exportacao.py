@@ -0,0 +1,94 @@
+"""
+Exportação das viagens filtradas em XLSX, CSV ou Parquet.
+
+O arquivo só é gerado quando pedido e as linhas vêm do cursor SQL em lotes
+(DBManager.iterar_viagens), sem montar um DataFrame: o XLSX é escrito pelo
+XlsxWriter em modo constant_memory e o Parquet em grupos de linhas, de modo
+que o pico de memória não depende da quantidade de viagens.
+"""
+import csv
+import io
+
+# formato -> (extensão, tipo MIME)
+FORMATOS_EXPORTACAO = {
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+# Colunas de texto da exportação; as demais são numéricas (ID é inteiro)
+COLUNAS_TEXTO = {"Carro", "Data de Saída", "Data de Retorno", "Motorista",
+                 "Endereço de Origem", "Endereço de Destino"}
+
+
+def _xlsx(colunas, lotes, saida):
+    import xlsxwriter
+
+    livro = xlsxwriter.Workbook(saida, {"constant_memory": True})
+    planilha = livro.add_worksheet("Viagens")
+    negrito = livro.add_format({"bold": True})
+    planilha.write_row(0, 0, colunas, negrito)
+    linha = 1
+    for lote in lotes:
+        for valores in lote:
+            planilha.write_row(linha, 0, valores)
+            linha += 1
+    livro.close()
+    return linha - 1
+
+
+def _csv(colunas, lotes, saida):
+    texto = io.TextIOWrapper(saida, encoding="utf-8-sig", newline="")
+    escritor = csv.writer(texto, delimiter=";")
+    escritor.writerow(colunas)
+    total = 0
+    for lote in lotes:
+        escritor.writerows(lote)
+        total += len(lote)
+    texto.flush()
+    texto.detach()
+    return total
+
+
+def _parquet(colunas, lotes, saida):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tipos = [pa.int64() if nome == "ID" else pa.string() if nome in COLUNAS_TEXTO else pa.float64()
+             for nome in colunas]
+    schema = pa.schema(list(zip(colunas, tipos)))
+    total = 0
+    with pq.ParquetWriter(saida, schema, compression="snappy") as escritor:
+        for lote in lotes:
+            arrays = [pa.array(valores, type=tipo) for valores, tipo in zip(zip(*lote), tipos)]
+            escritor.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            total += len(lote)
+    return total
+
+
+ESCRITORES = {"xlsx": _xlsx, "csv": _csv, "parquet": _parquet}
+
+
+def exportar_viagens(db, saida, formato="xlsx", filtros=None, ordem="-data_saida", tamanho_lote=5000):
+    """
+    Escreve as viagens filtradas em saida (caminho ou arquivo binário aberto)
+    no formato informado e retorna a quantidade de linhas exportadas.
+    """
+    if formato not in ESCRITORES:
+        raise ValueError(f"Formato de exportação inválido: {formato}")
+    colunas, lotes = db.iterar_viagens(filtros, ordem=ordem, tamanho_lote=tamanho_lote)
+    if formato == "csv" and isinstance(saida, str):
+        with open(saida, "wb") as arquivo:
+            return _csv(colunas, lotes, arquivo)
+    return ESCRITORES[formato](colunas, lotes, saida)
+
+
+def exportar_viagens_bytes(db, formato="xlsx", filtros=None, ordem="-data_saida"):
+    """
+    Gera o arquivo em memória, pronto para st.download_button.
+    Retorna (bytes, nome do arquivo, tipo MIME).
+    """
+    saida = io.BytesIO()
+    exportar_viagens(db, saida, formato, filtros, ordem)
+    extensao, mime = FORMATOS_EXPORTACAO[formato]
+    return saida.getvalue(), f"viagens_com_enderecos.{extensao}", mime
@@ -0,0 +1,161 @@
+"""
+Previsão do número de viagens por dia.
+
+A série diária vem do resumo mantido por triggers (DBManager.obter_resumo_diario),
+reamostrada para todos os dias do período com zero nos dias sem viagens.
+Três modelos são ajustados e comparados por backtest (origem móvel):
+
+- Linear: reta ajustada por mínimos quadrados sobre o índice do dia;
+- Sazonal semanal ingênuo: repete a última semana observada;
+- Suavização exponencial: Holt (nível + tendência), com alfa e beta
+  escolhidos pelo menor erro de um passo dentro da amostra.
+
+O resultado fica no cache de consultas do banco, indexado pela versão dos
+dados de viagens: enquanto nenhuma viagem mudar, os reruns não reajustam.
+"""
+import numpy as np
+import pandas as pd
+
+# Dias mínimos de histórico usados para ajustar os modelos em cada janela do backtest
+MINIMO_TREINO = 14
+
+
+def serie_diaria(resumo, coluna="Número de Viagens"):
+    """
+    Série diária (índice de datas contínuo) da coluna do resumo, com zero
+    nos dias sem viagens.
+    """
+    serie = pd.Series(resumo[coluna].to_numpy(dtype=float), index=resumo["Data de Saída"])
+    serie = serie[serie.index.notna()]
+    if serie.empty:
+        return serie
+    return serie.groupby(level=0).sum().asfreq("D", fill_value=0.0)
+
+
+class ModeloLinear:
+    nome = "Linear"
+
+    def ajustar(self, valores):
+        dias = np.arange(len(valores))
+        self.coeficientes = np.polyfit(dias, valores, 1) if len(valores) > 1 else np.array([0.0, valores[-1]])
+        self.n = len(valores)
+        return self
+
+    def prever(self, horizonte):
+        dias = np.arange(self.n, self.n + horizonte)
+        return np.clip(np.polyval(self.coeficientes, dias), 0, None)
+
+
+class ModeloSazonalIngenuo:
+    nome = "Sazonal semanal"
+    periodo = 7
+
+    def ajustar(self, valores):
+        self.ultima_semana = np.asarray(valores[-self.periodo:], dtype=float)
+        return self
+
+    def prever(self, horizonte):
+        return np.resize(self.ultima_semana, horizonte)
+
+
+class ModeloSuavizacaoExponencial:
+    nome = "Suavização exponencial"
+    alfas = (0.05, 0.1, 0.2, 0.3, 0.5)
+    betas = (0.0, 0.01, 0.05)
+
+    @staticmethod
+    def _holt(valores, alfa, beta):
+        """
+        Retorna (nível, tendência, soma dos erros quadráticos de um passo).
+        """
+        nivel, tendencia, erro = valores[0], 0.0, 0.0
+        for valor in valores[1:]:
+            previsto = nivel + tendencia
+            erro += (valor - previsto) ** 2
+            novo_nivel = alfa * valor + (1 - alfa) * previsto
+            tendencia = beta * (novo_nivel - nivel) + (1 - beta) * tendencia
+            nivel = novo_nivel
+        return nivel, tendencia, erro
+
+    def ajustar(self, valores):
+        valores = [float(v) for v in valores]
+        melhor = None
+        for alfa in self.alfas:
+            for beta in self.betas:
+                nivel, tendencia, erro = self._holt(valores, alfa, beta)
+                if melhor is None or erro < melhor[0]:
+                    melhor = (erro, alfa, beta, nivel, tendencia)
+        _, self.alfa, self.beta, self.nivel, self.tendencia = melhor
+        return self
+
+    def prever(self, horizonte):
+        return np.clip(self.nivel + self.tendencia * np.arange(1, horizonte + 1), 0, None)
+
+
+MODELOS = (ModeloLinear, ModeloSazonalIngenuo, ModeloSuavizacaoExponencial)
+
+
+def backtest(valores, modelo, horizonte, janelas=3):
+    """
+    Erro do modelo em janelas de origem móvel: para cada janela o modelo é
+    ajustado com os dias anteriores e comparado aos horizonte dias seguintes.
+    Retorna {"MAE", "RMSE", "janelas"} (erros NaN se o histórico for curto).
+    """
+    janelas = min(janelas, (len(valores) - MINIMO_TREINO) // horizonte)
+    if janelas < 1:
+        return {"MAE": np.nan, "RMSE": np.nan, "janelas": 0}
+    erros = []
+    for janela in range(janelas, 0, -1):
+        corte = len(valores) - janela * horizonte
+        previsto = modelo().ajustar(valores[:corte]).prever(horizonte)
+        erros.append(valores[corte:corte + horizonte] - previsto)
+    erros = np.concatenate(erros)
+    return {"MAE": float(np.abs(erros).mean()), "RMSE": float(np.sqrt((erros ** 2).mean())), "janelas": janelas}
+
+
+def calcular_previsao(serie, horizonte=30, modelos=MODELOS):
+    """
+    Ajusta os modelos à série diária e prevê os próximos horizonte dias.
+
+    Retorna um dicionário com "historico" (DataFrame Data/Viagens),
+    "previsoes" (DataFrame Data/Modelo/Previsão), "erros" (DataFrame com o
+    backtest de cada modelo) e "melhor" (nome do modelo de menor MAE),
+    ou None se houver menos de dois dias de histórico.
+    """
+    if len(serie) < 2:
+        return None
+    valores = serie.to_numpy(dtype=float)
+    datas_futuras = pd.date_range(serie.index[-1] + pd.Timedelta(days=1), periods=horizonte, freq="D")
+
+    previsoes, erros = [], []
+    for modelo in modelos:
+        previsoes.append(pd.DataFrame({
+            "Data": datas_futuras,
+            "Modelo": modelo.nome,
+            "Previsão": modelo().ajustar(valores).prever(horizonte),
+        }))
+        erros.append({"Modelo": modelo.nome, **backtest(valores, modelo, horizonte)})
+
+    erros = pd.DataFrame(erros)
+    melhor = (erros.loc[erros["MAE"].idxmin(), "Modelo"] if erros["MAE"].notna().any()
+              else modelos[0].nome)
+    return {
+        "historico": pd.DataFrame({"Data": serie.index, "Viagens": valores}),
+        "previsoes": pd.concat(previsoes, ignore_index=True),
+        "erros": erros.sort_values("MAE").reset_index(drop=True),
+        "melhor": melhor,
+    }
+
+
+def prever_viagens(db, horizonte=30, carro=None, motorista=None):
+    """
+    Previsão do número de viagens por dia (de todas as viagens ou de um
+    carro e/ou motorista), guardada no cache de consultas do banco e
+    recalculada apenas quando a tabela viagens mudar.
+    """
+    def carregar():
+        resumo = db.obter_resumo_diario(carro=carro, motorista=motorista)
+        return calcular_previsao(serie_diaria(resumo), horizonte)
+
+    chave = ("prever_viagens", int(horizonte), carro, motorista)
+    return db.cache.obter(chave, ("viagens",), carregar)
@@ -0,0 +1,113 @@
+"""
+Preparação dos dados dos gráficos da aba "Gráficos".
+
+Os gráficos por data (1, 2 e 5) partem do resumo diário mantido por
+triggers (DBManager.obter_resumo_diario), com uma linha por dia, em vez de
+agregar todas as viagens em pandas. As séries longas são reduzidas com LTTB
+(Largest-Triangle-Three-Buckets), a dispersão usa uma amostra estratificada
+e o histograma e a densidade chegam prontos do SQL, de modo que o tamanho
+dos dados enviados ao navegador não depende do tamanho do histórico.
+A previsão do gráfico 6 fica em src/services/forecast.py.
+"""
+import numpy as np
+import pandas as pd
+
+# Categorias de custo exibidas nos gráficos de distribuição e evolução
+COLUNAS_CUSTOS = ["Valor do Pedágio", "Despesas Extras", "Diária do Motorista", "Valor do Combustível"]
+
+# Máximo de pontos por série temporal e de viagens nos gráficos de dispersão
+LIMITE_PONTOS_SERIE = 1000
+LIMITE_PONTOS_DISPERSAO = 2000
+
+
+def _eixo_numerico(valores):
+    """
+    Converte datas em números (dias) para os cálculos do LTTB.
+    """
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.datetime64):
+        return valores.astype("datetime64[D]").astype(float)
+    return valores.astype(float)
+
+
+def lttb_indices(x, y, limite):
+    """
+    Índices dos pontos mantidos pelo LTTB: o primeiro, o último e, em cada
+    um dos limite - 2 grupos intermediários, o ponto que forma o maior
+    triângulo com o ponto escolhido no grupo anterior e a média do próximo.
+    x deve estar em ordem crescente.
+    """
+    n = len(x)
+    if limite >= n or limite < 3:
+        return np.arange(n)
+    x = _eixo_numerico(x)
+    y = np.asarray(y, dtype=float)
+    limites = np.linspace(1, n - 1, limite - 1).astype(int)
+    indices = np.empty(limite, dtype=int)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for grupo in range(limite - 2):
+        inicio, fim = limites[grupo], limites[grupo + 1]
+        proximo_fim = limites[grupo + 2] if grupo + 2 < len(limites) else n
+        media_x = x[fim:proximo_fim].mean()
+        media_y = y[fim:proximo_fim].mean()
+        areas = np.abs((x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+                       - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior]))
+        anterior = inicio + int(areas.argmax())
+        indices[grupo + 1] = anterior
+    return indices
+
+
+def reduzir_serie(df, coluna_x, coluna_y, limite=LIMITE_PONTOS_SERIE):
+    """
+    Reduz um DataFrame ordenado por coluna_x a no máximo limite linhas com
+    LTTB sobre coluna_y (as demais colunas acompanham as linhas escolhidas).
+    """
+    if len(df) <= limite:
+        return df
+    return df.iloc[lttb_indices(df[coluna_x].to_numpy(), df[coluna_y].to_numpy(), limite)]
+
+
+def preparar_resumo(resumo):
+    """
+    Descarta as linhas do resumo diário sem data válida (a coluna
+    "Data de Saída" já vem como datetime de obter_resumo_diario).
+    """
+    return resumo.dropna(subset=["Data de Saída"]).reset_index(drop=True)
+
+
+def dados_evolucao_diaria(resumo, limite=LIMITE_PONTOS_SERIE):
+    """
+    Gráfico 1: Total de KM, Valor Total e Valor do Combustível por dia,
+    no formato longo (Data de Saída, Métrica, Valor) usado pelo Altair.
+    Cada métrica é reduzida com LTTB a no máximo limite pontos.
+    """
+    series = []
+    for metrica in ["Total de KM", "Valor Total da Viagem", "Valor do Combustível"]:
+        serie = reduzir_serie(resumo[["Data de Saída", metrica]], "Data de Saída", metrica, limite)
+        series.append(serie.rename(columns={metrica: "Valor"}).assign(**{"Métrica": metrica}))
+    return pd.concat(series, ignore_index=True)[["Data de Saída", "Métrica", "Valor"]]
+
+
+def dados_distribuicao_custos(resumo):
+    """
+    Gráfico 2: total e percentual de cada categoria de custo.
+    """
+    custos = pd.DataFrame({
+        "Categoria": ["Pedágio", "Despesa Extra", "Diária do Motorista", "Valor do Combustível"],
+        "Valor": [resumo[coluna].sum() for coluna in COLUNAS_CUSTOS]
+    })
+    custos["Percentual"] = (custos["Valor"] / custos["Valor"].sum()) * 100
+    return custos
+
+
+def dados_custos_por_data(resumo, limite=LIMITE_PONTOS_SERIE):
+    """
+    Gráfico 5: categorias de custo por dia. Como as áreas são empilhadas,
+    os dias mantidos são escolhidos com LTTB sobre o custo total do dia.
+    """
+    custos = resumo[["Data de Saída"] + COLUNAS_CUSTOS]
+    if len(custos) <= limite:
+        return custos
+    total = custos[COLUNAS_CUSTOS].sum(axis=1).to_numpy()
+    return custos.iloc[lttb_indices(custos["Data de Saída"].to_numpy(), total, limite)]
@@ -0,0 +1,346 @@
+"""
+Importação em lote do histórico de viagens (planilhas XLSX ou CSV).
+
+Lê a planilha em fluxo (openpyxl em modo read_only ou csv.reader), mapeia
+as colunas da planilha legada (Origem/Destino, K-Saída/K-Chegada, Diesel
+S10/S500, Pedágio, Diária...) e também as colunas exportadas pelo próprio
+sistema, cria endereços, carros e motoristas que ainda não existem e insere
+as viagens com executemany. Cada lote é um pedido ao escritor único do
+DBManager (ver src/database/escritor.py), gravado enquanto o lote seguinte
+é lido e convertido; a importação não disputa o banco com as gravações das
+sessões do Streamlit.
+
+Uso:
+    python -m src.services.importacao planilha.xlsx [--aba Viagens] [--lote 5000]
+"""
+import argparse
+import csv
+import io
+import os
+import time
+
+from loguru import logger
+
+from src.database.datas import normalizar_data
+from src.database.db_manager import INSERIR_VIAGEM_SQL, TABELAS_VIAGENS, DBManager
+from src.database.enderecos import UPSERT_ENDERECO_SQL, UPSERT_LOCAL_SQL, normalizar_endereco
+from src.utils.cep import normalizar_cep
+from src.utils.utils import normalizar_texto
+
+# Campo da viagem -> cabeçalhos aceitos (já normalizados: minúsculas, sem acentos)
+COLUNAS_PLANILHA = {
+    "origem": ("origem", "endereco de origem"),
+    "destino": ("destino", "endereco de destino"),
+    "carro": ("carro", "veiculo"),
+    "km_saida": ("k-saida", "k saida", "km saida", "km-saida", "quilometragem de saida"),
+    "km_chegada": ("k-chegada", "k chegada", "km chegada", "km-chegada", "quilometragem de chegada"),
+    "total_km": ("total", "total km", "total de km"),
+    "data_saida": ("data da saida", "data de saida", "data saida"),
+    "data_volta": ("data da volta", "data de retorno", "data volta"),
+    "valor": ("valor", "valor da viagem", "preco por litro", "valor (preco por litro)"),
+    "motorista": ("motorista",),
+    "diaria_motorista": ("diaria do motorista", "diaria motorista", "diaria"),
+    "despesa_extra": ("despesa extra", "despesas extras"),
+    "diesel_s10": ("oleo diesel s10", "diesel s10", "diesel s10 (litros)"),
+    "diesel_s500": ("oleo diesel s500", "diesel s500", "diesel s500 (litros)"),
+    "pedagio": ("pedagio", "valor do pedagio"),
+}
+CAMPOS_OBRIGATORIOS = ("origem", "destino", "data_saida")
+CAMPOS_ENDERECO = ("cep", "logradouro", "complemento", "bairro", "localidade", "uf", "numero")
+MAX_ERROS_RELATORIO = 1000
+
+
+def _numero(valor):
+    """
+    Converte números da planilha (inclusive "R$ 1.234,56") em float; vazio vira 0.
+    """
+    if valor is None or valor == "":
+        return 0.0
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = str(valor).replace("R$", "").replace(" ", "").strip()
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    return float(texto) if texto else 0.0
+
+
+def _endereco(texto):
+    """
+    Converte o texto de origem/destino em campos de endereço. Aceita o rótulo
+    exportado pelo sistema ("cep, logradouro, complemento, bairro, localidade,
+    uf, número"); qualquer outro texto é tratado como a localidade.
+    """
+    texto = str(texto).strip()
+    partes = [parte.strip() for parte in texto.split(",")]
+    if len(partes) == len(CAMPOS_ENDERECO) and normalizar_cep(partes[0]):
+        return tuple(partes)
+    return ("", "", "", "", texto, "", "")
+
+
+def _chave_endereco(campos):
+    return tuple(normalizar_texto(campo) for campo in campos)
+
+
+def _ler_xlsx(arquivo, aba=None):
+    from openpyxl import load_workbook
+
+    livro = load_workbook(arquivo, read_only=True, data_only=True)
+    try:
+        planilha = livro[aba] if aba else livro.active
+        yield from planilha.iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+
+def _ler_csv(arquivo, encoding="utf-8-sig"):
+    if isinstance(arquivo, (str, os.PathLike)):
+        arquivo = open(arquivo, newline="", encoding=encoding)
+    elif not isinstance(arquivo, io.TextIOBase):
+        arquivo = io.TextIOWrapper(arquivo, encoding=encoding, newline="")
+    with arquivo:
+        amostra = arquivo.read(8192)
+        arquivo.seek(0)
+        delimitador = csv.Sniffer().sniff(amostra, delimiters=",;\t").delimiter
+        yield from csv.reader(arquivo, delimiter=delimitador)
+
+
+def _mapear_cabecalho(linha):
+    """
+    Retorna {campo: índice da coluna} se a linha parecer um cabeçalho.
+    """
+    nomes = {normalizar_texto(nome): i for i, nome in enumerate(linha) if nome not in (None, "")}
+    mapa = {}
+    for campo, aceitos in COLUNAS_PLANILHA.items():
+        indice = next((nomes[nome] for nome in aceitos if nome in nomes), None)
+        if indice is not None:
+            mapa[campo] = indice
+    return mapa if len(mapa) >= 3 else None
+
+
+class ImportadorViagens:
+    """
+    Importa viagens em lote para o banco do DBManager informado.
+    Endereços, origens, destinos, carros e motoristas já cadastrados são
+    reaproveitados; os que faltam são criados durante a importação.
+    """
+
+    def __init__(self, db=None, tamanho_lote=5000):
+        self.db = db or DBManager()
+        self.tamanho_lote = tamanho_lote
+        self._campos = {}
+        self._enderecos = {}
+        self._ids_enderecos = set()
+        self._locais = {"origens": {}, "destinos": {}}
+        self._carros = set()
+        self._motoristas = set()
+
+    def _carregar_existentes(self, conn):
+        for row in conn.execute(f"SELECT id, {', '.join(CAMPOS_ENDERECO)} FROM enderecos"):
+            self._enderecos.setdefault(_chave_endereco(row[1:]), row[0])
+            self._ids_enderecos.add(row[0])
+        for tabela, destino in self._locais.items():
+            for id_, endereco_id in conn.execute(f"SELECT id, endereco_id FROM {tabela}"):
+                destino.setdefault(endereco_id, id_)
+        self._carros = {row[0] for row in conn.execute("SELECT nome FROM carros")}
+        self._motoristas = {row[0] for row in conn.execute("SELECT nome FROM motoristas")}
+
+    def _campos_endereco(self, texto):
+        campos = self._campos.get(texto)
+        if campos is None:
+            campos = self._campos[texto] = normalizar_endereco(*_endereco(texto))
+        return campos
+
+    def _converter(self, valores):
+        """
+        Valida e converte uma linha da planilha em (campos do endereço de
+        origem, campos do endereço de destino, tupla de INSERIR_VIAGEM_SQL
+        sem origem_id e destino_id). Não grava nada: os cadastros que faltam
+        são criados na gravação do lote.
+        """
+        for campo in CAMPOS_OBRIGATORIOS:
+            if valores.get(campo) in (None, ""):
+                raise ValueError(f"campo obrigatório vazio: {campo}")
+
+        data_saida = normalizar_data(valores["data_saida"])
+        data_volta = normalizar_data(valores.get("data_volta")) or data_saida
+        km_saida = _numero(valores.get("km_saida"))
+        km_chegada = _numero(valores.get("km_chegada"))
+        # Só o total de KM da planilha é gravado; sem ele, o SQLite usa a quilometragem
+        km_informado = _numero(valores.get("total_km")) or None
+        diesel_s10 = _numero(valores.get("diesel_s10"))
+        diesel_s500 = _numero(valores.get("diesel_s500"))
+        valor = _numero(valores.get("valor"))
+        pedagio = _numero(valores.get("pedagio"))
+        diaria_motorista = _numero(valores.get("diaria_motorista"))
+        despesa_extra = _numero(valores.get("despesa_extra"))
+
+        carro = str(valores.get("carro") or "").strip()
+        motorista = str(valores.get("motorista") or "").strip()
+        return (self._campos_endereco(valores["origem"]), self._campos_endereco(valores["destino"]),
+                (carro, km_saida, km_chegada, data_saida, data_volta, valor, motorista, diaria_motorista,
+                 despesa_extra, diesel_s10, diesel_s500, pedagio, km_informado))
+
+    def _gravar_lote(self, conn, lote):
+        """
+        Pedido do escritor: cria os cadastros que faltam e insere as viagens
+        do lote. Os ids criados ficam em "novos" e só entram nos mapas do
+        importador depois do commit (ver _registrar_lote), já que o escritor
+        pode desfazer e repetir o lote. Retorna (novos, contadores).
+        """
+        novos = {"enderecos": {}, "origens": {}, "destinos": {}, "carros": set(), "motoristas": set()}
+        contadores = dict.fromkeys(("enderecos_criados", "origens_criadas", "destinos_criados",
+                                    "carros_criados", "motoristas_criados"), 0)
+
+        def local_id(campos, tabela, contador):
+            chave = _chave_endereco(campos)
+            endereco_id = self._enderecos.get(chave) or novos["enderecos"].get(chave)
+            if endereco_id is None:
+                # UPSERT: o mesmo CEP + número + complemento escrito de outra forma
+                # reaproveita o endereço já cadastrado
+                endereco_id = conn.execute(UPSERT_ENDERECO_SQL, campos).fetchone()[0]
+                if endereco_id not in self._ids_enderecos and endereco_id not in novos["enderecos"].values():
+                    contadores["enderecos_criados"] += 1
+                novos["enderecos"][chave] = endereco_id
+            id_ = self._locais[tabela].get(endereco_id) or novos[tabela].get(endereco_id)
+            if id_ is None:
+                id_ = novos[tabela][endereco_id] = conn.execute(
+                    UPSERT_LOCAL_SQL.format(tabela=tabela), (endereco_id,)).fetchone()[0]
+                contadores[contador] += 1
+            return id_
+
+        linhas = []
+        for origem, destino, viagem in lote:
+            carro, motorista = viagem[0], viagem[6]
+            for nome, tabela, existentes in ((carro, "carros", self._carros),
+                                             (motorista, "motoristas", self._motoristas)):
+                if nome and nome not in existentes and nome not in novos[tabela]:
+                    conn.execute(f"INSERT OR IGNORE INTO {tabela} (nome) VALUES (?)", (nome,))
+                    novos[tabela].add(nome)
+                    contadores[f"{tabela}_criados"] += 1
+            linhas.append((local_id(origem, "origens", "origens_criadas"),
+                           local_id(destino, "destinos", "destinos_criados"), *viagem))
+        conn.executemany(INSERIR_VIAGEM_SQL, linhas)
+        contadores["importadas"] = len(linhas)
+        return novos, contadores
+
+    def _registrar_lote(self, futuro, relatorio):
+        """
+        Espera a gravação do lote e incorpora os ids criados e os contadores.
+        """
+        novos, contadores = futuro.result()
+        self._enderecos.update(novos["enderecos"])
+        self._ids_enderecos.update(novos["enderecos"].values())
+        for tabela in self._locais:
+            self._locais[tabela].update(novos[tabela])
+        self._carros |= novos["carros"]
+        self._motoristas |= novos["motoristas"]
+        for chave, quantidade in contadores.items():
+            relatorio[chave] += quantidade
+
+    def _enviar_lote(self, lote, pendentes, relatorio):
+        """
+        Conclui o lote anterior (em pendentes) e envia o lote ao escritor;
+        o lote enviado passa a ser o pendente.
+        """
+        self._concluir(pendentes, relatorio)
+        pendentes.append(self.db.escritor.enviar(lambda conn: self._gravar_lote(conn, lote),
+                                                 *TABELAS_VIAGENS, "carros", "motoristas"))
+
+    def _concluir(self, pendentes, relatorio):
+        while pendentes:
+            self._registrar_lote(pendentes.pop(), relatorio)
+
+    def importar_linhas(self, linhas):
+        """
+        Importa as viagens de um iterável de linhas (a primeira linha que
+        parecer um cabeçalho define o mapeamento das colunas) e retorna o
+        relatório da importação.
+        """
+        inicio = time.perf_counter()
+        relatorio = {
+            "linhas_lidas": 0, "importadas": 0, "rejeitadas": 0,
+            "enderecos_criados": 0, "origens_criadas": 0, "destinos_criados": 0,
+            "carros_criados": 0, "motoristas_criados": 0,
+            "colunas": {}, "erros": [], "segundos": 0.0,
+        }
+        self._carregar_existentes(self.db._conexao())
+
+        mapa = None
+        lote = []
+        # Um lote é gravado pelo escritor enquanto o seguinte é convertido
+        pendentes = []
+        try:
+            for numero_linha, linha in enumerate(linhas, start=1):
+                if mapa is None:
+                    mapa = _mapear_cabecalho(linha)
+                    if mapa:
+                        relatorio["colunas"] = {campo: linha[i] for campo, i in mapa.items()}
+                    continue
+                if not any(celula not in (None, "") for celula in linha):
+                    continue
+
+                relatorio["linhas_lidas"] += 1
+                valores = {campo: linha[i] if i < len(linha) else None for campo, i in mapa.items()}
+                try:
+                    lote.append(self._converter(valores))
+                except (ValueError, TypeError) as erro:
+                    relatorio["rejeitadas"] += 1
+                    if len(relatorio["erros"]) < MAX_ERROS_RELATORIO:
+                        relatorio["erros"].append({"linha": numero_linha, "erro": str(erro)})
+                    continue
+
+                if len(lote) >= self.tamanho_lote:
+                    self._enviar_lote(lote, pendentes, relatorio)
+                    lote = []
+            if lote:
+                self._enviar_lote(lote, pendentes, relatorio)
+        finally:
+            # O lote já enviado é gravado mesmo se a leitura falhar
+            self._concluir(pendentes, relatorio)
+
+        if mapa is None:
+            raise ValueError("Cabeçalho da planilha não encontrado (esperado: Origem, Destino, Data da Saída...).")
+        faltando = [campo for campo in CAMPOS_OBRIGATORIOS if campo not in mapa]
+        if faltando:
+            logger.warning(f"[IMPORTACAO] Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+        relatorio["segundos"] = time.perf_counter() - inicio
+        logger.info(
+            f"[IMPORTACAO] {relatorio['importadas']} viagens importadas, "
+            f"{relatorio['rejeitadas']} rejeitadas em {relatorio['segundos']:.1f} s"
+        )
+        return relatorio
+
+    def importar_arquivo(self, arquivo, nome=None, aba=None):
+        """
+        Importa um arquivo XLSX ou CSV (caminho ou arquivo aberto em modo binário).
+        O formato é definido pela extensão de nome (ou do próprio caminho).
+        """
+        nome = nome or str(arquivo)
+        if nome.lower().endswith((".xlsx", ".xlsm")):
+            return self.importar_linhas(_ler_xlsx(arquivo, aba))
+        if nome.lower().endswith((".csv", ".txt")):
+            return self.importar_linhas(_ler_csv(arquivo))
+        raise ValueError(f"Formato não suportado: {nome} (use XLSX ou CSV)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa o histórico de viagens de uma planilha XLSX ou CSV")
+    parser.add_argument("arquivo")
+    parser.add_argument("--aba", default=None, help="nome da aba (XLSX); padrão: aba ativa")
+    parser.add_argument("--lote", type=int, default=5000, help="viagens por pedido ao escritor")
+    args = parser.parse_args()
+
+    relatorio = ImportadorViagens(tamanho_lote=args.lote).importar_arquivo(args.arquivo, aba=args.aba)
+    print(f"Linhas lidas: {relatorio['linhas_lidas']}")
+    print(f"Viagens importadas: {relatorio['importadas']}")
+    print(f"Linhas rejeitadas: {relatorio['rejeitadas']}")
+    print(f"Endereços criados: {relatorio['enderecos_criados']}, carros: {relatorio['carros_criados']}, "
+          f"motoristas: {relatorio['motoristas_criados']}")
+    print(f"Tempo: {relatorio['segundos']:.1f} s")
+    for erro in relatorio["erros"][:20]:
+        print(f"  linha {erro['linha']}: {erro['erro']}")
+
+
+if __name__ == "__main__":
+    main()
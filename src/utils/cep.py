@@ -1,16 +1,232 @@
-import requests
+import json
+import re
+import threading
+import time
+from collections import deque
+
+from loguru import logger
+
+from src.config.config import Config
+from src.database.db_manager import DBManager
+
+CAMPOS_CEP = ["cep", "logradouro", "complemento", "bairro", "localidade", "uf"]
+
+
+def normalizar_cep(cep):
+    """
+    Retorna o CEP apenas com os 8 dígitos, ou None se o formato for inválido.
+    """
+    cep = str(cep or "")
+    if len(cep) == 8 and cep.isascii() and cep.isdigit():
+        return cep
+    digitos = re.sub(r"\D", "", cep)
+    return digitos if len(digitos) == 8 else None
+
+
+class ViaCepBackend:
+    """
+    Backend HTTP da API ViaCEP, com sessão reutilizada (keep-alive), timeouts
+    de conexão/leitura e novas tentativas limitadas com espera exponencial.
+    A URL base é configurável, o que permite apontar para um servidor local
+    nos testes.
+    """
+
+    def __init__(self, base_url=None, timeout=None, tentativas=None, backoff=None):
+        # Import local: requests só é carregado na primeira consulta de CEP
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.base_url = (base_url or Config.CEP_API_URL).rstrip("/")
+        self.timeout = timeout or (Config.CEP_TIMEOUT_CONEXAO, Config.CEP_TIMEOUT_LEITURA)
+        retry = Retry(
+            total=Config.CEP_TENTATIVAS if tentativas is None else tentativas,
+            backoff_factor=Config.CEP_BACKOFF if backoff is None else backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=("GET",),
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=16)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def consultar(self, cep):
+        """
+        Retorna o dicionário do endereço ou None se o CEP não existir.
+        Falhas de rede propagam requests.RequestException.
+        """
+        response = self.session.get(f"{self.base_url}/{cep}/json/", timeout=self.timeout)
+        if response.status_code == 200:
+            data = response.json()
+            if "erro" not in data:
+                return {key: data.get(key, "") for key in CAMPOS_CEP}
+            return None
+        if response.status_code in (400, 404):
+            return None
+        response.raise_for_status()
+        return None
+
+
+def _avisar_falha_cache(futuro):
+    if futuro.exception() is not None:
+        logger.warning(f"[CEP] Falha ao guardar a consulta no cache: {futuro.exception()}")
+
+
+class CepCache:
+    """
+    Cache persistente das consultas de CEP na tabela cep_cache do SQLite.
+    CEPs inexistentes também são guardados (cache negativo), com validade menor.
+    As gravações passam pelo escritor único do DBManager informado.
+    """
+
+    def __init__(self, db=None, ttl=None, ttl_negativo=None):
+        self.db = db or DBManager()
+        self.ttl = Config.CEP_CACHE_TTL if ttl is None else ttl
+        self.ttl_negativo = Config.CEP_CACHE_TTL_NEGATIVO if ttl_negativo is None else ttl_negativo
+
+    def obter(self, cep):
+        """
+        Retorna (encontrado, dados). encontrado é False se o CEP não está no
+        cache ou expirou; dados é None para CEPs inexistentes.
+        """
+        conn = self.db._conexao()
+        row = conn.execute(
+            "SELECT dados, atualizado_em FROM cep_cache WHERE cep = ?", (cep,)
+        ).fetchone()
+        if row is None:
+            return False, None
+        dados, atualizado_em = row
+        validade = self.ttl if dados is not None else self.ttl_negativo
+        if time.time() - atualizado_em > validade:
+            return False, None
+        return True, (json.loads(dados) if dados is not None else None)
+
+    def guardar(self, cep, dados):
+        """
+        Enfileira a gravação no escritor sem esperá-la: quem consultou já tem
+        o endereço, e uma gravação perdida só faz o CEP ir à API de novo.
+        """
+        parametros = (cep, json.dumps(dados, ensure_ascii=False) if dados is not None else None, time.time())
+        futuro = self.db.escritor.enviar(lambda conn: conn.execute(
+            "INSERT OR REPLACE INTO cep_cache (cep, dados, atualizado_em) VALUES (?, ?, ?)", parametros), "cep_cache")
+        futuro.add_done_callback(_avisar_falha_cache)
+
+
+class ServicoCep:
+    """
+    Consulta de CEP com cache local na frente do backend (ViaCEP por padrão),
+    registrando a taxa de acerto do cache e a latência das chamadas externas.
+
+    Com uma base offline (CepOfflineBackend), modo_offline define o uso:
+    "preferir" consulta a base local antes de tudo e "fallback" só a usa
+    quando a API estiver indisponível.
+    """
+
+    def __init__(self, backend=None, cache=None, offline=None, modo_offline=None,
+                 amostras_latencia=500):
+        self.backend = backend or ViaCepBackend()
+        self.cache = cache
+        self.offline = offline
+        self.modo_offline = modo_offline or Config.CEP_OFFLINE
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=amostras_latencia)
+        self.consultas = 0
+        self.acertos_cache = 0
+        self.acertos_offline = 0
+        self.chamadas_externas = 0
+        self.erros_externos = 0
+
+    def consultar(self, cep):
+        """
+        Retorna os campos cep, logradouro, complemento, bairro, localidade e uf,
+        ou None se o CEP for inválido, não existir ou a API estiver indisponível.
+        """
+        cep = normalizar_cep(cep)
+        with self._lock:
+            self.consultas += 1
+        if cep is None:
+            return None
+
+        if self.offline is not None and self.modo_offline == "preferir":
+            dados = self._consultar_offline(cep)
+            if dados is not None:
+                return dados
+
+        if self.cache is not None:
+            encontrado, dados = self.cache.obter(cep)
+            if encontrado:
+                with self._lock:
+                    self.acertos_cache += 1
+                return dados
+
+        from requests import RequestException
+
+        inicio = time.perf_counter()
+        try:
+            dados = self.backend.consultar(cep)
+        except RequestException as erro:
+            with self._lock:
+                self.erros_externos += 1
+            logger.warning(f"[CEP] Falha ao consultar o CEP {cep}: {erro}")
+            if self.offline is not None and self.modo_offline == "fallback":
+                return self._consultar_offline(cep)
+            return None
+        finally:
+            with self._lock:
+                self.chamadas_externas += 1
+                self._latencias.append(time.perf_counter() - inicio)
+
+        if self.cache is not None:
+            self.cache.guardar(cep, dados)
+        return dados
+
+    def _consultar_offline(self, cep):
+        dados = self.offline.consultar(cep)
+        if dados is not None:
+            with self._lock:
+                self.acertos_offline += 1
+        return dados
+
+    def estatisticas(self):
+        with self._lock:
+            latencias = sorted(self._latencias)
+            consultas = self.consultas
+            return {
+                "consultas": consultas,
+                "acertos_cache": self.acertos_cache,
+                "taxa_acerto": self.acertos_cache / consultas if consultas else 0.0,
+                "acertos_offline": self.acertos_offline,
+                "chamadas_externas": self.chamadas_externas,
+                "erros_externos": self.erros_externos,
+                "latencia_media": sum(latencias) / len(latencias) if latencias else 0.0,
+                "latencia_p95": latencias[int(0.95 * (len(latencias) - 1))] if latencias else 0.0,
+            }
+
+
+_servico = None
+_servico_lock = threading.Lock()
+
+
+def obter_servico_cep():
+    """
+    Retorna o serviço de CEP padrão do processo (ViaCEP + cache no banco,
+    com a base offline conforme CEP_OFFLINE).
+    """
+    # Import local: cep_offline importa normalizar_cep deste módulo
+    from src.utils.cep_offline import CepOfflineBackend
+
+    global _servico
+    with _servico_lock:
+        if _servico is None:
+            offline = CepOfflineBackend() if Config.CEP_OFFLINE != "desligado" else None
+            _servico = ServicoCep(cache=CepCache(), offline=offline)
+        return _servico
+
 
 def consulta_cep(cep):
     """
     Consulta o CEP na API ViaCEP e retorna os campos:
     cep, logradouro, complemento, bairro, localidade, uf.
+    As respostas ficam em cache no banco (ver ServicoCep).
     """
-    url = f"https://viacep.com.br/ws/{cep}/json/"
-    response = requests.get(url)
-    if response.status_code == 200:
-        data = response.json()
-        if "erro" not in data:
-            keys_desejadas = ["cep", "logradouro", "complemento", "bairro", "localidade", "uf"]
-            dados_filtrados = {key: data.get(key, "") for key in keys_desejadas}
-            return dados_filtrados
-    return None
+    return obter_servico_cep().consultar(cep)
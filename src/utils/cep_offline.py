@@ -0,0 +1,209 @@
+"""
+Base offline de CEPs.
+
+Carrega um arquivo CSV de CEPs em uma tabela local indexada e oferece busca
+exata por CEP e busca por prefixo (autocompletar) por CEP ou por logradouro,
+para cadastrar endereços sem depender da API ViaCEP.
+
+Uso:
+    python -m src.utils.cep_offline carregar ceps.csv
+    python -m src.utils.cep_offline buscar 01001
+    python -m src.utils.cep_offline buscar "praca da se"
+"""
+import argparse
+import csv
+import time
+
+from src.config.config import Config
+from src.database.migrations import aplicar_migracoes
+from src.database.pool import obter_pool
+from src.utils.cep import CAMPOS_CEP, normalizar_cep
+from src.utils.utils import normalizar_texto
+
+# Nomes de coluna aceitos no CSV para cada campo da base
+COLUNAS_CSV = {
+    "cep": ("cep",),
+    "logradouro": ("logradouro", "endereco", "rua"),
+    "complemento": ("complemento",),
+    "bairro": ("bairro",),
+    "localidade": ("localidade", "cidade", "municipio"),
+    "uf": ("uf", "estado"),
+}
+
+
+def _fim_prefixo(prefixo):
+    """
+    Menor texto maior que todos os textos iniciados por prefixo.
+    """
+    return prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+
+
+def _formatar(row):
+    dados = dict(zip(CAMPOS_CEP, row))
+    dados["cep"] = f"{dados['cep'][:5]}-{dados['cep'][5:]}"
+    return dados
+
+
+class CepOfflineBackend:
+    """
+    Backend de CEP sobre a tabela ceps_offline. Implementa consultar(cep),
+    como o ViaCepBackend, e as buscas por prefixo usadas no autocompletar.
+    """
+
+    def __init__(self, db_path=None):
+        self.pool = obter_pool(db_path or Config.DB_PATH)
+        aplicar_migracoes(self.pool.obter_conexao())
+
+    def consultar(self, cep):
+        cep = normalizar_cep(cep)
+        if cep is None:
+            return None
+        row = self.pool.obter_conexao().execute(
+            "SELECT cep, logradouro, complemento, bairro, localidade, uf FROM ceps_offline WHERE cep = ?",
+            (cep,),
+        ).fetchone()
+        return _formatar(row) if row else None
+
+    def buscar_por_cep(self, prefixo, limite=10):
+        """
+        CEPs que começam com os dígitos informados, em ordem crescente.
+        """
+        prefixo = "".join(c for c in str(prefixo) if c.isdigit())[:8]
+        if not prefixo:
+            return []
+        rows = self.pool.obter_conexao().execute('''
+            SELECT cep, logradouro, complemento, bairro, localidade, uf
+            FROM ceps_offline
+            WHERE cep >= ? AND cep < ?
+            ORDER BY cep
+            LIMIT ?
+        ''', (prefixo, _fim_prefixo(prefixo), limite)).fetchall()
+        return [_formatar(row) for row in rows]
+
+    def buscar_por_logradouro(self, prefixo, limite=10):
+        """
+        Endereços cujo logradouro começa com o texto informado
+        (sem diferenciar maiúsculas nem acentos).
+        """
+        prefixo = normalizar_texto(prefixo)
+        if not prefixo:
+            return []
+        rows = self.pool.obter_conexao().execute('''
+            SELECT cep, logradouro, complemento, bairro, localidade, uf
+            FROM ceps_offline
+            WHERE logradouro_busca >= ? AND logradouro_busca < ?
+            ORDER BY logradouro_busca
+            LIMIT ?
+        ''', (prefixo, _fim_prefixo(prefixo), limite)).fetchall()
+        return [_formatar(row) for row in rows]
+
+    def buscar(self, texto, limite=10):
+        """
+        Autocompletar: busca por CEP se o texto tiver apenas dígitos
+        (e hífen), senão por logradouro.
+        """
+        if str(texto).replace("-", "").strip().isdigit():
+            return self.buscar_por_cep(texto, limite)
+        return self.buscar_por_logradouro(texto, limite)
+
+    def total(self):
+        return self.pool.obter_conexao().execute("SELECT COUNT(*) FROM ceps_offline").fetchone()[0]
+
+
+def _ler_linhas(arquivo, delimitador):
+    """
+    Lê o CSV em fluxo, produzindo tuplas prontas para inserção
+    (ou None para linhas com CEP inválido).
+    """
+    leitor = csv.reader(arquivo, delimiter=delimitador)
+    cabecalho = {normalizar_texto(nome): i for i, nome in enumerate(next(leitor, []))}
+    indices = {}
+    for campo, nomes in COLUNAS_CSV.items():
+        indices[campo] = next((cabecalho[n] for n in nomes if n in cabecalho), None)
+    if indices["cep"] is None:
+        raise ValueError("O arquivo CSV precisa de uma coluna 'cep'.")
+
+    i_cep = indices["cep"]
+    i_campos = [indices[campo] for campo in CAMPOS_CEP[1:]]
+    for linha in leitor:
+        cep = normalizar_cep(linha[i_cep]) if i_cep < len(linha) else None
+        if cep is None:
+            yield None
+            continue
+        valores = [linha[i].strip() if i is not None and i < len(linha) else "" for i in i_campos]
+        yield (cep, *valores, normalizar_texto(valores[0]))
+
+
+def carregar_csv(caminho, db_path=None, tamanho_lote=50_000, delimitador=None, encoding="utf-8"):
+    """
+    Carrega (ou atualiza) a base offline a partir de um CSV, lendo o arquivo em
+    fluxo e inserindo lotes com executemany dentro de uma única transação.
+    O índice de logradouro é recriado ao final, o que é mais rápido do que
+    mantê-lo linha a linha. Retorna um dicionário com as linhas carregadas,
+    as rejeitadas e o tempo gasto.
+    """
+    pool = obter_pool(db_path or Config.DB_PATH)
+    conn = pool.obter_conexao()
+    aplicar_migracoes(conn)
+
+    inicio = time.perf_counter()
+    carregadas = rejeitadas = 0
+    with open(caminho, newline="", encoding=encoding) as arquivo:
+        if delimitador is None:
+            delimitador = csv.Sniffer().sniff(arquivo.read(8192), delimiters=",;|\t").delimiter
+            arquivo.seek(0)
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DROP INDEX IF EXISTS idx_ceps_offline_logradouro")
+            lote = []
+            for linha in _ler_linhas(arquivo, delimitador):
+                if linha is None:
+                    rejeitadas += 1
+                    continue
+                lote.append(linha)
+                if len(lote) >= tamanho_lote:
+                    conn.executemany("INSERT OR REPLACE INTO ceps_offline VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+                    carregadas += len(lote)
+                    lote.clear()
+            if lote:
+                conn.executemany("INSERT OR REPLACE INTO ceps_offline VALUES (?, ?, ?, ?, ?, ?, ?)", lote)
+                carregadas += len(lote)
+            conn.execute("CREATE INDEX idx_ceps_offline_logradouro ON ceps_offline(logradouro_busca)")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    return {
+        "carregadas": carregadas,
+        "rejeitadas": rejeitadas,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Base offline de CEPs")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+
+    carregar = subparsers.add_parser("carregar", help="carrega um arquivo CSV de CEPs")
+    carregar.add_argument("arquivo")
+    carregar.add_argument("--delimitador", default=None)
+    carregar.add_argument("--encoding", default="utf-8")
+
+    buscar = subparsers.add_parser("buscar", help="busca por CEP ou por logradouro")
+    buscar.add_argument("texto")
+    buscar.add_argument("--limite", type=int, default=10)
+
+    args = parser.parse_args()
+    if args.comando == "carregar":
+        resultado = carregar_csv(args.arquivo, delimitador=args.delimitador, encoding=args.encoding)
+        print(f"{resultado['carregadas']} CEPs carregados, {resultado['rejeitadas']} linhas rejeitadas "
+              f"em {resultado['segundos']:.1f} s")
+    else:
+        for dados in CepOfflineBackend().buscar(args.texto, args.limite):
+            print(f"{dados['cep']}  {dados['logradouro']}, {dados['bairro']}, {dados['localidade']}/{dados['uf']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,14 @@
-import pandas as pd
-from io import BytesIO
+import functools
+import unicodedata
 
-def to_excel_bytes(df):
+
+@functools.lru_cache(maxsize=65536)
+def normalizar_texto(texto):
     """
-    Converte um DataFrame em bytes de um arquivo Excel (XLSX),
-    pronto para uso em st.download_button.
+    Remove acentos e converte para minúsculas, para buscas e comparação
+    de nomes (logradouros, cabeçalhos de planilha).
     """
-    output = BytesIO()
-    writer = pd.ExcelWriter(output, engine='openpyxl')
-    df.to_excel(writer, index=False, sheet_name='Viagens')
-    writer.close()
-    processed_data = output.getvalue()
-    return processed_data
+    texto = str(texto or "")
+    if not texto.isascii():
+        texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+    return texto.lower().strip()
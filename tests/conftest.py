@@ -0,0 +1,13 @@
+import pytest
+
+from src.database.db_manager import DBManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    """
+    DBManager de um banco temporário com todas as migrações aplicadas.
+    """
+    db = DBManager(str(tmp_path / "teste.db"))
+    yield db
+    db.pool.fechar()
@@ -0,0 +1,156 @@
+"""
+Consulta de CEP: cache no banco (validade, cache negativo) na frente de um
+backend de teste, e novas tentativas e timeouts do ViaCepBackend contra um
+servidor HTTP local (CEP_API_URL configurável).
+"""
+import http.server
+import json
+import threading
+import time
+
+import pytest
+import requests
+
+from src.utils.cep import CepCache, ServicoCep, ViaCepBackend
+
+SE = {"cep": "01001-000", "logradouro": "Praça da Sé", "complemento": "lado ímpar", "bairro": "Sé",
+      "localidade": "São Paulo", "uf": "SP"}
+
+
+class BackendTeste:
+    """
+    Backend em memória: responde pelo dicionário e conta as consultas.
+    """
+
+    def __init__(self, respostas):
+        self.respostas = respostas
+        self.chamadas = []
+
+    def consultar(self, cep):
+        self.chamadas.append(cep)
+        return self.respostas.get(cep)
+
+
+@pytest.fixture
+def servico(db):
+    backend = BackendTeste({"01001000": SE})
+    return ServicoCep(backend=backend, cache=CepCache(db, ttl=3600, ttl_negativo=60))
+
+
+def _envelhecer(db, cep, segundos):
+    # Espera a gravação do cache (enfileirada no escritor) e a torna mais antiga
+    db.escritor.executar(lambda conn: conn.execute(
+        "UPDATE cep_cache SET atualizado_em = atualizado_em - ? WHERE cep = ?", (segundos, cep)), "cep_cache")
+
+
+def test_acerto_no_cache_dentro_da_validade(db, servico):
+    assert servico.consultar("01001-000") == SE
+    _envelhecer(db, "01001000", 3000)
+    assert servico.consultar("01001000") == SE
+    assert servico.backend.chamadas == ["01001000"]
+    assert servico.estatisticas()["acertos_cache"] == 1
+
+
+def test_consulta_expirada_vai_ao_backend(db, servico):
+    servico.consultar("01001000")
+    _envelhecer(db, "01001000", 3601)
+    assert servico.consultar("01001000") == SE
+    assert servico.backend.chamadas == ["01001000"] * 2
+    assert servico.estatisticas()["acertos_cache"] == 0
+
+
+def test_cep_inexistente_no_cache_negativo(db, servico):
+    assert servico.consultar("99999999") is None
+    _envelhecer(db, "99999999", 30)
+    assert servico.consultar("99999999") is None
+    assert servico.backend.chamadas == ["99999999"]
+
+    # A validade do cache negativo é menor que a dos CEPs encontrados
+    _envelhecer(db, "99999999", 31)
+    assert servico.consultar("99999999") is None
+    assert servico.backend.chamadas == ["99999999"] * 2
+
+
+def test_cep_invalido_nao_consulta(servico):
+    assert servico.consultar("123") is None
+    assert servico.backend.chamadas == []
+
+
+class ServidorTeste(http.server.ThreadingHTTPServer):
+    """
+    Servidor ViaCEP local: as primeiras `falhas` requisições respondem 503 e
+    cada resposta espera `atraso` segundos.
+    """
+
+    def __init__(self, falhas=0, atraso=0.0):
+        self.falhas, self.atraso, self.requisicoes = falhas, atraso, 0
+        super().__init__(("127.0.0.1", 0), _Tratador)
+
+    def handle_error(self, request, client_address):
+        # O cliente desiste da resposta atrasada (timeout): conexão fechada
+        pass
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/ws"
+
+
+class _Tratador(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        servidor = self.server
+        servidor.requisicoes += 1
+        time.sleep(servidor.atraso)
+        if servidor.requisicoes <= servidor.falhas:
+            self.send_response(503)
+            self.end_headers()
+            return
+        cep = self.path.split("/")[2]
+        corpo = json.dumps(SE if cep == "01001000" else {"erro": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor(request):
+    servidor = ServidorTeste(**getattr(request, "param", {}))
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+@pytest.mark.parametrize("servidor", [{"falhas": 2}], indirect=True)
+def test_novas_tentativas_apos_erro_do_servidor(servidor):
+    backend = ViaCepBackend(servidor.url, tentativas=2, backoff=0)
+    assert backend.consultar("01001000") == SE
+    assert servidor.requisicoes == 3
+
+
+@pytest.mark.parametrize("servidor", [{"falhas": 5}], indirect=True)
+def test_tentativas_esgotadas(servidor):
+    backend = ViaCepBackend(servidor.url, tentativas=2, backoff=0)
+    with pytest.raises(requests.RequestException):
+        backend.consultar("01001000")
+    assert servidor.requisicoes == 3
+
+
+@pytest.mark.parametrize("servidor", [{"atraso": 0.5}], indirect=True)
+def test_timeout_de_leitura(servidor, db):
+    backend = ViaCepBackend(servidor.url, timeout=(1, 0.1), tentativas=1, backoff=0)
+    servico = ServicoCep(backend=backend, cache=CepCache(db))
+    inicio = time.monotonic()
+    assert servico.consultar("01001000") is None
+    assert time.monotonic() - inicio < 0.5
+    assert servidor.requisicoes == 2
+    assert servico.estatisticas()["erros_externos"] == 1
+
+
+def test_cep_inexistente_na_api(servidor):
+    assert ViaCepBackend(servidor.url, tentativas=0).consultar("99999999") is None
@@ -0,0 +1,71 @@
+"""
+Armazém colunar com leituras concorrentes às gravações: uma leitura entre o
+COMMIT do escritor e a invalidação do cache recarrega o armazém já com a
+viagem, que não pode ser acrescentada de novo.
+"""
+import threading
+
+from src.database.colunar import obter_armazem
+
+VIAGENS = 50
+
+
+def _incluir(db, i):
+    return db.enfileirar_viagem(None, None, f"Van {i % 3:02d}", 1000.0 + i, 1100.0 + i, "2024-03-01",
+                                "2024-03-01", 6.0, "Motorista", 0.0, 0.0, 10.0, 0.0, 0.0)
+
+
+def _total_sql(db):
+    return db._conexao().execute("SELECT COUNT(*) FROM viagens").fetchone()[0]
+
+
+def test_leitura_entre_commit_e_invalidacao(db, monkeypatch):
+    db._armazem = armazem = obter_armazem(db)
+    _incluir(db, 0).result()
+    armazem.buscar_viagens()
+    registrar_escrita = db.registrar_escrita
+
+    def ler_e_registrar(*tabelas):
+        # Outra sessão lê depois do COMMIT, antes da invalidação
+        leitor = threading.Thread(target=armazem.buscar_viagens)
+        leitor.start()
+        leitor.join()
+        return registrar_escrita(*tabelas)
+
+    monkeypatch.setattr(db, "registrar_escrita", ler_e_registrar)
+    futuros = [_incluir(db, i) for i in range(1, VIAGENS)]
+    for futuro in futuros:
+        futuro.result()
+    assert armazem.buscar_viagens()["total_viagens"] == _total_sql(db) == VIAGENS
+
+    db.excluir_registro("viagens", futuros[0].result()["id"])
+    assert armazem.buscar_viagens()["total_viagens"] == _total_sql(db) == VIAGENS - 1
+
+
+def test_leitores_e_escritores_concorrentes(db):
+    db._armazem = armazem = obter_armazem(db)
+    parar = threading.Event()
+
+    def ler():
+        while not parar.is_set():
+            armazem.buscar_viagens(limite=5)
+
+    leitores = [threading.Thread(target=ler) for _ in range(4)]
+    for leitor in leitores:
+        leitor.start()
+    try:
+        escritores = [threading.Thread(target=lambda k=k: [_incluir(db, k * VIAGENS + i).result()
+                                                          for i in range(VIAGENS)])
+                      for k in range(4)]
+        for escritor in escritores:
+            escritor.start()
+        for escritor in escritores:
+            escritor.join()
+    finally:
+        parar.set()
+        for leitor in leitores:
+            leitor.join()
+
+    pagina = armazem.buscar_viagens(limite=None)
+    assert pagina["total_viagens"] == _total_sql(db) == 4 * VIAGENS
+    assert pagina["viagens"]["ID"].is_unique
@@ -0,0 +1,72 @@
+"""
+Carga de gravações concorrentes pelo escritor único: muitas sessões e um
+segundo processo (outra conexão) gravando ao mesmo tempo, sem nenhum erro
+"database is locked" e sem perder nem duplicar viagens (versão pytest de
+benchmarks/stress_escritas.py).
+"""
+import sqlite3
+import threading
+
+import pytest
+from loguru import logger
+
+from benchmarks.stress_escritas import VIAGEM
+from src.database.db_manager import INSERIR_VIAGEM_SQL
+
+SESSOES = 20
+VIAGENS = 25
+EXTERNAS = 50
+
+
+@pytest.fixture
+def erros_log():
+    mensagens = []
+    sink = logger.add(lambda mensagem: mensagens.append(str(mensagem)), level="ERROR")
+    yield mensagens
+    logger.remove(sink)
+
+
+def test_sessoes_concorrentes_sem_bloqueio(db, erros_log):
+    barreira = threading.Barrier(SESSOES + 1)
+    erros = []
+
+    def sessao(indice):
+        barreira.wait()
+        try:
+            # Metade espera cada gravação, metade só enfileira e espera no fim
+            if indice % 2:
+                for _ in range(VIAGENS):
+                    db.inserir_viagem(*VIAGEM)
+            else:
+                for futuro in [db.enfileirar_viagem(*VIAGEM) for _ in range(VIAGENS)]:
+                    futuro.result()
+        except Exception as e:
+            erros.append(e)
+
+    def outro_processo():
+        conn = sqlite3.connect(db.db_path, timeout=30)
+        barreira.wait()
+        try:
+            for _ in range(EXTERNAS):
+                with conn:
+                    conn.execute(INSERIR_VIAGEM_SQL, VIAGEM)
+        except Exception as e:
+            erros.append(e)
+        finally:
+            conn.close()
+
+    transacoes = db.escritor.transacoes
+    threads = [threading.Thread(target=sessao, args=(i,)) for i in range(SESSOES)]
+    threads.append(threading.Thread(target=outro_processo))
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    assert not [mensagem for mensagem in erros_log if "locked" in mensagem]
+    total = db._conexao().execute("SELECT COUNT(*), COUNT(DISTINCT id) FROM viagens").fetchone()
+    assert total == (SESSOES * VIAGENS + EXTERNAS,) * 2
+    # As gravações das sessões são agrupadas em lotes pelo escritor
+    assert db.escritor.transacoes - transacoes < SESSOES * VIAGENS
+    assert db.obter_resumo_diario()["Número de Viagens"].sum() == SESSOES * VIAGENS + EXTERNAS
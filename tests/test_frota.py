@@ -0,0 +1,53 @@
+"""
+Indicadores da frota: obter_frota só lê; atualizar_frota grava pelo
+escritor apenas com carros pendentes e chega às mesmas somas de uma
+reconstrução completa.
+"""
+
+
+def _incluir(db, carro, data, km_saida, km_chegada, motorista="Motorista"):
+    return db.inserir_viagem(None, None, carro, km_saida, km_chegada, data, data, 6.0, motorista,
+                             100.0, 0.0, 20.0, 0.0, 5.0)
+
+
+def _somas(db):
+    conn = db._conexao()
+    return [conn.execute(f"SELECT * FROM {tabela} ORDER BY 1").fetchall()
+            for tabela in ("frota_carros", "frota_motoristas")]
+
+
+def test_leitura_nao_grava(db):
+    _incluir(db, "Van 01", "2024-01-10", 1000.0, 1200.0)
+    conn = db._conexao()
+    alteracoes = conn.total_changes
+    transacoes = db.escritor.transacoes
+
+    frota = db.obter_frota()
+
+    assert frota["carros"].empty
+    assert conn.execute("SELECT COUNT(*) FROM frota_pendentes").fetchone()[0] == 1
+    assert (conn.total_changes, db.escritor.transacoes) == (alteracoes, transacoes)
+
+
+def test_atualizacao_incremental(db):
+    _incluir(db, "Van 01", "2024-01-10", 1000.0, 1200.0, "Ana")
+    _incluir(db, "Van 01", "2024-01-20", 1250.0, 1400.0, "Bruno")
+    _incluir(db, "Van 02", "2024-01-15", 500.0, 800.0, "Ana")
+    assert db.atualizar_frota() == 3
+    assert db.obter_frota()["carros"]["Descontinuidades"].tolist() == [1, 0]
+
+    # Viagem retroativa entre as duas da Van 01 e exclusão de outra
+    _incluir(db, "Van 01", "2024-01-15", 1200.0, 1250.0, "Bruno")
+    db.excluir_registro("viagens", _incluir(db, "Van 02", "2024-02-01", 800.0, 900.0))
+    # Só as viagens da Van 01 a partir de 15/01; a da Van 02 já foi excluída
+    assert db.atualizar_frota() == 2
+    transacoes = db.escritor.transacoes
+    assert db.atualizar_frota() == 0
+    assert db.escritor.transacoes == transacoes
+
+    frota = db.obter_frota()
+    assert frota["carros"]["Descontinuidades"].tolist() == [0, 0]
+    assert frota["carros"]["Total de KM"].tolist() == [400.0, 300.0]
+    incrementais = _somas(db)
+    db.reconstruir_frota()
+    assert _somas(db) == incrementais
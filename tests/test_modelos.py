@@ -0,0 +1,30 @@
+"""
+Tipos do DataFrame compacto de obter_viagens_completo: valores em float64
+(contas sobre eles não estouram), inclusive num resultado vazio.
+"""
+from src.database.modelos import COLUNAS_CATEGORIA, COLUNAS_DATA
+
+
+def _tipos(df):
+    return {coluna: str(tipo) for coluna, tipo in df.dtypes.items()}
+
+
+def _esperados(df):
+    return {coluna: "datetime64[ns]" if coluna in COLUNAS_DATA
+            else "category" if coluna in COLUNAS_CATEGORIA else "float64" for coluna in df.columns}
+
+
+def test_viagens_vazias_com_tipos(db):
+    viagens = db.obter_viagens_completo()
+    assert viagens.empty
+    assert _tipos(viagens) == _esperados(viagens)
+
+
+def test_valores_inteiros_continuam_float64(db):
+    for km_saida in (100.0, 120.0, 50.0):
+        db.inserir_viagem(None, None, "Van 01", km_saida, km_saida + 100.0, "2024-03-01", "2024-03-01", 6.0,
+                          "Ana", 100.0, 0.0, 20.0, 0.0, 5.0)
+    viagens = db.obter_viagens_completo()
+    assert _tipos(viagens) == _esperados(viagens)
+    assert (viagens["Quilometragem de Saída"] * 2).tolist() == [200.0, 240.0, 100.0]
+    assert (viagens["Valor Total da Viagem"] * 1000).tolist() == [225000.0] * 3
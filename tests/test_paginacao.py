@@ -0,0 +1,53 @@
+"""
+Paginação por chave de DBManager.buscar_viagens com viagens sem data de
+saída: as páginas percorrem todas as viagens, sem repetir nem pular, nas
+duas ordens, pelo SQL e pelo armazém colunar.
+"""
+import pytest
+
+from src.database.colunar import obter_armazem
+
+DATAS = ["2024-03-01", None, "2024-01-15", "2024-03-01", None, "2023-12-31", "2024-02-10", None, None,
+         "2024-01-15", "2024-05-20"]
+
+
+@pytest.fixture(params=["sql", "colunar"])
+def db_viagens(request, db):
+    for i, data in enumerate(DATAS):
+        db.inserir_viagem(None, None, "Van 01", 1000.0 + i, 1100.0 + i, data, data, 6.0, "Motorista",
+                          0.0, 0.0, 10.0, 0.0, 0.0)
+    if request.param == "colunar":
+        db._armazem = obter_armazem(db)
+    return db
+
+
+def _ordem_esperada(db, ordem):
+    viagens = db._conexao().execute("SELECT id, data_saida FROM viagens").fetchall()
+    # Datas nulas antes de todas as outras (como no SQLite)
+    crescente = sorted(viagens, key=lambda v: (v[1] is not None, v[1] or "", v[0]))
+    ids = [viagem_id for viagem_id, _ in crescente]
+    return ids[::-1] if ordem.startswith("-") else ids
+
+
+@pytest.mark.parametrize("ordem", ["-data_saida", "data_saida"])
+@pytest.mark.parametrize("limite", [1, 2, 3, 4])
+def test_paginas_atravessam_datas_nulas(db_viagens, ordem, limite):
+    ids, cursor = [], None
+    for _ in range(len(DATAS) + 1):
+        pagina = db_viagens.buscar_viagens(ordem=ordem, limite=limite, cursor=cursor)
+        assert pagina["total_viagens"] == len(DATAS)
+        ids += pagina["viagens"]["ID"].tolist()
+        cursor = pagina["proximo_cursor"]
+        if cursor is None:
+            break
+    assert ids == _ordem_esperada(db_viagens, ordem)
+
+
+@pytest.mark.parametrize("ordem", ["-data_saida", "data_saida"])
+def test_cursor_em_viagem_sem_data(db_viagens, ordem):
+    esperada = _ordem_esperada(db_viagens, ordem)
+    datas = dict(db_viagens._conexao().execute("SELECT id, data_saida FROM viagens").fetchall())
+    for posicao, viagem_id in enumerate(esperada):
+        if datas[viagem_id] is None:
+            pagina = db_viagens.buscar_viagens(ordem=ordem, limite=None, cursor=(None, viagem_id))
+            assert pagina["viagens"]["ID"].tolist() == esperada[posicao + 1:]
@@ -0,0 +1,22 @@
+"""
+Partida a frio da aplicação: importar o main.py (em um processo novo) não
+carrega os pacotes usados só sob demanda e fica dentro do limite de tempo
+(ver benchmarks/tempo_importacao.py).
+"""
+import pytest
+
+from benchmarks.tempo_importacao import LIMITE_MS, SOB_DEMANDA, medir
+
+
+@pytest.fixture(scope="module")
+def tempos():
+    # A menor de algumas medições, como no benchmark
+    return min((medir() for _ in range(3)), key=lambda t: t["main"])
+
+
+def test_pacotes_sob_demanda_fora_da_partida(tempos):
+    assert [pacote for pacote in SOB_DEMANDA if pacote in tempos] == []
+
+
+def test_tempo_de_importacao(tempos):
+    assert tempos["main"] <= LIMITE_MS, f"main importado em {tempos['main']:.0f} ms"
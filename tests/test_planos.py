@@ -0,0 +1,16 @@
+"""
+Regressão dos planos de consulta: os comandos emitidos pelos métodos do
+DBManager usados pelas abas usam os índices criados pelas migrações (lista
+em benchmarks/verificar_planos.py).
+"""
+import pytest
+
+from benchmarks.verificar_planos import CHAMADAS, indices_ausentes, planos_chamada, preparar
+
+
+@pytest.mark.parametrize("descricao, chamada, indices", CHAMADAS, ids=[c[0] for c in CHAMADAS])
+def test_chamada_usa_indices(db, descricao, chamada, indices):
+    preparar(db)
+    plano = planos_chamada(db, chamada)
+    assert plano, f"{descricao}: nenhum comando emitido"
+    assert not indices_ausentes(plano, indices), f"{descricao}: {' | '.join(plano)}"
@@ -0,0 +1,49 @@
+"""
+Réplica de leitura: só as escritas nas tabelas que ela atende a suspendem
+e contam para antecipar a cópia.
+"""
+import time
+
+from src.database.replica import ReplicaLeitura
+
+
+def _replica(db, escritas):
+    db._replica = replica = ReplicaLeitura(db, "memoria", intervalo=3600, escritas=escritas,
+                                           atraso_maximo=3600, paginas=-1)
+    while not replica.copias:
+        time.sleep(0.01)
+    return replica
+
+
+def _gravar_cep(conn):
+    conn.execute("INSERT OR REPLACE INTO cep_cache (cep, dados, atualizado_em) VALUES ('01001000', '{}', 0)")
+
+
+def test_escritas_fora_da_replica_nao_a_suspendem(db):
+    replica = _replica(db, escritas=1)
+    for _ in range(5):
+        db.escritor.executar(_gravar_cep, "cep_cache")
+    db.escritor.executar(lambda conn: conn.execute("DELETE FROM frota_pendentes"), "frota_pendentes")
+
+    assert replica.estado()["escritas_pendentes"] == 0
+    assert replica.copias == 1
+    assert db._conexao_leitura() is not db._conexao()
+
+
+def test_copia_antecipada_pelo_limite_de_escritas(db):
+    replica = _replica(db, escritas=3)
+    for i in range(2):
+        db.inserir_viagem(None, None, "Van 01", 0.0, 10.0, "2024-03-01", "2024-03-01", 6.0, "Ana",
+                          0.0, 0.0, 1.0, 0.0, 0.0)
+    # Escritas do processo ainda não copiadas: as leituras vão para o banco principal
+    assert replica.estado()["escritas_pendentes"] == 2
+    assert db._conexao_leitura() is db._conexao()
+    assert replica.copias == 1
+
+    db.inserir_viagem(None, None, "Van 01", 10.0, 20.0, "2024-03-02", "2024-03-02", 6.0, "Ana",
+                      0.0, 0.0, 1.0, 0.0, 0.0)
+    inicio = time.monotonic()
+    while replica.estado()["escritas_pendentes"] and time.monotonic() - inicio < 10:
+        time.sleep(0.01)
+    assert replica.copias == 2
+    assert db._conexao_leitura().execute("SELECT COUNT(*) FROM viagens").fetchone()[0] == 3
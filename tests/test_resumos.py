@@ -0,0 +1,58 @@
+"""
+Resumos diários mantidos por triggers: alterar as colunas de que total_km,
+litros e os valores gerados são calculados atualiza os resumos, inclusive
+em bancos migrados com os triggers antigos.
+"""
+import sqlite3
+
+from src.database.migrations import MIGRACOES, aplicar_migracoes
+from src.database.resumos import _triggers
+
+COLUNAS = "viagens, total_km, litros, valor_combustivel, valor_total"
+
+
+def _incluir(db):
+    return db.inserir_viagem(None, None, "Van 01", 100.0, 200.0, "2024-03-01", "2024-03-02", 6.0, "Ana",
+                             50.0, 0.0, 10.0, 0.0, 0.0)
+
+
+def _alterar(conn, viagem_id):
+    conn.execute("UPDATE viagens SET km_chegada = 500, diesel_s10 = 40 WHERE id = ?", (viagem_id,))
+
+
+def _resumos(conn):
+    return [conn.execute(f"SELECT {COLUNAS} FROM {tabela}").fetchall()
+            for tabela in ("resumo_diario", "resumo_diario_carro_motorista")]
+
+
+def test_alteracao_das_entradas_atualiza_resumos(db):
+    viagem_id = _incluir(db)
+    db.escritor.executar(lambda conn: _alterar(conn, viagem_id), "viagens")
+
+    conn = db._conexao()
+    assert _resumos(conn) == [[(1, 400.0, 40.0, 240.0, 290.0)]] * 2
+    assert db.obter_resumo_diario()["Total de KM"].tolist() == [400.0]
+
+
+def test_migracao_corrige_resumos_defasados(tmp_path):
+    conn = sqlite3.connect(tmp_path / "antigo.db", isolation_level=None)
+    aplicar_migracoes(conn, [migracao for migracao in MIGRACOES if migracao[0] <= 12])
+    # Triggers de alteração como ficavam após a migração 9: pelas colunas geradas
+    for momento in ("old", "new"):
+        conn.execute(f"DROP TRIGGER trg_viagens_resumo_update_{momento}")
+    for trigger in _triggers():
+        conn.execute(trigger)
+    conn.execute('''
+        INSERT INTO viagens (carro, motorista, km_saida, km_chegada, data_saida, data_volta, valor,
+                             diaria_motorista, diesel_s10)
+        VALUES ('Van 01', 'Ana', 100, 200, '2024-03-01', '2024-03-02', 6, 50, 10)
+    ''')
+    _alterar(conn, 1)
+    assert _resumos(conn)[0] == [(1, 100.0, 10.0, 60.0, 110.0)]
+
+    aplicar_migracoes(conn)
+    assert _resumos(conn) == [[(1, 400.0, 40.0, 240.0, 290.0)]] * 2
+    _alterar(conn, 1)
+    conn.execute("UPDATE viagens SET diesel_s500 = 10 WHERE id = 1")
+    assert _resumos(conn) == [[(1, 400.0, 50.0, 300.0, 350.0)]] * 2
+    conn.close()